@@ -0,0 +1,87 @@
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_codec import AudioConverter
+
+parser = argparse.ArgumentParser(
+    description="Compares the streaming audio codec with the stateless audioop calls it replaced."
+)
+parser.add_argument("--seconds", type=float, default=60, help="Seconds of audio per run")
+parser.add_argument(
+    "--chunk-ms",
+    type=int,
+    nargs="+",
+    default=[20, 100, 1000],
+    help="Size of the chunks the audio arrives in (Twilio sends 20ms)",
+)
+args = parser.parse_args()
+
+# (name, input sample rate, output sample rate, input encoding, output encoding)
+CASES = [
+    ("twilio mulaw -> vad", 8000, 8000, AudioEncoding.MULAW, AudioEncoding.LINEAR16),
+    ("16k linear -> vad", 16000, 8000, AudioEncoding.LINEAR16, AudioEncoding.LINEAR16),
+    ("mp3 decode -> twilio", 44100, 8000, AudioEncoding.LINEAR16, AudioEncoding.MULAW),
+    ("24k tts -> twilio", 24000, 8000, AudioEncoding.LINEAR16, AudioEncoding.MULAW),
+]
+
+
+def audioop_converter(
+    input_sample_rate: int,
+    output_sample_rate: int,
+    input_encoding: AudioEncoding,
+    output_encoding: AudioEncoding,
+) -> Callable[[bytes], bytes]:
+    import audioop
+
+    def convert(chunk: bytes) -> bytes:
+        if input_encoding == AudioEncoding.MULAW:
+            chunk = audioop.ulaw2lin(chunk, 2)
+        if input_sample_rate != output_sample_rate:
+            chunk, _ = audioop.ratecv(chunk, 2, 1, input_sample_rate, output_sample_rate, None)
+        if output_encoding == AudioEncoding.MULAW:
+            chunk = audioop.lin2ulaw(chunk, 2)
+        return chunk
+
+    return convert
+
+
+def time_chunks(convert: Callable[[bytes], bytes], chunks: List[bytes]) -> float:
+    start = time.perf_counter()
+    for chunk in chunks:
+        convert(chunk)
+    return time.perf_counter() - start
+
+
+def run(name, input_sample_rate, output_sample_rate, input_encoding, output_encoding, chunk_ms):
+    rng = np.random.default_rng(0)
+    num_samples = int(args.seconds * input_sample_rate)
+    if input_encoding == AudioEncoding.MULAW:
+        audio = rng.integers(0, 256, size=num_samples, dtype=np.uint8).tobytes()
+        chunk_size = input_sample_rate * chunk_ms // 1000
+    else:
+        audio = rng.integers(-32768, 32768, size=num_samples, dtype=np.int16).tobytes()
+        chunk_size = input_sample_rate * 2 * chunk_ms // 1000
+    chunks = [audio[i : i + chunk_size] for i in range(0, len(audio), chunk_size)]
+
+    codec = AudioConverter(input_sample_rate, output_sample_rate, input_encoding, output_encoding)
+    codec_seconds = time_chunks(codec.convert, chunks)
+    line = f"{name:>22} {chunk_ms:>5}ms chunks: audio_codec {codec_seconds / len(chunks) * 1e6:8.2f}us/chunk"
+    try:
+        audioop_seconds = time_chunks(
+            audioop_converter(input_sample_rate, output_sample_rate, input_encoding, output_encoding),
+            chunks,
+        )
+        line += f", audioop {audioop_seconds / len(chunks) * 1e6:8.2f}us/chunk"
+    except ImportError:
+        line += ", audioop not available"
+    print(line)
+
+
+if __name__ == "__main__":
+    for case in CASES:
+        for chunk_ms in args.chunk_ms:
+            run(*case, chunk_ms)
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import random
+import time
+
+from vocode.streaming.utils.timers import TimerService
+
+parser = argparse.ArgumentParser(
+    description="Compares per-conversation idle and sentiment polling with the shared TimerService."
+)
+parser.add_argument("--conversations", type=int, default=200)
+parser.add_argument("--seconds", type=float, default=20, help="How long the conversations run")
+parser.add_argument("--idle-seconds", type=float, default=15, help="Allowed idle time of a conversation")
+parser.add_argument(
+    "--activity-interval", type=float, default=0.4, help="Seconds between activity marks, one per audio chunk sent"
+)
+args = parser.parse_args()
+
+# the longest period of the polling loops, conversations start spread over it
+STAGGER_SECONDS = 2
+
+
+class BaselineConversation:
+    """Only the activity, which costs the same with both idle implementations."""
+
+    def mark_last_action_timestamp(self):
+        pass
+
+    def start(self):
+        return []
+
+
+class PollingConversation:
+    """The idle check and sentiment tracking as they were, a sleeping loop each."""
+
+    def __init__(self):
+        self.last_action_timestamp = time.time()
+        self.wakeups = 0
+
+    def mark_last_action_timestamp(self):
+        self.last_action_timestamp = time.time()
+
+    async def check_for_idle(self):
+        while True:
+            self.wakeups += 1
+            if time.time() - self.last_action_timestamp > args.idle_seconds:
+                pass
+            await asyncio.sleep(2)
+
+    async def track_bot_sentiment(self):
+        while True:
+            await asyncio.sleep(1)
+            self.wakeups += 1
+
+    def start(self):
+        return [asyncio.create_task(self.check_for_idle()), asyncio.create_task(self.track_bot_sentiment())]
+
+
+class TimerConversation:
+    def __init__(self, timers: TimerService):
+        self.timers = timers
+        self.idle_timer = timers.call_later(args.idle_seconds, self.handle_idle)
+        self.sentiment_timer = timers.call_every(1, self.track_bot_sentiment)
+
+    def mark_last_action_timestamp(self):
+        self.idle_timer.reschedule(args.idle_seconds)
+
+    def handle_idle(self):
+        self.idle_timer = self.timers.call_later(args.idle_seconds, self.handle_idle)
+
+    async def track_bot_sentiment(self):
+        pass
+
+    def start(self):
+        return []
+
+
+async def generate_activity(conversation):
+    # conversations are out of phase, like real calls
+    await asyncio.sleep(random.random() * args.activity_interval)
+    while True:
+        conversation.mark_last_action_timestamp()
+        await asyncio.sleep(args.activity_interval)
+
+
+async def start_conversation(create_conversation, conversations, tasks):
+    # calls start at different times, so their periodic deadlines don't coincide
+    await asyncio.sleep(random.random() * STAGGER_SECONDS)
+    conversation = create_conversation()
+    conversations.append(conversation)
+    tasks.extend(conversation.start())
+    tasks.append(asyncio.create_task(generate_activity(conversation)))
+
+
+async def run(create_conversation, count_wakeups):
+    conversations, tasks = [], []
+    await asyncio.gather(
+        *(start_conversation(create_conversation, conversations, tasks) for _ in range(args.conversations))
+    )
+
+    wakeups_start = count_wakeups(conversations)
+    cpu_start = time.process_time()
+    await asyncio.sleep(args.seconds)
+    cpu_seconds = time.process_time() - cpu_start
+    wakeups = count_wakeups(conversations) - wakeups_start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return cpu_seconds, wakeups / args.seconds
+
+
+async def main():
+    baseline_cpu, _ = await run(BaselineConversation, lambda conversations: 0)
+    polling_cpu, polling_wakeups = await run(
+        PollingConversation, lambda conversations: sum(conversation.wakeups for conversation in conversations)
+    )
+    timers = TimerService()
+    timers_cpu, timers_wakeups = await run(lambda: TimerConversation(timers), lambda conversations: timers.wakeups)
+
+    print(f"{args.conversations} conversations for {args.seconds:.0f}s, activity every {args.activity_interval}s")
+    print("loop wakeups for the idle checks and sentiment ticks, CPU on top of the activity alone")
+    print(f"activity only: {baseline_cpu:.3f}s CPU")
+    print(f"polling: {polling_wakeups:8.1f} wakeups/s, {polling_cpu - baseline_cpu:.3f}s CPU over the activity")
+    print(f"timers:  {timers_wakeups:8.1f} wakeups/s, {timers_cpu - baseline_cpu:.3f}s CPU over the activity")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Measures how often the local interrupt classifier agrees with the LLM.
+
+Reads a JSON lines file of utterances said while the bot was speaking:
+
+    {"text": "Počkejte", "last_bot_message": "Dobrý den, volám ohledně...", "llm_interrupt": true}
+
+`llm_interrupt` is the LLM's decision. Utterances without it are labeled with `--label-missing`,
+which calls the LLM the same way InterruptWorker does; `--save-labels` stores the labeled
+utterances so later runs are offline.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from vocode.streaming.utils.interrupt_classifier import LexicalInterruptClassifier
+from vocode.streaming.utils.interruption_worker import INTERRUPT_MODEL, ask_llm_to_interrupt
+
+parser = argparse.ArgumentParser(description="Evaluates the local interrupt classifier against LLM decisions.")
+parser.add_argument("utterances", help="JSON lines file with text, last_bot_message and llm_interrupt")
+parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9])
+parser.add_argument("--label-missing", action="store_true", help="Ask the LLM for the missing decisions")
+parser.add_argument("--model", default=INTERRUPT_MODEL)
+parser.add_argument("--save-labels", help="Write the labeled utterances to this file")
+parser.add_argument("--show-disagreements", action="store_true")
+args = parser.parse_args()
+
+
+def load_utterances(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def label_missing(utterances: List[Dict]):
+    for utterance in utterances:
+        if "llm_interrupt" in utterance:
+            continue
+        utterance["llm_interrupt"], _ = await ask_llm_to_interrupt(
+            utterance["text"], utterance.get("last_bot_message"), model=args.model
+        )
+
+
+def evaluate(utterances: List[Dict]):
+    classifier = LexicalInterruptClassifier()
+    start = time.perf_counter()
+    classifications = [
+        classifier.classify(utterance["text"], utterance.get("last_bot_message")) for utterance in utterances
+    ]
+    latency_ms = (time.perf_counter() - start) / len(utterances) * 1000
+    labels = [utterance["llm_interrupt"] for utterance in utterances]
+    agreement = sum(c.is_interrupt == label for c, label in zip(classifications, labels)) / len(labels)
+    print(f"{len(utterances)} utterances, {latency_ms:.3f}ms per classification")
+    print(f"classifier alone agrees with the LLM on {agreement:.1%}")
+
+    for threshold in args.thresholds:
+        local = [(c, label) for c, label in zip(classifications, labels) if c.confidence >= threshold]
+        agreed = sum(c.is_interrupt == label for c, label in local)
+        false_interrupts = sum(c.is_interrupt and not label for c, label in local)
+        missed_interrupts = sum(not c.is_interrupt and label for c, label in local)
+        local_agreement = agreed / len(local) if local else 1.0
+        # escalated utterances get the LLM's decision
+        overall_agreement = (agreed + len(labels) - len(local)) / len(labels)
+        print(
+            f"threshold {threshold:.2f}: {len(local) / len(labels):.1%} decided locally, "
+            f"local agreement {local_agreement:.1%} ({false_interrupts} false interrupts, "
+            f"{missed_interrupts} missed), overall agreement {overall_agreement:.1%}"
+        )
+
+    if args.show_disagreements:
+        for utterance, classification in zip(utterances, classifications):
+            if classification.is_interrupt != utterance["llm_interrupt"]:
+                print(
+                    f"  {utterance['text']!r}: LLM {utterance['llm_interrupt']}, classifier "
+                    f"{classification.is_interrupt} ({classification.reason}, {classification.confidence})"
+                )
+
+
+async def main():
+    utterances = load_utterances(args.utterances)
+    if args.label_missing:
+        await label_missing(utterances)
+    unlabeled = [utterance for utterance in utterances if "llm_interrupt" not in utterance]
+    if unlabeled:
+        print(f"Skipping {len(unlabeled)} utterances without an LLM decision, use --label-missing")
+    labeled = [utterance for utterance in utterances if "llm_interrupt" in utterance]
+    if args.save_labels:
+        with open(args.save_labels, "w") as f:
+            for utterance in labeled:
+                f.write(json.dumps(utterance, ensure_ascii=False) + "\n")
+    if not labeled:
+        print("No labeled utterances")
+        return
+    evaluate(labeled)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,294 @@
+"""
+Runs N simultaneous StreamingConversations in this process, fully offline, and reports how
+latency degrades as N ramps up.
+
+Every call plays tests/streaming/data/fake_audio.wav to the conversation in real time in 20ms
+chunks followed by a pause. A fake transcriber finalizes a transcription once a whole utterance
+has arrived, a scripted agent answers with two sentences and the TestSynthesizer fixture speaks
+them. A turn's latency is the time from the final transcription to the first reply audio chunk
+reaching the output device.
+
+    python playground/streaming/load_test.py --levels 1 10 50 100 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import wave
+from typing import AsyncGenerator, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tests.streaming.data.loader import get_audio_path
+from tests.streaming.fixtures.synthesizer import TestSynthesizer, TestSynthesizerConfig
+from tests.streaming.fixtures.transcriber import TestTranscriberConfig
+from vocode.streaming.agent.base_agent import RespondAgent
+from vocode.streaming.models.agent import EchoAgentConfig
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.output_device.base_output_device import BaseOutputDevice
+from vocode.streaming.streaming_conversation import StreamingConversation
+from vocode.streaming.transcriber.base_transcriber import BaseAsyncTranscriber, Transcription
+from vocode.streaming.utils.audio_codec import Resampler
+
+SAMPLING_RATE = 8000
+CHUNK_SECONDS = 0.02
+CHUNK_SIZE = int(SAMPLING_RATE * CHUNK_SECONDS) * 2
+LOOP_LAG_INTERVAL_SECONDS = 0.05
+SCRIPT = [
+    "Thank you, I have noted that down.",
+    "Could you tell me a bit more about it?",
+]
+
+
+class LoadTestMetrics:
+    """Everything measured while one level of concurrent calls runs."""
+
+    def __init__(self, late_threshold_seconds: float, drop_threshold_seconds: float):
+        self.late_threshold_seconds = late_threshold_seconds
+        self.drop_threshold_seconds = drop_threshold_seconds
+        self.turn_latencies: List[float] = []
+        self.loop_lags: List[float] = []
+        self.input_chunks = 0
+        self.late_input_chunks = 0
+        self.dropped_input_chunks = 0
+        self.output_chunks = 0
+        self.late_output_chunks = 0
+
+    def record_input_delay(self, delay: float) -> bool:
+        """Returns False when a chunk arrived too late for a jitter buffer and is dropped."""
+        self.input_chunks += 1
+        if delay > self.drop_threshold_seconds:
+            self.dropped_input_chunks += 1
+            return False
+        if delay > self.late_threshold_seconds:
+            self.late_input_chunks += 1
+        return True
+
+    def summarize(self, num_calls: int, cpu_percent: float, rss_mb: float) -> Dict[str, float]:
+        def percentile(values: List[float], q: float) -> float:
+            return float(np.percentile(values, q)) * 1000 if values else float("nan")
+
+        return {
+            "calls": num_calls,
+            "turns": len(self.turn_latencies),
+            "turn_p50_ms": percentile(self.turn_latencies, 50),
+            "turn_p95_ms": percentile(self.turn_latencies, 95),
+            "turn_p99_ms": percentile(self.turn_latencies, 99),
+            "loop_lag_p50_ms": percentile(self.loop_lags, 50),
+            "loop_lag_p99_ms": percentile(self.loop_lags, 99),
+            "loop_lag_max_ms": max(self.loop_lags, default=float("nan")) * 1000,
+            "cpu_percent": cpu_percent,
+            "rss_mb": rss_mb,
+            "input_chunks": self.input_chunks,
+            "late_input_chunks": self.late_input_chunks,
+            "dropped_input_chunks": self.dropped_input_chunks,
+            "output_chunks": self.output_chunks,
+            "late_output_chunks": self.late_output_chunks,
+        }
+
+
+class CallProbe:
+    """Connects the transcriber and output device of one call to measure its turns."""
+
+    # a longer gap between output chunks is a new utterance rather than a late chunk
+    UTTERANCE_GAP_SECONDS = 0.5
+
+    def __init__(self, metrics: LoadTestMetrics):
+        self.metrics = metrics
+        self.transcribed_at: Optional[float] = None
+        self.last_chunk_end: Optional[float] = None
+
+    def on_transcription(self):
+        self.transcribed_at = time.perf_counter()
+
+    def on_output_chunk(self, chunk: bytes):
+        now = time.perf_counter()
+        self.metrics.output_chunks += 1
+        if self.transcribed_at is not None:
+            self.metrics.turn_latencies.append(now - self.transcribed_at)
+            self.transcribed_at = None
+        elif self.last_chunk_end is not None:
+            gap = now - self.last_chunk_end
+            if self.metrics.late_threshold_seconds < gap < self.UTTERANCE_GAP_SECONDS:
+                self.metrics.late_output_chunks += 1
+        self.last_chunk_end = now + len(chunk) / (SAMPLING_RATE * 2)
+
+
+class LoadTestTranscriber(BaseAsyncTranscriber[TestTranscriberConfig]):
+    """Finalizes a transcription every time a whole utterance of audio has been received, silence isn't counted."""
+
+    def __init__(self, transcriber_config: TestTranscriberConfig, utterance_bytes: int, probe: CallProbe):
+        super().__init__(transcriber_config)
+        self.utterance_bytes = utterance_bytes
+        self.probe = probe
+
+    async def _run_loop(self):
+        received = 0
+        turn = 0
+        while True:
+            try:
+                chunk = await self.input_queue.get()
+            except asyncio.CancelledError:
+                return
+            if chunk.strip(b"\x00"):
+                received += len(chunk)
+            if received >= self.utterance_bytes:
+                received -= self.utterance_bytes
+                turn += 1
+                self.probe.on_transcription()
+                self.output_queue.put_nowait(Transcription(message=f"answer {turn}", confidence=1, is_final=True))
+
+
+class LoadTestOutputDevice(BaseOutputDevice):
+    def __init__(self, probe: CallProbe):
+        super().__init__(sampling_rate=SAMPLING_RATE, audio_encoding=AudioEncoding.LINEAR16)
+        self.probe = probe
+
+    def consume_nonblocking(self, chunk: bytes):
+        self.probe.on_output_chunk(chunk)
+
+
+class ScriptedAgent(RespondAgent[EchoAgentConfig]):
+    async def respond(self, human_input, conversation_id: str, is_interrupt: bool = False):
+        return " ".join(SCRIPT), False
+
+    async def generate_response(
+        self, human_input, conversation_id: str, is_interrupt: bool = False
+    ) -> AsyncGenerator[str, None]:
+        for sentence in SCRIPT:
+            yield sentence
+
+    def update_last_bot_message_on_cut_off(self, message: str):
+        pass
+
+
+def load_utterance() -> bytes:
+    with wave.open(get_audio_path("fake_audio.wav")) as wav:
+        audio = wav.readframes(wav.getnframes())
+        return Resampler(wav.getframerate(), SAMPLING_RATE).resample(audio)
+
+
+async def feed_audio(
+    conversation: StreamingConversation, utterance: bytes, pause_seconds: float, metrics: LoadTestMetrics
+):
+    """Sends the utterance and the pause after it in real time, like a telephony media stream."""
+    audio = utterance + b"\x00" * (int(pause_seconds * SAMPLING_RATE) * 2)
+    chunks = [audio[i : i + CHUNK_SIZE] for i in range(0, len(audio), CHUNK_SIZE)]
+    start = time.perf_counter()
+    chunk_index = 0
+    while conversation.is_active():
+        due = start + chunk_index * CHUNK_SECONDS
+        now = time.perf_counter()
+        if due > now:
+            await asyncio.sleep(due - now)
+        if metrics.record_input_delay(time.perf_counter() - due):
+            await conversation.receive_audio(chunks[chunk_index % len(chunks)])
+        chunk_index += 1
+
+
+async def monitor_loop_lag(metrics: LoadTestMetrics):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        metrics.loop_lags.append(time.perf_counter() - start - LOOP_LAG_INTERVAL_SECONDS)
+
+
+def get_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # peak instead of current outside of Linux, kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def create_conversation(utterance: bytes, probe: CallProbe) -> StreamingConversation:
+    output_device = LoadTestOutputDevice(probe)
+    transcriber_config = TestTranscriberConfig(
+        sampling_rate=SAMPLING_RATE,
+        audio_encoding=AudioEncoding.LINEAR16,
+        chunk_size=CHUNK_SIZE,
+    )
+    return StreamingConversation(
+        output_device=output_device,
+        transcriber=LoadTestTranscriber(transcriber_config, len(utterance), probe),
+        agent=ScriptedAgent(EchoAgentConfig()),
+        synthesizer=TestSynthesizer(TestSynthesizerConfig.from_output_device(output_device)),
+        logger=logging.getLogger("load_test"),
+    )
+
+
+async def run_level(num_calls: int, utterance: bytes, args: argparse.Namespace) -> Dict[str, float]:
+    metrics = LoadTestMetrics(args.late_threshold_ms / 1000, args.drop_threshold_ms / 1000)
+    monitor_task = asyncio.create_task(monitor_loop_lag(metrics))
+    conversations = []
+    feed_tasks = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(num_calls):
+        conversation = create_conversation(utterance, CallProbe(metrics))
+        await conversation.start()
+        conversations.append(conversation)
+        feed_tasks.append(asyncio.create_task(feed_audio(conversation, utterance, args.pause, metrics)))
+        await asyncio.sleep(args.ramp_interval)
+    await asyncio.sleep(args.duration)
+    cpu_percent = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+    rss_mb = get_rss_mb()
+
+    monitor_task.cancel()
+    for feed_task in feed_tasks:
+        feed_task.cancel()
+    await asyncio.gather(*(conversation.terminate() for conversation in conversations), return_exceptions=True)
+    return metrics.summarize(num_calls, cpu_percent, rss_mb)
+
+
+def print_summary(summary: Dict[str, float]):
+    print(
+        f"{summary['calls']:>5} calls {summary['turns']:>6} turns | "
+        f"turn p50 {summary['turn_p50_ms']:7.1f}ms p95 {summary['turn_p95_ms']:7.1f}ms "
+        f"p99 {summary['turn_p99_ms']:7.1f}ms | "
+        f"loop lag p50 {summary['loop_lag_p50_ms']:6.1f}ms p99 {summary['loop_lag_p99_ms']:6.1f}ms "
+        f"max {summary['loop_lag_max_ms']:6.1f}ms | "
+        f"cpu {summary['cpu_percent']:5.1f}% rss {summary['rss_mb']:7.1f}MB | "
+        f"input late {summary['late_input_chunks']} dropped {summary['dropped_input_chunks']} "
+        f"of {summary['input_chunks']} | output late {summary['late_output_chunks']} of {summary['output_chunks']}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="Concurrent calls per level")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds every level runs once all calls started")
+    parser.add_argument("--ramp-interval", type=float, default=0.05, help="Seconds between call starts")
+    parser.add_argument("--pause", type=float, default=3, help="Seconds of silence after every utterance")
+    parser.add_argument("--late-threshold-ms", type=float, default=40)
+    parser.add_argument("--drop-threshold-ms", type=float, default=200, help="Lateness a jitter buffer absorbs")
+    parser.add_argument("--json", help="Also write the summaries to this file")
+    parser.add_argument("--conversation-log-level", default="CRITICAL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # per-call errors such as missing Redis settings would drown the results
+    logging.getLogger("load_test").setLevel(args.conversation_log_level)
+    utterance = load_utterance()
+    summaries = []
+    for num_calls in args.levels:
+        summary = await run_level(num_calls, utterance, args)
+        print_summary(summary)
+        summaries.append(summary)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(summaries, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+import argparse
+import re
+import time
+
+from vocode.streaming.agent.sentence_collator import SENTENCE_ENDINGS, SentenceCollator
+
+parser = argparse.ArgumentParser(
+    description="Compares the regex collation of streamed tokens with the incremental SentenceCollator."
+)
+parser.add_argument("--responses", type=int, default=2000)
+parser.add_argument("--language", type=str, default="cs")
+parser.add_argument("--min-clause-length", type=int, default=30, help="Early first clause, 0 disables it")
+args = parser.parse_args()
+
+RESPONSE = (
+    "Rozumím vám a hned se podívám do systému, jestli máte nárok na slevu z tarifu, který máte od 15. května. "
+    "Vaše poslední platba ve výši 1 250,50 Kč dorazila včas, tj. žádný nedoplatek neevidujeme. "
+    "Pokud chcete, můžu vám poslat shrnutí e-mailem, např. ještě dnes odpoledne. "
+    "Je to tak v pořádku?"
+)
+
+
+def tokenize(text: str):
+    # roughly like the LLM streams it, a word or a punctuation mark per token
+    return re.findall(r"\s*\w+|\s*[^\w\s]", text)
+
+
+def regex_collate(tokens):
+    """The collation as it was, regexes over the growing buffer on every token."""
+    sentence_endings_pattern = "|".join(map(re.escape, SENTENCE_ENDINGS))
+    buffer = ""
+    prev_ends_with_money = False
+    for token in tokens:
+        if prev_ends_with_money and token.startswith(" "):
+            yield buffer.strip()
+            buffer = ""
+        buffer += token
+        possible_list_item = bool(re.match(r"^\d+[ .]", buffer))
+        ends_with_money = bool(re.findall(r"\$\d+.$", buffer))
+        if re.findall(r"\n" if possible_list_item else sentence_endings_pattern, token):
+            if not ends_with_money:
+                to_return = buffer.strip()
+                if to_return:
+                    yield to_return
+                buffer = ""
+        prev_ends_with_money = ends_with_money
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def incremental_collate(tokens):
+    collator = SentenceCollator(language=args.language, min_clause_length=args.min_clause_length or None)
+    for token in tokens:
+        yield from collator.feed(token)
+    rest = collator.flush()
+    if rest:
+        yield rest
+
+
+def first_segment_tokens(collate, tokens):
+    """How many tokens the first segment waits for, the synthesis of the response can't start sooner."""
+    consumed = 0
+
+    def stream():
+        nonlocal consumed
+        for token in tokens:
+            consumed += 1
+            yield token
+
+    first_segment = next(collate(stream()))
+    return consumed, first_segment
+
+
+def benchmark(collate, tokens):
+    start = time.perf_counter()
+    for _ in range(args.responses):
+        for _ in collate(tokens):
+            pass
+    return (time.perf_counter() - start) / args.responses
+
+
+def main():
+    tokens = tokenize(RESPONSE)
+    print(f"{len(tokens)} tokens, {len(RESPONSE)} characters per response, {args.responses} responses")
+    for name, collate in [("regex", regex_collate), ("incremental", incremental_collate)]:
+        seconds = benchmark(collate, tokens)
+        waited, first_segment = first_segment_tokens(collate, tokens)
+        print(f"{name:12} {seconds * 1e6:8.1f} us/response, first segment after {waited:3} tokens: {first_segment!r}")
+    for sentence in incremental_collate(tokens):
+        print(f"  {sentence}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+
+from vocode.streaming.input_device.stream_handler import AudioStreamHandler
+from vocode.streaming.input_device.vad_gate import VADGate
+
+parser = argparse.ArgumentParser(description="Measures the per-frame cost of VAD frame gating.")
+parser.add_argument("--seconds", type=float, default=600, help="Seconds of 8kHz audio to gate per run")
+parser.add_argument(
+    "--chunk-ms",
+    type=int,
+    nargs="+",
+    default=[20, 100, 1000],
+    help="Size of the chunks the audio arrives in (Twilio sends 20ms)",
+)
+parser.add_argument("--speech-ratio", type=float, default=0.5)
+args = parser.parse_args()
+
+FRAME_SIZE = AudioStreamHandler.VAD_FRAME_SIZE
+SAMPLE_RATE = AudioStreamHandler.VAD_SAMPLE_RATE
+SPEECH_PAD_FRAMES = int(SAMPLE_RATE * AudioStreamHandler.VAD_SPEECH_PAD_MS / 1000) * 2 // FRAME_SIZE
+SPEECH_MIN_FRAMES = int(SAMPLE_RATE * AudioStreamHandler.VAD_SPEECH_MIN_DURATION_MS / 1000) * 2 // FRAME_SIZE
+
+
+def run(chunk_ms: int) -> None:
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-2000, 2000, size=int(args.seconds * SAMPLE_RATE), dtype=np.int16).tobytes()
+    chunk_size = SAMPLE_RATE * 2 * chunk_ms // 1000
+    chunks = [audio[i : i + chunk_size] for i in range(0, len(audio), chunk_size)]
+    # decisions are precomputed so only the gating is timed, not the model
+    decisions = iter((rng.random(len(audio) // FRAME_SIZE + 1) < args.speech_ratio).tolist())
+
+    gate = VADGate(FRAME_SIZE, SPEECH_PAD_FRAMES, SPEECH_MIN_FRAMES)
+    frames_sent = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        frames = gate.add_audio(chunk)
+        frames_sent += len(gate.gate([next(decisions) for _ in frames]))
+    elapsed = time.perf_counter() - start
+    print(
+        f"chunks of {chunk_ms:>5}ms: {frames_sent} frames in {elapsed:.3f}s, "
+        f"{elapsed / frames_sent * 1e6:.2f}us per frame"
+    )
+
+
+if __name__ == "__main__":
+    for chunk_ms in args.chunk_ms:
+        run(chunk_ms)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from vocode.streaming.agent.chat_gpt_agent import ChatGPTAgent, ConsoleChatResponse
+
+
+class FakeCallScript:
+    dialog_state_prompt = "Extract the dialog state."
+
+    def __init__(self):
+        self.decisions = 0
+
+    def decision_callback(self, chat_response, normalize=True):
+        self.decisions += 1
+        return SimpleNamespace(response=chat_response, normalize=False)
+
+
+def create_agent(speculative_extraction=None):
+    # without the tokenizer and the OpenAI client, only what the dialog state extraction uses
+    agent = object.__new__(ChatGPTAgent)
+    agent.logger = logging.getLogger(__name__)
+    agent.agent_config = SimpleNamespace(speculative_dialog_state_extraction=True)
+    agent.call_script = FakeCallScript()
+    agent.dialog_state_version = 0
+    agent.speculative_extractions_used = 0
+    agent.speculative_extractions_discarded = 0
+    agent.extractions = []
+
+    async def get_dialog_state_update(assistant_response_chunk):
+        agent.extractions.append(assistant_response_chunk)
+        if assistant_response_chunk is None:
+            return await speculative_extraction()
+        return {"extracted_from": assistant_response_chunk}
+
+    agent.get_dialog_state_update = get_dialog_state_update
+    return agent
+
+
+async def extracted_from_user_message():
+    return {"extracted_from": "user message"}
+
+
+@pytest.mark.asyncio
+async def test_speculative_extraction_is_used_while_dialog_state_is_unchanged():
+    agent = create_agent(extracted_from_user_message)
+    speculative_update = agent.start_dialog_state_extraction()
+
+    update = await agent.resolve_dialog_state_update(speculative_update, ["Hello.", "How can I help?"])
+
+    assert update == {"extracted_from": "user message"}
+    assert agent.extractions == [None]
+    assert (agent.speculative_extractions_used, agent.speculative_extractions_discarded) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_speculative_extraction_is_stale_once_a_decision_changed_the_dialog_state():
+    agent = create_agent(extracted_from_user_message)
+    speculative_update = agent.start_dialog_state_extraction()
+    agent.apply_decision(ConsoleChatResponse("Hello.", {}, raw_text="Hello."))
+
+    update = await agent.resolve_dialog_state_update(speculative_update, ["Hello.", "How can I help?", "Bye."])
+
+    assert agent.dialog_state_version == 1
+    assert update == {"extracted_from": "Hello.. How can I help?"}
+    await asyncio.sleep(0)
+    assert speculative_update.task.cancelled()
+    assert (agent.speculative_extractions_used, agent.speculative_extractions_discarded) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_normalizing_decision_changes_the_dialog_state_again():
+    agent = create_agent(extracted_from_user_message)
+    chat_response = ConsoleChatResponse("Hello.", {}, raw_text="Hello.")
+
+    decision = agent.apply_decision(chat_response)
+    await agent._handle_initial_decision(chat_response, decision)
+
+    assert agent.dialog_state_version == 1
+    decision.normalize = True
+    chat_response.values_to_normalize = {}
+
+    async def get_normalized_values(content, keys_to_normalize):
+        return {}
+
+    agent.get_normalized_values = get_normalized_values
+    agent.call_script.NORMALIZATION_CONTEXT_FIELDS = []
+    await agent._handle_initial_decision(chat_response, decision)
+    assert agent.dialog_state_version == 2
+    assert agent.call_script.decisions == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_speculative_extraction_is_extracted_again():
+    async def failing_extraction():
+        raise ValueError("no function call in the response")
+
+    agent = create_agent(failing_extraction)
+    speculative_update = agent.start_dialog_state_extraction()
+
+    update = await agent.resolve_dialog_state_update(speculative_update, ["Hello."])
+
+    assert update == {"extracted_from": "Hello."}
+    assert (agent.speculative_extractions_used, agent.speculative_extractions_discarded) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_speculative_extraction_is_extracted_again():
+    agent = create_agent(asyncio.Event().wait)
+    speculative_update = agent.start_dialog_state_extraction()
+    await asyncio.sleep(0)
+    speculative_update.task.cancel()
+
+    update = await agent.resolve_dialog_state_update(speculative_update, ["Hello."])
+
+    assert update == {"extracted_from": "Hello."}
+    assert (agent.speculative_extractions_used, agent.speculative_extractions_discarded) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_turn_cancels_its_speculative_extraction():
+    agent = create_agent(asyncio.Event().wait)
+    speculative_updates = []
+
+    async def generate_and_decide(transcription, agent_input, speculative_update):
+        speculative_updates.append(speculative_update)
+        return await agent.resolve_dialog_state_update(speculative_update, ["Hello."])
+
+    agent.generate_and_decide = generate_and_decide
+    turn = asyncio.create_task(agent.handle_generate_response(None, None))
+    while not agent.extractions:
+        await asyncio.sleep(0)
+    turn.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await turn
+    await asyncio.sleep(0)
+    assert speculative_updates[0].task.cancelled()
+    # the turn itself was cancelled, nothing was extracted again
+    assert agent.extractions == [None]
@@ -0,0 +1,59 @@
+from vocode.streaming.agent.conversation_context import (
+    ConversationContextBuilder,
+    TokenCounter,
+    trim_messages_to_budget,
+)
+from vocode.streaming.agent.utils import format_openai_chat_messages_from_transcript
+from vocode.streaming.models.events import Sender
+from vocode.streaming.models.transcript import Transcript
+
+
+class WordTokenizer:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text):
+        self.encoded.append(text)
+        return text.split()
+
+
+def test_builder_formats_only_new_events_like_the_full_formatting():
+    transcript = Transcript()
+    builder = ConversationContextBuilder()
+    transcript.add_bot_message("Hello!", conversation_id="call")
+    assert builder.build(transcript, "prompt") == format_openai_chat_messages_from_transcript(transcript, "prompt")
+
+    previous_messages = builder.build(transcript, "prompt")
+    transcript.add_bot_message("How are you?", conversation_id="call")
+    transcript.add_human_message("Fine, and you?", conversation_id="call")
+    transcript.add_bot_message("Great.", conversation_id="call")
+    transcript.update_last_bot_message_on_cut_off("Gre")
+    messages = builder.build(transcript, "prompt")
+    assert messages == format_openai_chat_messages_from_transcript(transcript, "prompt")
+    assert messages[1:3] == [
+        {"role": "assistant", "content": "Hello! How are you?"},
+        {"role": "user", "content": "Fine, and you?"},
+    ]
+    assert previous_messages[1] == {"role": "assistant", "content": "Hello!"}
+
+    other_transcript = Transcript()
+    other_transcript.add_human_message("Hi", conversation_id="other")
+    assert builder.build(other_transcript) == [{"role": "user", "content": "Hi"}]
+
+
+def test_trimming_drops_the_oldest_messages_and_counts_each_content_once():
+    tokenizer = WordTokenizer()
+    token_counter = TokenCounter(tokenizer=tokenizer)
+    messages = [
+        {"role": "system", "content": "one two three"},
+        {"role": "assistant", "content": "four five"},
+        {"role": "user", "content": "six"},
+        {"role": "assistant", "content": None, "function_call": {"name": "f", "arguments": "{}"}},
+        {"role": "user", "content": "seven eight"},
+    ]
+    kept, dropped = trim_messages_to_budget(messages, token_counter, max_tokens=6)
+    assert kept == messages[:1] + messages[2:]
+    assert dropped == [messages[1]]
+
+    trim_messages_to_budget(messages, token_counter, max_tokens=100)
+    assert token_counter.encoded == 4 and len(tokenizer.encoded) == 4
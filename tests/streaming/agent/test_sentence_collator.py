@@ -0,0 +1,22 @@
+import re
+
+import pytest
+
+from tests.streaming.data.loader import load_json
+from vocode.streaming.agent.sentence_collator import SentenceCollator
+
+CORPUS = load_json("sentence_collator_corpus.json")
+
+
+def collate(tokens, language, min_clause_length):
+    collator = SentenceCollator(language=language, min_clause_length=min_clause_length)
+    sentences = [sentence for token in tokens for sentence in collator.feed(token)]
+    rest = collator.flush()
+    return sentences + ([rest] if rest else [])
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda case: case["text"][:30])
+def test_golden_corpus_is_split_the_same_however_it_is_tokenized(case):
+    text = case["text"]
+    for tokens in [[text], list(text), re.findall(r"\s*\S+", text)]:
+        assert collate(tokens, case["language"], case.get("min_clause_length")) == case["expected"]
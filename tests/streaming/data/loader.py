@@ -1,5 +1,11 @@
+import json
 import os
 
 
 def get_audio_path(relative_path: str):
     return os.path.join(os.path.dirname(__file__), relative_path)
+
+
+def load_json(relative_path: str):
+    with open(os.path.join(os.path.dirname(__file__), relative_path), encoding="utf-8") as f:
+        return json.load(f)
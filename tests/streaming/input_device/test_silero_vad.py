@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+import pytest
+import torch
+
+from vocode.streaming.input_device import silero_vad
+from vocode.streaming.input_device.silero_vad import BatchedSileroVAD
+
+WINDOW_SIZE = 512
+
+
+class FakeSileroModel(torch.nn.Module):
+    """Keeps its recurrent state on the module like the Silero JIT model."""
+
+    def __init__(self):
+        super().__init__()
+        self.reset_states()
+
+    def reset_states(self):
+        self._state = torch.zeros([0])
+        self._context = torch.zeros([0])
+        self._last_sr = 0
+        self._last_batch_size = 0
+
+    def forward(self, x, sr):
+        batch_size = x.shape[0]
+        if self._last_batch_size and self._last_batch_size != batch_size:
+            self.reset_states()
+        if len(self._state) == 0:
+            self._state = torch.zeros(2, batch_size, 4)
+        if len(self._context) == 0:
+            self._context = torch.zeros(batch_size, 2)
+        self._state = self._state * 0.5 + x.abs().mean(dim=1)[None, :, None]
+        out = torch.sigmoid(self._state.sum(dim=(0, 2)) + self._context.sum(dim=1) - 1)
+        self._context = x[:, -2:]
+        self._last_sr = sr
+        self._last_batch_size = batch_size
+        return out[:, None]
+
+
+def make_frames(seed: int, count: int):
+    rng = np.random.default_rng(seed)
+    return [
+        (rng.normal(scale=3000 * (i % 3), size=WINDOW_SIZE // 2)).astype(np.int16).tobytes()
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batched_vad_matches_per_stream_inference(monkeypatch):
+    monkeypatch.setattr(silero_vad, "load_silero_model", lambda: FakeSileroModel())
+    engine = BatchedSileroVAD(sample_rate=8000, window_size=WINDOW_SIZE)
+    streams = [engine.create_stream() for _ in range(3)]
+    await streams[0].post_init()
+    frames = [make_frames(seed, 12) for seed in range(3)]
+
+    async def run_stream(stream, stream_frames):
+        return [await stream.process_chunk(frame) for frame in stream_frames]
+
+    batched = await asyncio.gather(
+        *[run_stream(stream, stream_frames) for stream, stream_frames in zip(streams, frames)]
+    )
+
+    for stream_frames, stream_results in zip(frames, batched):
+        model = FakeSileroModel()
+        expected = [
+            model(
+                torch.from_numpy(np.frombuffer(frame, dtype=np.int16).astype(np.float32))[None, :] / 32768.0,
+                8000,
+            ).item() > 0.5
+            for frame in stream_frames
+        ]
+        assert stream_results == expected
+    assert engine.get_stats()["average_batch_size"] > 1
+
+    for stream in streams:
+        stream.close()
+    assert engine.get_stats()["active_streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batched_vad_rejects_wrong_window_size():
+    engine = BatchedSileroVAD(sample_rate=8000, window_size=WINDOW_SIZE)
+    with pytest.raises(ValueError):
+        await engine.create_stream().process_chunk(b"\x00" * 10)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from vocode.streaming.input_device.vad_gate import VADGate
+
+FRAME_SIZE = 512
+
+
+class ReferenceGate:
+    """The per-frame gating AudioStreamHandler.process_frame_buffer used to do."""
+
+    def __init__(self, speech_pad_frames: int, speech_min_frames: int):
+        self.speech_pad_frames = speech_pad_frames
+        self.speech_min_frames = speech_min_frames
+        self.offset = (speech_pad_frames + speech_min_frames) * FRAME_SIZE
+        self.frame_buffer = bytearray()
+        self.frame_buffer_is_speech = np.zeros(speech_pad_frames + speech_min_frames).astype(np.bool_)
+        self.padding_frames_left = 0
+        self.vad_triggered = False
+
+    def receive(self, chunk: bytes, classify):
+        output = []
+        self.frame_buffer.extend(chunk)
+        while len(self.frame_buffer) >= FRAME_SIZE + self.offset:
+            is_speech = classify(bytes(self.frame_buffer[self.offset : self.offset + FRAME_SIZE]))
+            if is_speech:
+                if self.speech_min_frames < 2 or self.frame_buffer_is_speech[-(self.speech_min_frames - 1):].all():
+                    self.frame_buffer_is_speech[-(self.speech_pad_frames + self.speech_min_frames):] = True
+                    self.padding_frames_left = self.speech_pad_frames
+                    self.vad_triggered = True
+                else:
+                    self.vad_triggered = False
+                self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [True]])
+            else:
+                if self.vad_triggered and self.padding_frames_left > 0:
+                    self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [True]])
+                    self.padding_frames_left -= 1
+                else:
+                    self.vad_triggered = False
+                    self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [False]])
+            if self.speech_min_frames > 1:
+                filtered = self._remove_short_speech_segments(self.frame_buffer_is_speech)
+            else:
+                filtered = self.frame_buffer_is_speech
+            frame_to_send = bytes(self.frame_buffer[:FRAME_SIZE])
+            raw = frame_to_send
+            del self.frame_buffer[:FRAME_SIZE]
+            if not filtered[0]:
+                frame_to_send = bytes(len(frame_to_send))
+            self.frame_buffer_is_speech = self.frame_buffer_is_speech[1:]
+            output.append((raw, frame_to_send))
+        return output
+
+    def _remove_short_speech_segments(self, frame_buffer):
+        result = np.zeros(self.speech_pad_frames + 1).astype(np.bool_)
+        windows = np.lib.stride_tricks.as_strided(
+            frame_buffer,
+            shape=(frame_buffer.size - (self.speech_min_frames - 1), self.speech_min_frames),
+            strides=(1, 1),
+        )
+        for i in np.where(windows.all(axis=1))[0]:
+            result[i : i + self.speech_min_frames] = True
+        return result
+
+
+def speech_decisions(seed: int, num_frames: int):
+    # bursts of speech and silence of random length, with isolated flips
+    rng = np.random.default_rng(seed)
+    decisions = []
+    while len(decisions) < num_frames:
+        decisions.extend([bool(rng.integers(2))] * int(rng.integers(1, 12)))
+    flips = rng.random(num_frames) < 0.1
+    return [d != f for d, f in zip(decisions[:num_frames], flips)]
+
+
+@pytest.mark.parametrize("speech_pad_frames,speech_min_frames", [(6, 2), (3, 1), (2, 4), (0, 3)])
+@pytest.mark.parametrize("seed", range(5))
+def test_gate_matches_per_frame_gating(seed, speech_pad_frames, speech_min_frames):
+    rng = np.random.default_rng(1000 + seed)
+    num_frames = 400
+    audio = rng.integers(1, 255, size=num_frames * FRAME_SIZE, dtype=np.uint8).tobytes()
+    decisions = speech_decisions(seed, num_frames)
+    frame_index = {audio[i * FRAME_SIZE : (i + 1) * FRAME_SIZE]: i for i in range(num_frames)}
+
+    def classify(frame: bytes) -> bool:
+        return decisions[frame_index[frame]]
+
+    reference = ReferenceGate(speech_pad_frames, speech_min_frames)
+    gate = VADGate(FRAME_SIZE, speech_pad_frames, speech_min_frames, initial_capacity_frames=4)
+    expected, actual = [], []
+    position = 0
+    while position < len(audio):
+        # Twilio sized chunks mostly, with the occasional large burst
+        chunk_size = 320 if rng.random() < 0.8 else int(rng.integers(1, 20 * FRAME_SIZE))
+        chunk = audio[position : position + chunk_size]
+        position += chunk_size
+        expected.extend(reference.receive(chunk, classify))
+        frames = gate.add_audio(chunk)
+        actual.extend(gate.gate([classify(frame) for frame in frames]))
+
+    assert len(actual) == len(expected) > 0
+    assert actual == expected
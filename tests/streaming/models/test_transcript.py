@@ -94,3 +94,40 @@ HUMAN: Send me an email you bot. My email is du@de.com
 ACTION_WORKER: params={'recipient_email': 'du@de.com', 'body': 'What up', 'subject': 'This is the bot'}
 ACTION_WORKER: action_type='action_nylas_send_email' response={'success': True}"""
     )
+
+
+def test_transcript_index_follows_logged_and_cut_off_messages():
+    transcript = Transcript(event_logs=[Message(sender=Sender.BOT, text="Hello!")])
+    assert transcript.last_user_message is None and transcript.get_last_bot_text() == "Hello!"
+
+    transcript.add_bot_message("How are you?", conversation_id="123")
+    transcript.add_human_message("Fine.", conversation_id="123")
+    transcript.add_bot_message("Great, so", conversation_id="123")
+    assert transcript.to_string() == "BOT: Hello!\nBOT: How are you?\nHUMAN: Fine.\nBOT: Great, so"
+    transcript.update_last_bot_message_on_cut_off("Great")
+    # messages appended to the list directly are indexed too
+    transcript.event_logs.append(Message(sender=Sender.HUMAN, text="Bye."))
+
+    assert transcript.to_string() == "BOT: Hello!\nBOT: How are you?\nHUMAN: Fine.\nBOT: Great\nHUMAN: Bye."
+    assert transcript.get_last_user_message() == (-1, "HUMAN: Bye.")
+    assert transcript.get_last_bot_message() == (-2, "BOT: Great")
+    assert [message.text for message in transcript.user_messages] == ["Fine.", "Bye."]
+    assert transcript.last_assistant == "Hello! How are you?"
+    assert "_index" not in transcript.dict()
+
+
+def test_transcript_renders_bot_message_filled_in_while_spoken():
+    transcript = Transcript()
+    transcript.add_human_message("hello", conversation_id="123")
+    message = Message(sender=Sender.BOT, text="")
+    transcript.add_message(message, conversation_id="123", publish_to_events_manager=False)
+    assert transcript.to_string() == "HUMAN: hello\nBOT: "
+
+    message.text = "Hi, how"
+    assert transcript.to_string() == "HUMAN: hello\nBOT: Hi, how"
+    message.text = "Hi, how can I help?"
+    next_message = Message(sender=Sender.BOT, text="")
+    transcript.add_message(next_message, conversation_id="123", publish_to_events_manager=False)
+    next_message.text = "Anything else?"
+
+    assert transcript.to_string() == "HUMAN: hello\nBOT: Hi, how can I help?\nBOT: Anything else?"
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from tests.streaming.fixtures.output_device import SilentOutputDevice
+from tests.streaming.fixtures.synthesizer import TestSynthesizer, TestSynthesizerConfig
+from tests.streaming.fixtures.transcriber import TestAsyncTranscriber, TestTranscriberConfig
+from vocode.streaming.agent.echo_agent import EchoAgent
+from vocode.streaming.models.agent import EchoAgentConfig
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.streaming_conversation import StreamingConversation
+from vocode.streaming.synthesizer.base_synthesizer import SynthesisResult
+from vocode.streaming.synthesizer.greeting_presynthesis import GreetingPresynthesizer
+
+
+class TestSynthesizerFactory:
+    __test__ = False
+
+    def __init__(self):
+        self.messages = []
+
+    def create_synthesizer(self, synthesizer_config, logger=None):
+        factory = self
+
+        class RecordingSynthesizer(TestSynthesizer):
+            async def create_speech(self, message, chunk_size, bot_sentiment=None):
+                factory.messages.append(message.text)
+                return await super().create_speech(message, chunk_size, bot_sentiment)
+
+        return RecordingSynthesizer(synthesizer_config)
+
+
+def create_synthesizer_config():
+    output_device = SilentOutputDevice(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    return TestSynthesizerConfig.from_output_device(output_device)
+
+
+@pytest.mark.asyncio
+async def test_greeting_is_synthesized_before_the_conversation_asks_for_it():
+    synthesizer_factory = TestSynthesizerFactory()
+    presynthesizer = GreetingPresynthesizer(synthesizer_factory=synthesizer_factory)
+    agent_config = EchoAgentConfig(initial_message=BaseMessage(text="Dobrý den. Jak se máte?"))
+    presynthesizer.start("call", agent_config, create_synthesizer_config())
+    await asyncio.sleep(0.1)
+    assert synthesizer_factory.messages == ["Dobrý den.", " Jak se máte?."]
+
+    synthesizer = TestSynthesizer(create_synthesizer_config())
+    synthesis_result = await presynthesizer.get_synthesis_result("call", BaseMessage(text="Dobrý den."), synthesizer)
+    chunk_results = [chunk_result async for chunk_result in synthesis_result.chunk_generator]
+    assert chunk_results[-1].is_last_chunk and all(chunk_result.chunk for chunk_result in chunk_results)
+    # taken greetings are gone, other conversations synthesize their own
+    assert await presynthesizer.get_synthesis_result("call", BaseMessage(text="Dobrý den."), synthesizer) is None
+    assert await presynthesizer.get_synthesis_result("other", BaseMessage(text="Dobrý den."), synthesizer) is None
+    assert presynthesizer.get_stats()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_greetings_of_calls_that_never_connect_expire():
+    presynthesizer = GreetingPresynthesizer(ttl_seconds=0.05, synthesizer_factory=TestSynthesizerFactory())
+    agent_config = EchoAgentConfig(initial_message=BaseMessage(text="Hello."))
+    presynthesizer.start("call", agent_config, create_synthesizer_config())
+    await asyncio.sleep(0.1)
+    presynthesizer.evict_expired()
+    assert presynthesizer.get_stats() == {"pending": 0, "hits": 0, "misses": 0, "expired": 1}
+
+
+class RecordingOutputDevice(SilentOutputDevice):
+    def __init__(self, sampling_rate, audio_encoding):
+        super().__init__(sampling_rate=sampling_rate, audio_encoding=audio_encoding)
+        self.chunks = []
+
+    def consume_nonblocking(self, chunk: bytes):
+        self.chunks.append(chunk)
+
+
+class SilentTranscriber(TestAsyncTranscriber):
+    async def _run_loop(self):
+        # the caller listens to the greeting
+        await asyncio.Event().wait()
+
+
+class NumberedSynthesizerFactory:
+    """Every message is spoken as two chunks of its number, so the order of the played audio shows."""
+
+    def __init__(self):
+        self.messages = []
+
+    def create_synthesizer(self, synthesizer_config, logger=None):
+        factory = self
+
+        class NumberedSynthesizer(TestSynthesizer):
+            async def create_speech(self, message, chunk_size, bot_sentiment=None):
+                factory.messages.append(message.text)
+                number = len(factory.messages)
+
+                async def chunk_generator():
+                    yield SynthesisResult.ChunkResult(bytes([number]) * 800, False)
+                    yield SynthesisResult.ChunkResult(bytes([number]) * 800, True)
+
+                return SynthesisResult(chunk_generator(), lambda seconds: message.text)
+
+        return NumberedSynthesizer(synthesizer_config)
+
+
+@pytest.mark.asyncio
+async def test_conversation_plays_presynthesized_greeting_messages_in_order(monkeypatch):
+    presynthesizer = GreetingPresynthesizer(synthesizer_factory=NumberedSynthesizerFactory())
+    monkeypatch.setattr(GreetingPresynthesizer, "_instance", presynthesizer)
+    agent_config = EchoAgentConfig(initial_message=BaseMessage(text="Dobrý den. Volám z banky. Máte chvilku."))
+    synthesizer_config = create_synthesizer_config()
+    presynthesizer.start("call", agent_config, synthesizer_config)
+    await asyncio.sleep(0.1)
+
+    output_device = RecordingOutputDevice(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    conversation_synthesizer_factory = TestSynthesizerFactory()
+    conversation = StreamingConversation(
+        output_device=output_device,
+        transcriber=SilentTranscriber(
+            TestTranscriberConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16, chunk_size=2048)
+        ),
+        agent=EchoAgent(agent_config),
+        synthesizer=conversation_synthesizer_factory.create_synthesizer(synthesizer_config),
+        conversation_id="call",
+    )
+    await conversation.start()
+    for _ in range(100):
+        if len(output_device.chunks) >= 6:
+            break
+        await asyncio.sleep(0.05)
+    await conversation.terminate()
+
+    assert [chunk[0] for chunk in output_device.chunks[:6]] == [1, 1, 2, 2, 3, 3]
+    # the greeting messages were not synthesized again by the conversation
+    assert not any(message.startswith(("Dobrý", " Volám", " Máte")) for message in conversation_synthesizer_factory.messages)
+    assert presynthesizer.get_stats()["hits"] == 3
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from vocode.streaming.models.telephony import AdmissionConfig
+from vocode.streaming.telephony.server import admission
+from vocode.streaming.telephony.server.admission import AdmissionController
+from vocode.streaming.telephony.server.workers import CallsTracker
+
+
+@pytest.mark.asyncio
+async def test_lagging_event_loop_rejects_calls_until_the_window_passes():
+    controller = AdmissionController(
+        AdmissionConfig(sample_interval_seconds=0.1, health_window_seconds=0.3), calls_tracker=CallsTracker()
+    )
+    assert controller.admit_inbound().admitted
+    controller.loop_health_monitor.samples.append((250.0, 20.0))
+    decision = controller.admit_inbound()
+    assert not decision.admitted and decision.reason == "event_loop_lag"
+    controller.loop_health_monitor.samples.extend([(0.0, 20.0)] * 3)
+    assert controller.admit_inbound().admitted
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_dialed_outbound_calls_count_towards_the_limits():
+    calls_tracker = CallsTracker()
+    controller = AdmissionController(
+        AdmissionConfig(max_active_calls=3, max_pending_outbound_calls=2), calls_tracker=calls_tracker
+    )
+    assert controller.admit_outbound().admitted
+    assert controller.admit_outbound().admitted
+    assert controller.admit_outbound().reason == "pending_outbound_calls"
+    assert controller.admit_inbound().admitted
+
+    calls_tracker.call_started()
+    assert controller.admit_inbound().reason == "active_calls"
+    controller.pending_outbound_calls.clear()
+    assert controller.admit_inbound().admitted
+
+    # no worker server to drain here
+    calls_tracker.drain_handler = lambda reason: None
+    calls_tracker.request_drain("test")
+    assert controller.admit_inbound().reason == "draining"
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_connected_outbound_call_is_no_longer_pending():
+    calls_tracker = CallsTracker()
+    controller = AdmissionController(AdmissionConfig(max_active_calls=2), calls_tracker=calls_tracker)
+    assert controller.admit_outbound("outbound").admitted
+    assert controller.get_stats()["pending_outbound_calls"] == 1
+
+    # the websocket of the call connected
+    calls_tracker.call_started()
+    controller.outbound_call_connected("outbound")
+    assert controller.get_stats()["pending_outbound_calls"] == 0
+    assert controller.admit_inbound().admitted
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_cpu_of_other_threads_is_not_counted():
+    controller = AdmissionController(
+        AdmissionConfig(sample_interval_seconds=0.1, health_window_seconds=0.3), calls_tracker=CallsTracker()
+    )
+    await controller.start()
+
+    def spin(seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            pass
+
+    await asyncio.get_running_loop().run_in_executor(None, spin, 0.35)
+    assert controller.loop_health_monitor.samples
+    assert controller.loop_health_monitor.cpu_percent < 50
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_gauges_are_registered_once_and_observe_the_started_controller(monkeypatch):
+    def create_observable_gauge(*args, **kwargs):
+        raise AssertionError("gauges are created when the module is imported")
+
+    monkeypatch.setattr(admission.meter, "create_observable_gauge", create_observable_gauge)
+    first = AdmissionController(calls_tracker=CallsTracker())
+    second = AdmissionController(calls_tracker=CallsTracker())
+    first.loop_health_monitor.samples.append((12.0, 30.0))
+    second.loop_health_monitor.samples.append((45.0, 60.0))
+
+    await first.start()
+    await second.start()
+    assert [observation.value for observation in admission.observe_event_loop_lag(None)] == [45.0]
+    assert [observation.value for observation in admission.observe_cpu(None)] == [60.0]
+    await second.stop()
+    await first.stop()
+    assert list(admission.observe_cpu(None)) == []
@@ -0,0 +1,134 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from vocode.streaming.models.agent import ChatGPTAgentConfig
+from vocode.streaming.models.telephony import TwilioCallConfig, TwilioConfig
+from vocode.streaming.telephony.config_manager.redis_config_manager import RedisConfigManager
+
+
+class FakeConnectionPool:
+    def __init__(self):
+        self.disconnects = 0
+
+    async def disconnect(self, inuse_connections: bool = True):
+        self.disconnects += 1
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        for key, ttl, value in self.commands:
+            self.redis.store[key] = value
+        return [True] * len(self.commands)
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis the config manager uses, counting round trips."""
+
+    def __init__(self, failures: int = 0):
+        self.store = {}
+        self.round_trips = 0
+        self.failures = failures
+        self.connection_pool = FakeConnectionPool()
+
+    def round_trip(self):
+        self.round_trips += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Connection reset by peer")
+
+    async def setex(self, key, ttl, value):
+        self.round_trip()
+        self.store[key] = value
+
+    async def get(self, key):
+        self.round_trip()
+        return self.store.get(key)
+
+    async def delete(self, key):
+        self.round_trip()
+        self.store.pop(key, None)
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+
+def create_call_config() -> TwilioCallConfig:
+    return TwilioCallConfig(
+        transcriber_config=TwilioCallConfig.default_transcriber_config(),
+        agent_config=ChatGPTAgentConfig(prompt_preamble="Be brief."),
+        synthesizer_config=TwilioCallConfig.default_synthesizer_config(),
+        twilio_config=TwilioConfig(account_sid="AC123", auth_token="token"),
+        twilio_sid="CA123",
+        from_phone="+420111111111",
+        to_phone="+420222222222",
+    )
+
+
+@pytest.mark.asyncio
+async def test_commands_run_once_when_redis_is_healthy():
+    redis = FakeRedis()
+    config_manager = RedisConfigManager(redis=redis)
+
+    await config_manager.save_config("conversation", create_call_config())
+    config = await config_manager.get_config("conversation")
+    await config_manager.delete_config("conversation")
+
+    assert config.twilio_sid == "CA123"
+    assert redis.round_trips == 3
+    assert await config_manager.get_config("conversation") is None
+
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_retried_with_backoff():
+    redis = FakeRedis(failures=2)
+    config_manager = RedisConfigManager(redis=redis, backoff_factor=0.01)
+
+    await config_manager.save_config("conversation", create_call_config())
+    assert redis.round_trips == 3 and redis.connection_pool.disconnects == 2
+
+    redis.failures = 3
+    with pytest.raises(ConnectionError):
+        await config_manager.get_config("conversation")
+
+
+@pytest.mark.asyncio
+async def test_config_and_call_state_are_written_in_one_round_trip():
+    redis = FakeRedis()
+    config_manager = RedisConfigManager(redis=redis)
+
+    await config_manager.save_config_and_log_call_state(
+        "conversation", create_call_config(), telephony_id="CA123", state="inbound", from_phone="+420111111111"
+    )
+
+    assert redis.round_trips == 1
+    call_state_keys = [key for key in redis.store if key.startswith("call_state:CA123:inbound:")]
+    assert "conversation" in redis.store and len(call_state_keys) == 1
+
+
+@pytest.mark.asyncio
+async def test_local_cache_reads_through_and_expires():
+    redis = FakeRedis()
+    config_manager = RedisConfigManager(redis=redis, local_cache_ttl_seconds=60)
+    await config_manager.save_config("conversation", create_call_config())
+
+    assert (await config_manager.get_config("conversation")).twilio_sid == "CA123"
+    assert redis.round_trips == 1
+
+    now = time.monotonic()
+    with patch("time.monotonic", return_value=now + 61):
+        assert (await config_manager.get_config("conversation")).twilio_sid == "CA123"
+    assert redis.round_trips == 2
+
+    await config_manager.delete_config("conversation")
+    assert await config_manager.get_config("conversation") is None
@@ -0,0 +1,68 @@
+import aiohttp
+import pytest
+
+from vocode.streaming.telephony.client.twilio_recording import start_call_recording, start_twilio_recording
+
+
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def json(self):
+        return {"status": "in-progress"}
+
+    async def text(self):
+        return "The requested resource is not in progress"
+
+
+class FakeSession:
+    """Answers the requests with the given statuses in order, exceptions are raised instead."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def post(self, url, auth=None):
+        self.requests += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return FakeResponse(response)
+
+
+@pytest.mark.asyncio
+async def test_recording_is_retried_while_the_call_is_not_in_progress():
+    session = FakeSession(400, 201)
+    recording = await start_twilio_recording("AC", "token", "CA", backoff_factor=0, session=session)
+    assert recording == {"status": "in-progress"}
+    assert session.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_recording_is_retried_after_a_connection_error():
+    session = FakeSession(aiohttp.ClientConnectionError("reset by peer"), 201)
+    assert await start_twilio_recording("AC", "token", "CA", backoff_factor=0, session=session)
+    assert session.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_recording_failure_is_reported_after_the_retries():
+    session = FakeSession(400, 503, aiohttp.ClientConnectionError("reset by peer"))
+    failures = []
+
+    async def on_recording_failed(e: Exception):
+        failures.append(e)
+
+    started = await start_call_recording(
+        "AC", "token", "CA", on_recording_failed=on_recording_failed, retries=3, backoff_factor=0, session=session
+    )
+    assert not started
+    assert session.requests == 3 and len(failures) == 1
+
+    assert await start_call_recording("AC", "token", "CA", backoff_factor=0, session=FakeSession(201))
@@ -0,0 +1,152 @@
+import asyncio
+import socket
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+import uvicorn
+from fastapi import FastAPI, WebSocket
+
+from vocode.streaming.telephony.server.workers import (
+    WORKER_BASE_URL_ENV,
+    WORKER_PROCESS_ENV,
+    CallsTracker,
+    DrainingServer,
+    WorkerRecyclePolicy,
+    WorkerSupervisor,
+    calls_stay_in_process,
+)
+from vocode.streaming.telephony.templater import Templater
+
+
+def create_call_app(calls_tracker: CallsTracker) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/connect_call/{id}")
+    async def connect_call(websocket: WebSocket, id: str):
+        await websocket.accept()
+        calls_tracker.call_started()
+        try:
+            # the call lasts until the caller says something
+            await websocket.send_text(await websocket.receive_text())
+        finally:
+            calls_tracker.call_finished()
+
+    return app
+
+
+def bind_socket() -> socket.socket:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    return sock
+
+
+@pytest.mark.asyncio
+async def test_draining_server_finishes_active_calls_but_accepts_no_new_ones():
+    calls_tracker = CallsTracker()
+    sock = bind_socket()
+    url = f"http://127.0.0.1:{sock.getsockname()[1]}/connect_call/conversation"
+    server = DrainingServer(
+        uvicorn.Config(create_call_app(calls_tracker), log_level="warning"),
+        calls_tracker=calls_tracker,
+        check_interval_seconds=0.05,
+    )
+    serve_task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as websocket:
+            await asyncio.sleep(0.05)
+            calls_tracker.request_drain("test")
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await session.ws_connect(url)
+            assert not serve_task.done()
+
+            await websocket.send_str("bye")
+            assert await websocket.receive_str() == "bye"
+
+    await asyncio.wait_for(serve_task, timeout=5)
+    assert calls_tracker.active_calls == 0 and calls_tracker.calls_ran == 1
+
+
+@pytest.mark.asyncio
+async def test_draining_worker_keeps_accepting_its_own_calls():
+    calls_tracker = CallsTracker()
+    sock, worker_sock = bind_socket(), bind_socket()
+    shared_url = f"http://127.0.0.1:{sock.getsockname()[1]}/connect_call/conversation"
+    worker_url = f"http://127.0.0.1:{worker_sock.getsockname()[1]}/connect_call/conversation"
+    server = DrainingServer(
+        uvicorn.Config(create_call_app(calls_tracker), log_level="warning"),
+        calls_tracker=calls_tracker,
+        check_interval_seconds=0.05,
+        worker_socket=worker_sock,
+    )
+    serve_task = asyncio.create_task(server.serve(sockets=[sock, worker_sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(shared_url) as websocket:
+            calls_tracker.request_drain("test")
+            await asyncio.sleep(0.05)
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await session.ws_connect(shared_url)
+
+            # a call whose TwiML this worker returned before it started draining
+            async with session.ws_connect(worker_url) as routed_websocket:
+                await routed_websocket.send_str("hi")
+                assert await routed_websocket.receive_str() == "hi"
+            await websocket.send_str("bye")
+            assert await websocket.receive_str() == "bye"
+
+    await asyncio.wait_for(serve_task, timeout=5)
+    assert calls_tracker.calls_ran == 2
+
+
+def test_call_websockets_connect_to_the_worker_that_accepted_the_call(monkeypatch):
+    templater = Templater()
+    assert b"wss://example.com/connect_call/call" in templater.get_connection_twiml("call", "example.com").body
+    monkeypatch.setenv(WORKER_BASE_URL_ENV, "example.com:3102")
+    assert b"wss://example.com:3102/connect_call/call" in templater.get_connection_twiml("call", "example.com").body
+
+    assert calls_stay_in_process()
+    monkeypatch.setenv(WORKER_PROCESS_ENV, "1")
+    assert calls_stay_in_process()
+    monkeypatch.delenv(WORKER_BASE_URL_ENV)
+    # a worker without call-aware routing, the websocket may connect to any of them
+    assert not calls_stay_in_process()
+
+    supervisor = WorkerSupervisor("main:app", worker_base_port=3100, worker_url="example.com:{port}")
+    supervisor.slots = {101: 0, 102: 1, 103: 2}
+    del supervisor.slots[102]
+    assert supervisor.get_free_slot() == 1
+    with pytest.raises(ValueError):
+        WorkerSupervisor("main:app", worker_base_port=3100)
+
+
+@pytest.mark.asyncio
+async def test_process_without_worker_server_exits_after_its_last_call():
+    calls_tracker = CallsTracker()
+    calls_tracker.call_started()
+    with patch("vocode.streaming.telephony.server.workers.os.kill") as kill:
+        calls_tracker.request_drain("max calls reached")
+        await asyncio.sleep(0.1)
+        kill.assert_not_called()
+
+        calls_tracker.call_finished()
+        await asyncio.sleep(0.6)
+        kill.assert_called_once()
+
+
+def test_workers_are_recycled_after_max_calls():
+    calls_tracker = CallsTracker()
+    policy = WorkerRecyclePolicy(max_calls=2)
+    calls_tracker.call_started()
+    assert policy.get_recycle_reason(calls_tracker) is None
+    calls_tracker.call_started()
+    assert policy.get_recycle_reason(calls_tracker) is not None
+    assert WorkerRecyclePolicy(max_memory_mb=1).get_recycle_reason(calls_tracker) is not None
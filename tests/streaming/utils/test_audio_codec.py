@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_codec import (
+    AudioConverter,
+    Resampler,
+    linear_to_ulaw,
+    ulaw_to_linear,
+)
+
+audioop = pytest.importorskip("audioop")
+
+SAMPLE_RATE_PAIRS = [(8000, 16000), (16000, 8000), (24000, 8000), (44100, 8000), (48000, 44100)]
+
+
+def split_randomly(audio: bytes, rng: np.random.Generator):
+    position = 0
+    while position < len(audio):
+        size = int(rng.integers(0, 400)) * 2
+        yield audio[position : position + size]
+        position += size
+
+
+def test_ulaw_matches_audioop():
+    all_samples = np.arange(-32768, 32768, dtype=np.int16).tobytes()
+    assert linear_to_ulaw(all_samples) == audioop.lin2ulaw(all_samples, 2)
+    all_ulaw = bytes(range(256))
+    assert ulaw_to_linear(all_ulaw) == audioop.ulaw2lin(all_ulaw, 2)
+
+
+@pytest.mark.parametrize("input_sample_rate,output_sample_rate", SAMPLE_RATE_PAIRS)
+def test_resampler_matches_stateful_ratecv(input_sample_rate, output_sample_rate):
+    rng = np.random.default_rng(input_sample_rate + output_sample_rate)
+    audio = rng.integers(-32768, 32768, size=5000, dtype=np.int16).tobytes()
+    resampler = Resampler(input_sample_rate, output_sample_rate)
+    state = None
+    expected, actual = [], []
+    for chunk in split_randomly(audio, rng):
+        actual.append(resampler.resample(chunk))
+        output, state = audioop.ratecv(chunk, 2, 1, input_sample_rate, output_sample_rate, state)
+        expected.append(output)
+    assert b"".join(actual) == b"".join(expected)
+    assert (
+        Resampler(input_sample_rate, output_sample_rate).resample(audio)
+        == audioop.ratecv(audio, 2, 1, input_sample_rate, output_sample_rate, None)[0]
+    )
+
+
+def test_converter_chunks_match_whole_stream():
+    rng = np.random.default_rng(0)
+    ulaw_audio = rng.integers(0, 256, size=4000, dtype=np.uint8).tobytes()
+    converter = AudioConverter(
+        input_sample_rate=16000,
+        output_sample_rate=8000,
+        input_encoding=AudioEncoding.MULAW,
+        output_encoding=AudioEncoding.MULAW,
+    )
+    chunked = b"".join(converter.convert(ulaw_audio[i : i + 160]) for i in range(0, len(ulaw_audio), 160))
+    expected = audioop.lin2ulaw(
+        audioop.ratecv(audioop.ulaw2lin(ulaw_audio, 2), 2, 1, 16000, 8000, None)[0], 2
+    )
+    assert chunked == expected
@@ -0,0 +1,43 @@
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_plan import AudioConversion, AudioFormat, plan_audio_pipeline
+
+MULAW_8000 = AudioFormat(8000, AudioEncoding.MULAW)
+LINEAR_8000 = AudioFormat(8000, AudioEncoding.LINEAR16)
+LINEAR_16000 = AudioFormat(16000, AudioEncoding.LINEAR16)
+MP3_44100 = AudioFormat(44100, AudioEncoding.LINEAR16, codec="mp3")
+
+
+def test_twilio_call_prefers_mulaw_passthrough():
+    plan = plan_audio_pipeline(
+        provider_formats=[MP3_44100, MULAW_8000],
+        output_format=MULAW_8000,
+        input_format=MULAW_8000,
+        transcriber_formats=[LINEAR_8000],
+        vad_format=LINEAR_8000,
+    )
+    assert plan.provider_format == MULAW_8000
+    assert plan.synthesizer_conversion.is_passthrough
+    assert plan.vad_conversion.steps == ["decode mulaw"]
+    assert plan.transcriber_conversion.is_passthrough
+    assert plan.num_conversion_steps == 1
+
+
+def test_ties_keep_the_preferred_format():
+    plan = plan_audio_pipeline(
+        provider_formats=[LINEAR_16000, MP3_44100],
+        output_format=MULAW_8000,
+        input_format=LINEAR_16000,
+        transcriber_formats=[LINEAR_16000, MULAW_8000],
+    )
+    assert plan.provider_format == LINEAR_16000
+    assert plan.synthesizer_conversion.steps == ["resample 16000->8000", "encode mulaw"]
+    assert plan.transcriber_format == LINEAR_16000
+    assert plan.vad_conversion is None
+
+
+def test_conversion_creates_matching_converter():
+    conversion = AudioConversion("vad", AudioFormat(16000, AudioEncoding.MULAW), LINEAR_8000)
+    assert conversion.steps == ["decode mulaw", "resample 16000->8000"]
+    converter = conversion.create_converter()
+    assert len(converter.convert(b"\xff" * 160)) == 160
+    assert AudioConversion("transcriber", LINEAR_8000, LINEAR_8000).create_converter() is None
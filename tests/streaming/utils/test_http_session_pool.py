@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
+from vocode.streaming.vector_db.base_vector_db import VectorDB
+
+
+async def ok(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_shared_per_host_and_reuse_connections():
+    pool = HTTPSessionPool()
+    app = web.Application()
+    app.router.add_get("/", ok)
+    server = TestServer(app)
+    await server.start_server()
+    base_url = str(server.make_url("/"))
+
+    session = pool.get_session(base_url)
+    assert pool.get_session(base_url + "v1/tts") is session
+    assert pool.get_session("https://api.elevenlabs.io/v1/") is not session
+    for _ in range(3):
+        async with session.get(base_url) as response:
+            assert await response.text() == "ok"
+
+    stats = pool.get_stats()[HTTPSessionPool.get_host(base_url)]
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1 and stats["connections_reused"] == 2
+
+    await pool.close()
+    assert session.closed
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_each_event_loop_has_sessions_of_its_own():
+    pool = HTTPSessionPool()
+    loop = asyncio.get_running_loop()
+    in_use = asyncio.Event()
+    release = threading.Event()
+
+    async def use_session_on_another_loop():
+        session = pool.get_session("https://api.elevenlabs.io/v1/")
+        loop.call_soon_threadsafe(in_use.set)
+        await asyncio.to_thread(release.wait)
+        # the other loop asked for the host meanwhile, this session is still open and shared here
+        assert not session.closed and pool.get_session("https://api.elevenlabs.io/v1/") is session
+        await pool.close()
+        return session
+
+    other_loop_session = asyncio.create_task(asyncio.to_thread(asyncio.run, use_session_on_another_loop()))
+    await in_use.wait()
+    session = pool.get_session("https://api.elevenlabs.io/v1/")
+    release.set()
+    other = await other_loop_session
+
+    assert session is not other
+    assert other.closed and not session.closed
+    await pool.close()
+    assert session.closed and pool.sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_created_when_used_not_with_the_components(monkeypatch):
+    pool = HTTPSessionPool()
+    monkeypatch.setattr(HTTPSessionPool, "_instance", pool)
+    # built outside a running event loop
+    vector_db = await asyncio.to_thread(VectorDB, base_url="https://example.pinecone.io")
+    assert pool.sessions == {}
+
+    session = vector_db.aiohttp_session
+    assert session is pool.get_session("https://example.pinecone.io")
+    await pool.close()
@@ -0,0 +1,71 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from vocode.streaming.models.agent import EchoAgentConfig
+from vocode.streaming.models.transcript import Transcript
+from vocode.streaming.transcriber.base_transcriber import Transcription
+from vocode.streaming.utils.interrupt_classifier import LexicalInterruptClassifier
+from vocode.streaming.utils.interruption_worker import InterruptWorker
+
+
+@pytest.mark.parametrize(
+    "text,is_interrupt",
+    [
+        ("Yeah.", False),
+        ("Okay, got it.", False),
+        ("Dobře, dobře", False),
+        ("Uh-huh", False),
+        ("Počkejte, to ne", True),
+        ("Hold on a second", True),
+        ("Wait, don't stop here", True),
+    ],
+)
+def test_clear_cases_are_decided_confidently(text, is_interrupt):
+    classification = LexicalInterruptClassifier().classify(text)
+    assert classification.is_interrupt == is_interrupt
+    assert classification.confidence >= 0.8
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Ne?",
+        "No, don't stop, keep going",
+        "Yes yes I understand what you mean",
+        "Jasně, to dává smysl, pokračujte prosím dál",
+        "Mám doma dvě auta a jedno chci prodat.",
+    ],
+)
+def test_negated_and_long_utterances_are_left_to_the_llm(text):
+    assert LexicalInterruptClassifier().classify(text).confidence < 0.8
+
+
+class FakeLLMInterruptWorker(InterruptWorker):
+    def __init__(self, agent_config: EchoAgentConfig):
+        conversation = SimpleNamespace(
+            agent=SimpleNamespace(agent_config=agent_config),
+            transcript=Transcript(),
+            logger=logging.getLogger(__name__),
+        )
+        super().__init__(input_queue=None, conversation=conversation)
+        self.asked_llm = []
+
+    async def classify_transcription_with_llm(self, transcription: Transcription) -> bool:
+        self.asked_llm.append(transcription.message)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_only_undecided_transcriptions_reach_the_llm():
+    worker = FakeLLMInterruptWorker(EchoAgentConfig(interrupt_classifier_confidence_threshold=0.8))
+    for message in ("Yeah.", "Stop", "Ne?"):
+        await worker.classify_transcription(Transcription(message=message, confidence=1.0, is_final=True))
+    assert worker.asked_llm == ["Ne?"]
+    assert worker.get_stats() == {"local_decisions": 2, "llm_decisions": 1}
+
+    # the default until a threshold is picked on labeled utterances
+    worker = FakeLLMInterruptWorker(EchoAgentConfig())
+    assert await worker.classify_transcription(Transcription(message="Yeah.", confidence=1.0, is_final=True))
+    assert worker.asked_llm == ["Yeah."]
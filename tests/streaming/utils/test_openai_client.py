@@ -0,0 +1,60 @@
+import asyncio
+
+import openai
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
+
+
+async def start_provider(name: str) -> TestServer:
+    async def chat_completions(request: web.Request) -> web.Response:
+        await asyncio.sleep(0.01)
+        return web.json_response(
+            {
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": f"{name} {request.headers['Authorization']}"},
+                    }
+                ],
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_to_different_providers_use_their_own_endpoint_and_connections():
+    session_pool = HTTPSessionPool()
+    registry = OpenAIClientRegistry(session_pool=session_pool)
+    fireworks, openai_server = await start_provider("fireworks"), await start_provider("openai")
+    fireworks_client = registry.get_client(str(fireworks.make_url("/v1")), "fireworks-key")
+    openai_client = registry.get_client(str(openai_server.make_url("/v1")), "openai-key")
+    assert registry.get_client(str(fireworks.make_url("/v1")), "fireworks-key") is fireworks_client
+
+    async def ask(client):
+        response = await client.acreate(
+            openai.ChatCompletion, model="model", messages=[{"role": "user", "content": "Hi"}]
+        )
+        return response.choices[0].message.content
+
+    answers = await asyncio.gather(*[ask(client) for client in [fireworks_client, openai_client] * 3])
+    assert answers == ["fireworks Bearer fireworks-key", "openai Bearer openai-key"] * 3
+    # the module globals are left alone
+    assert openai.aiosession.get() is None and openai.api_key != "openai-key"
+
+    await ask(fireworks_client)
+    stats = session_pool.get_stats()[HTTPSessionPool.get_host(str(fireworks.make_url("/v1")))]
+    assert stats["requests"] == 4 and stats["connections_reused"] >= 1
+    await session_pool.close()
+    await fireworks.close()
+    await openai_server.close()
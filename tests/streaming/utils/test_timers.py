@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from vocode.streaming.utils.timers import TimerService
+
+
+@pytest.mark.asyncio
+async def test_postponed_timer_fires_after_the_last_activity():
+    timers = TimerService()
+    fired = []
+    timer = timers.call_later(0.1, lambda: fired.append("idle"))
+    for _ in range(10):
+        await asyncio.sleep(0.02)
+        timer.reschedule(0.1)
+    assert fired == []
+    await asyncio.sleep(0.15)
+    assert fired == ["idle"]
+    # postponing only moves the deadline, the loop wakes up when the old one comes
+    assert timers.get_stats()["wakeups"] < 5
+
+    timer = timers.call_later(1, lambda: fired.append("sooner"))
+    timer.reschedule(0.01)
+    await asyncio.sleep(0.05)
+    assert fired == ["idle", "sooner"]
+
+
+@pytest.mark.asyncio
+async def test_periodic_callbacks_dont_overlap_and_stop_when_cancelled():
+    timers = TimerService()
+    calls = []
+
+    async def slow_callback():
+        calls.append("start")
+        await asyncio.sleep(0.07)
+
+    timer = timers.call_every(0.02, slow_callback)
+    await asyncio.sleep(0.15)
+    assert len(calls) == 2
+    timer.cancel()
+    await asyncio.sleep(0.1)
+    assert len(calls) == 2 and timers.get_stats()["timers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_timers_of_another_event_loop_dont_replace_these():
+    timers = TimerService()
+    fired = []
+    timers.call_later(0.1, lambda: fired.append("here"))
+
+    async def use_timers_on_another_loop():
+        timers.call_later(0.01, lambda: fired.append("there"))
+        await asyncio.sleep(0.05)
+
+    await asyncio.to_thread(asyncio.run, use_timers_on_another_loop())
+    await asyncio.sleep(0.1)
+    assert fired == ["there", "here"]
+    assert timers.get_stats()["timers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_postponing_a_timer_doesnt_delay_the_others():
+    timers = TimerService()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    fired = {}
+    postponed = timers.call_later(0.05, lambda: fired.setdefault("postponed", loop.time() - start))
+    timers.call_later(0.1, lambda: fired.setdefault("other", loop.time() - start))
+    postponed.reschedule(0.5)
+
+    await asyncio.sleep(0.2)
+    # the old deadline of the postponed timer came first, the other one still fires on time
+    assert list(fired) == ["other"] and fired["other"] < 0.15
+    await asyncio.sleep(0.4)
+    assert fired["postponed"] >= 0.5
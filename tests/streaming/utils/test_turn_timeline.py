@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from tests.streaming.fixtures.output_device import SilentOutputDevice
+from tests.streaming.fixtures.synthesizer import TestSynthesizer, TestSynthesizerConfig
+from tests.streaming.fixtures.transcriber import TestAsyncTranscriber, TestTranscriberConfig
+from vocode.streaming.agent.echo_agent import EchoAgent
+from vocode.streaming.models.agent import EchoAgentConfig
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.models.transcript import Transcript, TranscriptCompleteEvent
+from vocode.streaming.streaming_conversation import StreamingConversation
+from vocode.streaming.utils import turn_timeline
+from vocode.streaming.utils.turn_timeline import TurnTimelinePoint, TurnTimelineTracker
+
+
+@pytest.fixture
+def span_exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(turn_timeline, "tracer", provider.get_tracer(__name__))
+    return exporter
+
+
+def test_turn_is_emitted_as_a_span_tree(span_exporter):
+    tracker = TurnTimelineTracker(conversation_id="conversation")
+    timeline = tracker.start_turn(user_speech_end=100.0)
+    timeline.points[TurnTimelinePoint.FINAL_TRANSCRIPT] = 100.3
+    tracker.mark(TurnTimelinePoint.AGENT_FIRST_TOKEN, 100.8)
+    tracker.mark(TurnTimelinePoint.FIRST_SENTENCE, 101.0)
+    tracker.mark(TurnTimelinePoint.FIRST_SENTENCE, 101.5)
+    tracker.mark(TurnTimelinePoint.TTS_FIRST_BYTE, 101.2)
+    tracker.mark(TurnTimelinePoint.FIRST_AUDIO_SENT, 101.25)
+    tracker.mark(TurnTimelinePoint.PLAYBACK_FINISHED, 102.0)
+    tracker.mark(TurnTimelinePoint.PLAYBACK_FINISHED, 103.0)
+    # speech heard before this turn started belongs to it, not to the next one
+    tracker.start_turn(user_speech_end=100.0)
+
+    assert timeline.get_stages() == pytest.approx(
+        {
+            "final_transcript": 0.3,
+            "agent_first_token": 0.5,
+            "first_sentence": 0.2,
+            "tts_first_byte": 0.2,
+            "first_audio_sent": 0.05,
+            "playback_finished": 1.75,
+        }
+    )
+    assert timeline.get_response_latency() == pytest.approx(1.25)
+    assert TurnTimelinePoint.USER_SPEECH_END not in tracker.current.points
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    turn_span = spans["conversation.turn"]
+    assert turn_span.attributes["turn_index"] == 0 and not turn_span.attributes["interrupted"]
+    assert turn_span.end_time - turn_span.start_time == 3 * 10**9
+    assert len(spans) == 7
+    assert all(span.parent.span_id == turn_span.context.span_id for span in spans.values() if span is not turn_span)
+
+
+def test_timelines_are_part_of_the_complete_transcript_event():
+    tracker = TurnTimelineTracker(conversation_id="conversation")
+    tracker.start_turn()
+    tracker.mark(TurnTimelinePoint.PLAYBACK_INTERRUPTED)
+    tracker.finish_turn()
+
+    event = TranscriptCompleteEvent(
+        conversation_id="conversation", transcript=Transcript(), turn_timelines=tracker.completed
+    )
+    [timeline] = json.loads(event.json())["turn_timelines"]
+    assert set(timeline["points"]) == {"final_transcript", "playback_interrupted"}
+
+
+@pytest.mark.asyncio
+async def test_conversation_marks_the_turn():
+    output_device = SilentOutputDevice(sampling_rate=16000, audio_encoding=AudioEncoding.LINEAR16)
+    conversation = StreamingConversation(
+        output_device=output_device,
+        transcriber=TestAsyncTranscriber(
+            TestTranscriberConfig(sampling_rate=16000, audio_encoding=AudioEncoding.LINEAR16, chunk_size=2048)
+        ),
+        agent=EchoAgent(EchoAgentConfig()),
+        synthesizer=TestSynthesizer(TestSynthesizerConfig.from_output_device(output_device)),
+    )
+    # the test transcriber sends a final transcription right away
+    await conversation.start()
+    await asyncio.sleep(0.5)
+    await conversation.terminate()
+
+    # the reply is still playing when the conversation terminates
+    [timeline] = conversation.turn_timelines.completed
+    assert timeline.get_marked_points() == [
+        TurnTimelinePoint.FINAL_TRANSCRIPT,
+        TurnTimelinePoint.FIRST_SENTENCE,
+        TurnTimelinePoint.TTS_FIRST_BYTE,
+        TurnTimelinePoint.FIRST_AUDIO_SENT,
+    ]
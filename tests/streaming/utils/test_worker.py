@@ -0,0 +1,109 @@
+import asyncio
+from collections import defaultdict
+from typing import DefaultDict
+
+import pytest
+
+from vocode.streaming.utils.worker import InterruptibleEvent, InterruptibleEventRegistry, InterruptibleWorker
+
+
+class GatedWorker(InterruptibleWorker):
+    """Outputs each payload once its gate is opened."""
+
+    def __init__(self, max_concurrency: int):
+        super().__init__(input_queue=asyncio.Queue(), output_queue=asyncio.Queue(), max_concurrency=max_concurrency)
+        self.gates: DefaultDict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.started: DefaultDict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.finished: DefaultDict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.cancelled = []
+
+    async def process(self, item: InterruptibleEvent):
+        self.started[item.payload].set()
+        try:
+            await self.gates[item.payload].wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(item.payload)
+            return
+        self.produce_interruptible_event_nonblocking(item.payload)
+        self.finished[item.payload].set()
+
+
+async def get_output(worker: GatedWorker):
+    return (await asyncio.wait_for(worker.output_queue.get(), timeout=1)).payload
+
+
+async def terminate(worker: GatedWorker):
+    tasks = [worker.worker_task] + [slot.task for slot in worker.output_slots]
+    worker.terminate()
+    await asyncio.wait(tasks)
+
+
+@pytest.mark.asyncio
+async def test_outputs_keep_input_order_with_lookahead():
+    worker = GatedWorker(max_concurrency=3)
+    worker.start()
+    for payload in "abcd":
+        worker.consume_nonblocking(InterruptibleEvent(payload))
+    for payload in "abc":
+        await worker.started[payload].wait()
+
+    # the three in flight run concurrently, the fourth waits for a free slot
+    assert worker.output_capacity.locked() and not worker.started["d"].is_set()
+    for payload in "bc":
+        worker.gates[payload].set()
+        await worker.finished[payload].wait()
+    # done before "a", their outputs are held back and their slots stay taken
+    assert worker.output_queue.empty() and not worker.started["d"].is_set()
+
+    worker.gates["a"].set()
+    assert [await get_output(worker) for _ in range(3)] == ["a", "b", "c"]
+    await worker.started["d"].wait()
+    worker.gates["d"].set()
+    assert await get_output(worker) == "d"
+    await terminate(worker)
+
+
+@pytest.mark.asyncio
+async def test_interrupt_cancels_all_work_in_flight():
+    worker = GatedWorker(max_concurrency=3)
+    worker.start()
+    for payload in "abc":
+        worker.consume_nonblocking(InterruptibleEvent(payload))
+    for payload in "abc":
+        await worker.started[payload].wait()
+    tasks = [slot.task for slot in worker.output_slots]
+
+    assert worker.cancel_current_task()
+    await asyncio.wait(tasks)
+    assert sorted(worker.cancelled) == ["a", "b", "c"]
+
+    worker.gates["d"].set()
+    worker.consume_nonblocking(InterruptibleEvent("d"))
+    assert await get_output(worker) == "d"
+    assert worker.output_queue.empty()
+    await terminate(worker)
+
+
+@pytest.mark.asyncio
+async def test_registry_only_holds_events_in_flight():
+    registry = InterruptibleEventRegistry(max_events=3)
+    worker = GatedWorker(max_concurrency=1)
+    worker.start()
+    for payload in "ab":
+        event = InterruptibleEvent(payload)
+        registry.register(event)
+        worker.consume_nonblocking(event)
+    registry.register(InterruptibleEvent("c", is_interruptible=False))
+    assert len(registry) == 2
+
+    worker.gates["a"].set()
+    # "b" only starts once "a" is done and has left the registry
+    await worker.started["b"].wait()
+    # the interrupt reaches the event still waiting
+    assert len(registry) == 1
+    assert registry.interrupt_all() == 1 and len(registry) == 0
+    await terminate(worker)
+
+    for delay in range(4):
+        registry.register(InterruptibleEvent(delay))
+    assert registry.get_stats() == {"in_flight": 3, "registered": 6, "evicted": 1}
@@ -0,0 +1,56 @@
+import pytest
+from aioresponses import aioresponses
+
+from tests.synthesizer.conftest import DEFAULT_PARAMS, MOCK_API_KEY
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import ElevenLabsSynthesizerConfig, ELEVEN_LABS_MP3_44100
+from vocode.streaming.synthesizer.audio_cache import MemoryAudioCache, TieredAudioCache
+from vocode.streaming.synthesizer.eleven_labs_synthesizer import ElevenLabsSynthesizer
+
+
+def test_memory_cache_evicts_least_recently_used_by_size():
+    cache = MemoryAudioCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.size_bytes == 8
+    assert cache.evictions == 1
+    cache.put("too big", b"x" * 11)
+    assert cache.get("too big") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_promotes_disk_hits(tmp_path):
+    await TieredAudioCache(str(tmp_path)).put("key", b"audio")
+    cache = TieredAudioCache(str(tmp_path))
+    assert await cache.get("missing") is None
+    assert await cache.get("key") == b"audio"
+    assert await cache.get("key") == b"audio"
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["disk_hits"], stats["memory_hits"]) == (1, 1, 1)
+
+
+async def read_audio(synthesizer: ElevenLabsSynthesizer, text: str) -> bytes:
+    result = await synthesizer.create_speech(BaseMessage(text=text), 1024)
+    return b"".join([chunk.chunk async for chunk in result.chunk_generator])
+
+
+@pytest.mark.asyncio
+async def test_eleven_labs_serves_repeated_messages_from_memory(
+    tmp_path, monkeypatch, mock_eleven_labs_api: aioresponses
+):
+    monkeypatch.setenv("FILLER_AUDIO_PATH", str(tmp_path))
+    synthesizer = ElevenLabsSynthesizer(
+        ElevenLabsSynthesizerConfig(
+            **DEFAULT_PARAMS, api_key=MOCK_API_KEY, model_id="model", output_format=ELEVEN_LABS_MP3_44100
+        )
+    )
+    first = await read_audio(synthesizer, "Hello, world!")
+    second = await read_audio(synthesizer, "Hello, world!")
+    assert first == second
+    assert sum(len(calls) for calls in mock_eleven_labs_api.requests.values()) == 1
+    assert synthesizer.audio_cache.get_stats()["memory_hits"] == 1
+    await synthesizer.aiohttp_session.close()
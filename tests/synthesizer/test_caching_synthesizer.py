@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from tests.synthesizer.conftest import DEFAULT_PARAMS, MOCK_API_KEY
+from vocode.streaming.agent.bot_sentiment_analyser import BotSentiment
+from vocode.streaming.models.agent import FillerAudioConfig
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import (
+    AzureSynthesizerConfig,
+    ElevenLabsSynthesizerConfig,
+    SynthesizerConfig,
+)
+from vocode.streaming.synthesizer.audio_cache import TieredAudioCache
+from vocode.streaming.synthesizer.base_synthesizer import BaseSynthesizer, SynthesisResult
+from vocode.streaming.synthesizer.caching_synthesizer import CachingSynthesizer, get_synthesizer_fingerprint
+from vocode.streaming.synthesizer.eleven_labs_synthesizer import ELEVEN_LABS_BASE_URL, ElevenLabsSynthesizer
+from vocode.streaming.synthesizer.factory import SynthesizerFactory
+
+
+class FakeSynthesizer(BaseSynthesizer):
+    """Speaks one word per second of 8kHz linear audio."""
+
+    def __init__(self, synthesizer_config: SynthesizerConfig, every_chunk_is_last: bool = False):
+        super().__init__(synthesizer_config)
+        self.calls = 0
+        self.every_chunk_is_last = every_chunk_is_last
+
+    async def create_speech(self, message, chunk_size, bot_sentiment=None):
+        self.calls += 1
+        words = message.text.split()
+        audio = b"".join(bytes([i]) * 16000 for i in range(len(words)))
+
+        async def chunk_generator():
+            for i in range(0, len(audio), chunk_size):
+                is_last = self.every_chunk_is_last or i + chunk_size >= len(audio)
+                yield SynthesisResult.ChunkResult(audio[i : i + chunk_size], is_last)
+
+        return SynthesisResult(chunk_generator(), lambda seconds: " ".join(words[: int(seconds)]))
+
+
+async def synthesize(synthesizer: BaseSynthesizer, text: str, chunk_size: int):
+    result = await synthesizer.create_speech(BaseMessage(text=text), chunk_size)
+    chunks = [chunk_result async for chunk_result in result.chunk_generator]
+    return b"".join(chunk.chunk for chunk in chunks), chunks[-1].is_last_chunk, result.get_message_up_to
+
+
+@pytest.mark.asyncio
+async def test_repeated_message_is_served_from_cache(tmp_path):
+    config = SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    fake_synthesizer = FakeSynthesizer(config)
+    synthesizer = CachingSynthesizer(fake_synthesizer, audio_cache=TieredAudioCache(str(tmp_path)))
+
+    audio, is_last, get_message_up_to = await synthesize(synthesizer, "one two three", 5000)
+    await asyncio.sleep(0.1)  # the cache is written in the background
+    cached_audio, cached_is_last, cached_get_message_up_to = await synthesize(synthesizer, "one two three", 7000)
+
+    assert fake_synthesizer.calls == 1
+    assert cached_audio == audio and cached_is_last and is_last
+    for seconds in (0, 0.5, 1, 1.5, 2.2, 3):
+        assert cached_get_message_up_to(seconds) == get_message_up_to(seconds)
+    await synthesizer.tear_down()
+
+
+@pytest.mark.asyncio
+async def test_complete_utterance_is_cached_once(tmp_path):
+    config = SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    fake_synthesizer = FakeSynthesizer(config, every_chunk_is_last=True)
+    audio_cache = TieredAudioCache(str(tmp_path))
+    stored_entries = []
+    put = audio_cache.put
+
+    async def record_put(key, entry):
+        stored_entries.append(entry)
+        await put(key, entry)
+
+    audio_cache.put = record_put
+    synthesizer = CachingSynthesizer(fake_synthesizer, audio_cache=audio_cache)
+
+    result = await synthesizer.create_speech(BaseMessage(text="one two"), 5000)
+    async for _ in result.chunk_generator:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.1)
+    assert len(stored_entries) == 1
+    cached_audio, _, _ = await synthesize(synthesizer, "one two", 5000)
+    assert fake_synthesizer.calls == 1 and len(cached_audio) == 32000
+
+
+@pytest.mark.asyncio
+async def test_presynthesized_message_is_played_with_any_sentiment_unless_the_synthesizer_uses_it(tmp_path):
+    config = SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    fake_synthesizer = FakeSynthesizer(config)
+    synthesizer = CachingSynthesizer(fake_synthesizer, audio_cache=TieredAudioCache(str(tmp_path)))
+    message = BaseMessage(text="one two")
+    await synthesizer.presynthesize(message)
+
+    sentiment = BotSentiment(emotion="cheerful", degree=0.5)
+    result = await synthesizer.create_speech(message, 5000, bot_sentiment=sentiment)
+    assert [chunk async for chunk in result.chunk_generator] and fake_synthesizer.calls == 1
+
+    fake_synthesizer.uses_bot_sentiment = lambda: True
+    assert await synthesizer.is_message_cached(message)
+    result = await synthesizer.create_speech(message, 5000, bot_sentiment=sentiment)
+    assert [chunk async for chunk in result.chunk_generator] and fake_synthesizer.calls == 2
+
+
+class FillerPhrasesSynthesizer(FakeSynthesizer):
+    def get_filler_phrases(self):
+        return [BaseMessage(text="Um..."), BaseMessage(text="Let me see...")]
+
+    async def synthesize_filler_phrase(self, phrase):
+        self.calls += 1
+        return phrase.text.encode()
+
+
+@pytest.mark.asyncio
+async def test_phrase_fillers_are_served_from_the_shared_cache(tmp_path):
+    config = SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    audio_cache = TieredAudioCache(str(tmp_path))
+    first, second = FillerPhrasesSynthesizer(config), FillerPhrasesSynthesizer(config)
+
+    await CachingSynthesizer(first, audio_cache=audio_cache).set_filler_audios(FillerAudioConfig(use_phrases=True))
+    await CachingSynthesizer(second, audio_cache=audio_cache).set_filler_audios(FillerAudioConfig(use_phrases=True))
+
+    assert first.calls == 2 and second.calls == 0
+    assert [filler_audio.audio_data for filler_audio in second.filler_audios] == [b"Um...", b"Let me see..."]
+
+
+@pytest.mark.asyncio
+async def test_wrapped_synthesizer_overrides_are_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("FILLER_AUDIO_PATH", str(tmp_path))
+    eleven_labs_synthesizer = ElevenLabsSynthesizer(
+        ElevenLabsSynthesizerConfig(**DEFAULT_PARAMS, api_key=MOCK_API_KEY)
+    )
+    synthesizer = CachingSynthesizer(eleven_labs_synthesizer, audio_cache=TieredAudioCache(str(tmp_path)))
+
+    assert synthesizer.get_api_base_url() == ELEVEN_LABS_BASE_URL
+    await synthesizer.set_filler_audios(FillerAudioConfig(use_phrases=True))
+    assert eleven_labs_synthesizer.fillers_cache == {}
+    assert await synthesizer.get_filler("Uh") is None
+    assert synthesizer.filler_audios is eleven_labs_synthesizer.filler_audios
+
+    # ElevenLabs keeps its own cache and is not wrapped by the factory
+    factory_synthesizer = SynthesizerFactory().create_synthesizer(
+        ElevenLabsSynthesizerConfig(**DEFAULT_PARAMS, api_key=MOCK_API_KEY, cache_audio=True)
+    )
+    assert isinstance(factory_synthesizer, ElevenLabsSynthesizer)
+
+
+@pytest.mark.asyncio
+async def test_fingerprint_ignores_credentials_only():
+    def fingerprint(**kwargs):
+        config = AzureSynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16, **kwargs)
+        return get_synthesizer_fingerprint(FakeSynthesizer(config))
+
+    assert fingerprint() == fingerprint(cache_audio=True)
+    assert fingerprint() != fingerprint(voice_name="en-US-JennyNeural")
+    assert fingerprint() != fingerprint(rate=20)
@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List, Tuple
+
+import miniaudio
+import pytest
+
+from tests.streaming.data.loader import get_audio_path
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import ElevenLabsSynthesizerConfig, SynthesizerConfig
+from vocode.streaming.synthesizer.eleven_labs_synthesizer import ElevenLabsSynthesizer
+from vocode.streaming.synthesizer.miniaudio_worker import MiniaudioWorker
+from vocode.streaming.utils import convert_wav
+from vocode.streaming.utils.mp3_helper import StreamingMp3Decoder, decode_mp3
+
+CHUNK_SIZE = 1024
+
+
+def read_fake_mp3() -> bytes:
+    # 22.05 kHz, starts with an ID3 tag
+    with open(get_audio_path("fake_audio.mp3"), "rb") as f:
+        return f.read()
+
+
+def create_48khz_mp3(frame_count: int = 40) -> bytes:
+    # MPEG 1 layer III frames at 128 kbps, 48 kHz, mono, without an ID3 tag. Each
+    # granule only has a count1 region coded with table B: 4 bits per quadruple of
+    # ±1 coefficients followed by their signs, which is enough for a varying signal.
+    header = bytes([0xFF, 0xFB, 0x94, 0xC4])
+    frame_length = 384
+    frames = []
+    for frame_index in range(frame_count):
+        side_info = "0" * 18  # main_data_begin, private bits, scfsi
+        main_data = ""
+        for granule in range(2):
+            count1 = "".join(
+                "0000" + format((frame_index * 7 + granule * 3 + quadruple) % 16, "04b")
+                for quadruple in range(72)
+            )
+            main_data += count1
+            # part2_3_length, big_values, global_gain, then everything zeroed
+            # but count1table_select
+            side_info += format(len(count1), "012b") + "0" * 9 + format(170, "08b")
+            side_info += "0" * 29 + "1"
+        bits = side_info + main_data
+        frame = header + int(bits, 2).to_bytes(len(bits) // 8, "big")
+        frames.append(frame.ljust(frame_length, b"\x00"))
+    return b"".join(frames)
+
+
+MP3S = {"22050": read_fake_mp3, "48000": create_48khz_mp3}
+
+
+async def run_worker(
+    synthesizer_config: SynthesizerConfig, mp3_chunks: List[bytes]
+) -> List[Tuple[bytes, bool, bool]]:
+    input_queue: asyncio.Queue = asyncio.Queue()
+    output_queue: asyncio.Queue = asyncio.Queue()
+    worker = MiniaudioWorker(synthesizer_config, CHUNK_SIZE, input_queue, output_queue)
+    worker.start()
+    try:
+        for chunk in mp3_chunks:
+            worker.consume_nonblocking(chunk)
+        worker.consume_nonblocking(None)
+        outputs = []
+        while True:
+            chunk, is_last, decode_failed = await asyncio.wait_for(output_queue.get(), timeout=10)
+            outputs.append((bytes(chunk), is_last, decode_failed))
+            if is_last:
+                return outputs
+    finally:
+        worker.terminate()
+        worker.worker_thread.join()
+
+
+@pytest.mark.parametrize("mp3_sample_rate", MP3S)
+def test_streaming_decoder_matches_full_decode(mp3_sample_rate):
+    mp3 = MP3S[mp3_sample_rate]()
+    assert miniaudio.mp3_get_info(mp3).sample_rate == int(mp3_sample_rate)
+    expected = decode_mp3(mp3).read()
+    for fragment_size in [1, 333, 4096, len(mp3)]:
+        fragments = iter(
+            [mp3[i : i + fragment_size] for i in range(0, len(mp3), fragment_size)]
+        )
+        decoded = b"".join(StreamingMp3Decoder(lambda: next(fragments, None)))
+        # decode_mp3 returns a wav file, the streaming decoder raw frames
+        assert expected.endswith(decoded)
+        assert len(expected) - len(decoded) == 44
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mp3_sample_rate", MP3S)
+@pytest.mark.parametrize(
+    "sampling_rate,audio_encoding",
+    [(8000, AudioEncoding.MULAW), (16000, AudioEncoding.LINEAR16)],
+)
+async def test_incremental_decoding_matches_buffered(
+    mp3_sample_rate, sampling_rate, audio_encoding
+):
+    mp3 = MP3S[mp3_sample_rate]()
+    mp3_chunks = [mp3[i : i + 2048] for i in range(0, len(mp3), 2048)]
+    outputs = {}
+    for incremental in [True, False]:
+        synthesizer_config = SynthesizerConfig(
+            sampling_rate=sampling_rate,
+            audio_encoding=audio_encoding,
+            incremental_mp3_decoding=incremental,
+        )
+        outputs[incremental] = await run_worker(synthesizer_config, mp3_chunks)
+
+    assert outputs[True] == outputs[False]
+    assert all(len(chunk) == CHUNK_SIZE for chunk, _, _ in outputs[True][:-1])
+    assert b"".join(chunk for chunk, _, _ in outputs[True]) == convert_wav(
+        decode_mp3(mp3),
+        output_sample_rate=sampling_rate,
+        output_encoding=audio_encoding,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("incremental", [True, False])
+async def test_undecodable_utterance_is_reported(incremental):
+    synthesizer_config = SynthesizerConfig(
+        sampling_rate=8000, audio_encoding=AudioEncoding.MULAW, incremental_mp3_decoding=incremental
+    )
+    outputs = await run_worker(synthesizer_config, [b"\x00" * 5000])
+    assert outputs[-1][1:] == (True, True)
+
+    outputs = await run_worker(synthesizer_config, [read_fake_mp3()])
+    assert outputs[-1][1:] == (True, False)
+
+
+class FakeStreamReader:
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeSpan:
+    def end(self):
+        pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mp3,cached", [(b"\x00" * 5000, False), (None, True)])
+async def test_only_cleanly_decoded_utterances_are_cached(mp3, cached):
+    synthesizer = ElevenLabsSynthesizer(
+        ElevenLabsSynthesizerConfig(api_key="api_key", sampling_rate=8000, audio_encoding=AudioEncoding.MULAW),
+        ignore_cache=True,
+    )
+    converted = []
+
+    async def save_converted_audio(audio_data, message_text):
+        converted.append(message_text)
+
+    synthesizer.save_converted_audio = save_converted_audio
+    response = SimpleNamespace(content=FakeStreamReader([mp3 or read_fake_mp3()]))
+    chunks = [
+        chunk
+        async for chunk in synthesizer.experimental_mp3_streaming_output_generator(
+            response, CHUNK_SIZE, FakeSpan(), BaseMessage(text="Hello")
+        )
+    ]
+    await asyncio.sleep(0.1)
+    assert chunks[-1].is_last_chunk
+    assert converted == (["Hello"] if cached else [])
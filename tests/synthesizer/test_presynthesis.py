@@ -0,0 +1,84 @@
+import pytest
+
+from vocode.streaming.models.agent import ChatGPTAgentConfig
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import SynthesizerConfig
+from vocode.streaming.synthesizer.audio_cache import TieredAudioCache
+from vocode.streaming.synthesizer.base_synthesizer import BaseSynthesizer, SynthesisResult
+from vocode.streaming.synthesizer.caching_synthesizer import CachingSynthesizer
+from vocode.streaming.synthesizer.presynthesis import RetryPolicy, collect_phrases, presynthesize_phrases
+
+
+class FlakySynthesizer(BaseSynthesizer):
+    """Fails the first request for every phrase in `failing`."""
+
+    def __init__(self, synthesizer_config: SynthesizerConfig, failing=()):
+        super().__init__(synthesizer_config)
+        self.failing = set(failing)
+        self.requests = []
+
+    async def create_speech(self, message, chunk_size, bot_sentiment=None):
+        self.requests.append(message.text)
+        if message.text in self.failing:
+            self.failing.remove(message.text)
+            raise Exception("429 Too Many Requests")
+
+        async def chunk_generator():
+            yield SynthesisResult.ChunkResult(b"\x01\x00" * 800, True)
+
+        return SynthesisResult(chunk_generator(), lambda seconds: message.text)
+
+
+def test_collect_phrases_skips_templated_and_duplicate_phrases():
+    agent_config = ChatGPTAgentConfig(
+        prompt_preamble="",
+        initial_message=BaseMessage(text="Hello, this is Anna."),
+        call_script={
+            "steps": [
+                {"say": "Hello, this is Anna.", "next": "ask_name"},
+                {"say": ["May I have your name?", "Thank you {name}."]},
+                {"text_template": "Is {address} correct?"},
+            ]
+        },
+    )
+    assert collect_phrases(agent_config=agent_config, fillers=["Okay."]) == [
+        "Hello, this is Anna.",
+        "May I have your name?",
+        "Okay.",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_presynthesize_diff_dry_run_and_retries(tmp_path):
+    config = SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16)
+    provider = FlakySynthesizer(config, failing=["Bye."])
+    synthesizer = CachingSynthesizer(provider, audio_cache=TieredAudioCache(str(tmp_path)))
+    retry_policy = RetryPolicy(retries=1, backoff_factor=0)
+
+    report = await presynthesize_phrases(synthesizer, ["Hi.", "Bye."], retry_policy=retry_policy)
+    assert sorted(report.synthesized) == ["Bye.", "Hi."]
+    assert provider.requests.count("Bye.") == 2
+
+    report = await presynthesize_phrases(synthesizer, ["Hi.", "Bye.", "New."], dry_run=True)
+    assert report.cached == ["Hi.", "Bye."] and report.pending == ["New."]
+
+    report = await presynthesize_phrases(synthesizer, ["Hi.", "Bye.", "New."], requests_per_second=100)
+    assert report.synthesized == ["New."] and not report.failed
+    assert provider.requests.count("Hi.") == 1
+
+    result = await synthesizer.create_speech(BaseMessage(text="New."), 1600)
+    assert [chunk_result.chunk async for chunk_result in result.chunk_generator] == [b"\x01\x00" * 800]
+    assert provider.requests.count("New.") == 1
+    await synthesizer.tear_down()
+
+
+@pytest.mark.asyncio
+async def test_presynthesize_without_audio_cache_reports_phrases_as_failed():
+    provider = FlakySynthesizer(SynthesizerConfig(sampling_rate=8000, audio_encoding=AudioEncoding.LINEAR16))
+    assert not provider.can_presynthesize()
+    await provider.presynthesize(BaseMessage(text="Hi."))
+
+    report = await presynthesize_phrases(provider, ["Hi.", "Bye."])
+    assert report.failed == {"Hi.": "no audio cache", "Bye.": "no audio cache"}
+    assert not report.synthesized and not provider.requests
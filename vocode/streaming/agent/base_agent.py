@@ -9,6 +9,7 @@ import typing
 from enum import Enum
 from typing import (
     AsyncGenerator,
+    AsyncIterable,
     Generic,
     Optional,
     Tuple,
@@ -41,6 +42,7 @@ from vocode.streaming.models.transcript import Transcript
 from vocode.streaming.transcriber.base_transcriber import Transcription
 from vocode.streaming.utils import remove_non_letters_digits
 from vocode.streaming.utils.goodbye_model import GoodbyeModel
+from vocode.streaming.utils.turn_timeline import TurnTimelinePoint, TurnTimelineTracker
 from vocode.streaming.utils.worker import (
     InterruptibleAgentResponseEvent,
     InterruptibleEvent,
@@ -54,6 +56,8 @@ if TYPE_CHECKING:
 tracer = trace.get_tracer(__name__)
 AGENT_TRACE_NAME = "agent"
 
+TokenType = TypeVar("TokenType")
+
 
 class AgentInputType(str, Enum):
     BASE = "agent_input_base"
@@ -160,6 +164,7 @@ class BaseAgent(AbstractAgent[AgentConfigType], InterruptibleWorker):
                 self.goodbye_model.initialize_embeddings()
             )
         self.transcript: Optional[Transcript] = None
+        self.turn_timeline_tracker: Optional[TurnTimelineTracker] = None
 
         self.functions = self.get_functions() if self.agent_config.actions else None
         self.is_muted = False
@@ -175,6 +180,21 @@ class BaseAgent(AbstractAgent[AgentConfigType], InterruptibleWorker):
     ):
         self.conversation_state_manager = conversation_state_manager
 
+    def attach_turn_timeline_tracker(self, turn_timeline_tracker: TurnTimelineTracker):
+        self.turn_timeline_tracker = turn_timeline_tracker
+
+    def mark_turn_timeline(self, point: TurnTimelinePoint):
+        if self.turn_timeline_tracker is not None:
+            self.turn_timeline_tracker.mark(point)
+
+    async def mark_first_token(self, tokens: AsyncIterable[TokenType]) -> AsyncGenerator[TokenType, None]:
+        is_first_token = True
+        async for token in tokens:
+            if is_first_token:
+                self.mark_turn_timeline(TurnTimelinePoint.AGENT_FIRST_TOKEN)
+                is_first_token = False
+            yield token
+
     def set_interruptible_event_factory(self, factory: InterruptibleEventFactory):
         self.interruptible_event_factory = factory
 
@@ -231,6 +251,7 @@ class RespondAgent(BaseAgent[AgentConfigType]):
                                  first_response_end_time - first_response_start_time,
                                  first_response_end_time - generator_start)
                 agent_span_first.end()
+                self.mark_turn_timeline(TurnTimelinePoint.FIRST_SENTENCE)
                 is_first_response = False
             self.produce_interruptible_agent_response_event_nonblocking(
                 AgentResponseMessage(message=BaseMessage(text=response)),
@@ -259,6 +280,7 @@ class RespondAgent(BaseAgent[AgentConfigType]):
             response = None
             return True
         if response:
+            self.mark_turn_timeline(TurnTimelinePoint.FIRST_SENTENCE)
             self.produce_interruptible_agent_response_event_nonblocking(
                 AgentResponseMessage(message=BaseMessage(text=response)),
                 is_interruptible=self.agent_config.allow_agent_to_be_cut_off,
@@ -9,11 +9,14 @@ from typing import Any, Dict, List, Union
 from typing import AsyncGenerator, Optional, Tuple
 
 import openai
-import tiktoken
 
-from vocode import getenv
 from vocode.streaming.action.factory import ActionFactory
 from vocode.streaming.agent.base_agent import RespondAgent, AgentInput, AgentResponseMessage
+from vocode.streaming.agent.conversation_context import (
+    ConversationContextBuilder,
+    TokenCounter,
+    trim_messages_to_budget,
+)
 from vocode.streaming.agent.response_validator import DefaultResponseValidator, ValidationResult
 from vocode.streaming.agent.utils import (
     format_openai_chat_messages_from_transcript,
@@ -27,6 +30,8 @@ from vocode.streaming.models.message import BaseMessage
 from vocode.streaming.models.model import BaseModel
 from vocode.streaming.models.transcript import Transcript
 from vocode.streaming.transcriber.base_transcriber import Transcription
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
+from vocode.streaming.utils.turn_timeline import TurnTimelinePoint
 from vocode.streaming.utils.values_to_words import find_values_to_rewrite, response_to_tts_format
 from vocode.streaming.vector_db.factory import VectorDBFactory
 
@@ -58,6 +63,13 @@ class ConsoleChatResponse:
         return content
 
 
+@dataclass
+class SpeculativeDialogStateUpdate:
+    """A dialog state extraction started with the turn, its result is valid while the dialog state is at `version`."""
+    version: int
+    task: asyncio.Task
+
+
 class ConsoleChatDecision(BaseModel):
     response: ConsoleChatResponse
     say_now_raw_text: Optional[str] = None
@@ -93,18 +105,14 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
             agent_config=agent_config, action_factory=action_factory, logger=logger
         )
         if agent_config.azure_params:
-            openai.api_type = agent_config.azure_params.api_type
-            openai.api_base = getenv("AZURE_OPENAI_API_BASE")
-            openai.api_version = agent_config.azure_params.api_version
-            openai.api_key = getenv("AZURE_OPENAI_API_KEY")
+            self.openai_client = OpenAIClientRegistry.get_instance().get_azure_client(
+                api_version=agent_config.azure_params.api_version, api_type=agent_config.azure_params.api_type
+            )
             if agent_config.chat_gpt_functions_config.api_version is None:
                 agent_config.chat_gpt_functions_config.api_version = "2023-07-01-preview"  # functions must have this or higher to work
         else:
-            openai.api_type = "open_ai"
-            openai.api_base = "https://api.openai.com/v1"
-            openai.api_version = None
-            openai.api_key = openai_api_key or getenv("OPENAI_API_KEY")
-        if not openai.api_key:
+            self.openai_client = OpenAIClientRegistry.get_instance().get_openai_client(openai_api_key)
+        if not self.openai_client.api_key:
             raise ValueError("OPENAI_API_KEY must be set in environment or passed in")
         self.first_response = (
             self.create_first_response(agent_config.expected_first_prompt)
@@ -132,13 +140,20 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
         self.response_validator = DefaultResponseValidator(max_length=self.agent_config.max_chars_check,
                                                            )
 
-        self.tokenizer = tiktoken.encoding_for_model("gpt-3.5-turbo")  # FIXME: parametrize
+        self.token_counter = TokenCounter("gpt-3.5-turbo")  # FIXME: parametrize
+        self.tokenizer = self.token_counter.tokenizer
+        self.context_builder = ConversationContextBuilder()
 
         # logging parameters to get final chat_params from response generators
         self.last_chat_parameters_text: Optional[List[Dict[str, Any]]] = None
         self.last_chat_parameters_dialog_state_update: Optional[List[Dict[str, Any]]] = None
         self.last_chat_parameters_normalization: Optional[List[Dict[str, Any]]] = None
 
+        # incremented whenever a dialog state update is applied, extractions started before are stale
+        self.dialog_state_version = 0
+        self.speculative_extractions_used = 0
+        self.speculative_extractions_discarded = 0
+
     @property
     def extract_belief_state(self):
         return self.call_script.dialog_state_prompt is not None
@@ -150,31 +165,18 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
         """
         Count the number of tokens in a text string using tiktoken.
         """
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count(text)
 
     def trim_messages_to_fit(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """
         Ensure that total tokens (messages + expected response) don't exceed max_tokens.
         Remove messages from the start (excluding the system prompt) if they do.
         """
-        # Count tokens for each message once and store in a list
-        token_counts = [self.count_tokens(message['content']) for message in messages]
-
-        total_tokens = sum(token_counts)
-        self.logger.debug("Total tokens: %s", total_tokens)
-
-        # Calculate total tokens considering max response tokens
-        total_tokens += self.agent_config.max_tokens
-        self.logger.debug("Total tokens with max response tokens: %s", total_tokens)
-
-        while total_tokens > self.agent_config.max_total_tokens and len(messages) > 1:
-            # Remove the message from the front (excluding system prompt)
-            removed_message = messages.pop(1)
-            removed_token_count = token_counts.pop(1)
-
-            self.logger.warning("Trimming messages to fit max_tokens. Message dropped: %s", removed_message["content"])
-            total_tokens -= removed_token_count
-
+        messages, dropped_messages = trim_messages_to_budget(
+            messages, self.token_counter, self.agent_config.max_total_tokens - self.agent_config.max_tokens
+        )
+        for dropped_message in dropped_messages:
+            self.logger.warning("Trimming messages to fit max_tokens. Message dropped: %s", dropped_message["content"])
         return messages
 
     def create_goodbye_detection_task(self, message: str):
@@ -202,9 +204,15 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
             # merge normalized values into the original dialog state.
             chat_response.dialog_state_update = {**chat_response.dialog_state_update, **normalized_dialog_state}
             # Call decision callback again with normalized values
-            decision = self.call_script.decision_callback(chat_response, normalize=False)
+            decision = self.apply_decision(chat_response, normalize=False)
         return chat_response, decision
 
+    def apply_decision(self, chat_response: ConsoleChatResponse, **kwargs) -> ConsoleChatDecision:
+        """Updates the dialog state of the call script with the response, extractions started before are stale."""
+        decision = self.call_script.decision_callback(chat_response, **kwargs)
+        self.dialog_state_version += 1
+        return decision
+
     def check_response(self, response: str) -> ValidationResult:
         validation_result = self.response_validator.validate(response)
         if not validation_result.valid:
@@ -213,6 +221,53 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
 
     async def handle_generate_response(
             self, transcription: Transcription, agent_input: AgentInput
+    ) -> bool:
+        speculative_update = self.start_dialog_state_extraction()
+        try:
+            return await self.generate_and_decide(transcription, agent_input, speculative_update)
+        finally:
+            if speculative_update is not None and not speculative_update.task.done():
+                speculative_update.task.cancel()
+
+    def start_dialog_state_extraction(self) -> Optional[SpeculativeDialogStateUpdate]:
+        """Starts extracting the dialog state from the user's message, concurrently with the reply."""
+        if not self.extract_belief_state or not self.agent_config.speculative_dialog_state_extraction:
+            return None
+        return SpeculativeDialogStateUpdate(
+            version=self.dialog_state_version,
+            task=asyncio.create_task(self.get_dialog_state_update(None)),
+        )
+
+    async def resolve_dialog_state_update(
+            self, speculative_update: Optional[SpeculativeDialogStateUpdate], responses: List[str]
+    ) -> Dict[str, str]:
+        if speculative_update is not None:
+            if speculative_update.version != self.dialog_state_version:
+                speculative_update.task.cancel()
+                self.logger.warning("Dialog state changed during speculative extraction, extracting again")
+            else:
+                try:
+                    # shielded, a cancelled turn must not be taken for a cancelled extraction
+                    dialog_state_update = await asyncio.shield(speculative_update.task)
+                except asyncio.CancelledError:
+                    if not speculative_update.task.cancelled():
+                        raise
+                    self.logger.warning("Speculative dialog state extraction was cancelled, extracting again")
+                except Exception:
+                    self.logger.exception("Speculative dialog state extraction failed, extracting again")
+                else:
+                    if speculative_update.version == self.dialog_state_version:
+                        self.speculative_extractions_used += 1
+                        return dialog_state_update
+                    self.logger.warning("Dialog state changed during speculative extraction, extracting again")
+            self.speculative_extractions_discarded += 1
+        return await self.get_dialog_state_update('. '.join(responses[:EXTRACTION_FIRST_N_ASSISTANT_SENTENCES]))
+
+    async def generate_and_decide(
+            self,
+            transcription: Transcription,
+            agent_input: AgentInput,
+            speculative_update: Optional[SpeculativeDialogStateUpdate] = None,
     ) -> bool:
         conversation_id = agent_input.conversation_id
 
@@ -244,6 +299,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
                 all_responses.append(response)
 
             if is_first_response:
+                self.mark_turn_timeline(TurnTimelinePoint.FIRST_SENTENCE)
                 is_first_response = False
             self.logger.debug("Producing response `%s`", response)
             self.transcript.log_gpt_message(response)
@@ -258,14 +314,13 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
             formatted_responses = "\n".join(["BOT: " + response for response in all_responses])
 
             self.logger.info("Got responses from agent for dialog state extraction: %s", formatted_responses)
-            dialog_state_update = await self.get_dialog_state_update(
-                '. '.join(all_responses[:EXTRACTION_FIRST_N_ASSISTANT_SENTENCES]))
+            dialog_state_update = await self.resolve_dialog_state_update(speculative_update, all_responses)
             self.logger.info("Got dialog state update from agent: %s", dialog_state_update)
             full_response_text_only = ' '.join(all_responses)
             chat_response = ConsoleChatResponse(full_response_text_only, dialog_state_update,
                                                 raw_text=full_response_text_only,
                                                 failed_validation=failed_validation)
-            decision: ConsoleChatDecision = self.call_script.decision_callback(chat_response)
+            decision: ConsoleChatDecision = self.apply_decision(chat_response)
 
             # Conditionally normalize the dialog state.
             chat_response, decision = await self._handle_initial_decision(chat_response, decision)
@@ -342,7 +397,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
 
         chat_parameters["messages"] = [chat_parameters["messages"][0]] + [{"role": "user", "content": content}]
         chat_parameters["messages"] = self.trim_messages_to_fit(chat_parameters["messages"])
-        chat_completion = await openai.ChatCompletion.acreate(**chat_parameters)
+        chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
 
         self.last_chat_parameters_normalization = chat_parameters
 
@@ -372,7 +427,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
 
         chat_parameters["messages"] = self.trim_messages_to_fit(chat_parameters["messages"])
         # Call the model
-        chat_completion = await openai.ChatCompletion.acreate(**chat_parameters)
+        chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
         self.last_chat_parameters_dialog_state_update = chat_parameters
         return self._parse_dialog_state(chat_completion.choices[0].message.function_call.arguments)
 
@@ -394,9 +449,9 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
         # It would be nice to have flexiblity to connect more to previous context also with `combined_response`, but here we prefer to reset the state instead for now.
         chat_parameters["messages"] = [chat_parameters["messages"][0]]
 
-        stream = await openai.ChatCompletion.acreate(**chat_parameters)
+        stream = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
         async for message in collate_response_async(
-                openai_get_tokens(stream), get_functions=True
+                openai_get_tokens(stream), get_functions=True, language=self.agent_config.language
         ):
             yield message
 
@@ -420,16 +475,14 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
             dialog_state_prompt, function = self.call_script.render_dialog_state_prompt_and_function(
                 override_dialog_state=override_dialog_state,
             )
-            messages = messages or format_openai_chat_messages_from_transcript(
-                self.transcript, dialog_state_prompt
-            )
+            messages = messages or self.context_builder.build(self.transcript, dialog_state_prompt)
             parameters.update({"functions": [function], "function_call": {"name": function["name"]}})
 
         elif normalize:
             prompt_preamble = self.call_script.render_normalization_prompt(keys_to_normalize)
             messages = [{"role": "system", "content": prompt_preamble}]
         else:
-            messages = messages or format_openai_chat_messages_from_transcript(
+            messages = messages or self.context_builder.build(
                 self.transcript, self.call_script.render_text_prompt(
                     override_dialog_state=override_dialog_state
                 ))
@@ -476,7 +529,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
                    ) + ([{"role": "user", "content": first_prompt}] if first_prompt is not None else [])
 
         parameters = self.get_chat_parameters(messages)
-        return openai.ChatCompletion.create(**parameters)
+        return self.openai_client.create(openai.ChatCompletion, **parameters)
 
     def attach_transcript(self, transcript: Transcript):
         self.transcript = transcript
@@ -499,7 +552,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
             text = self.first_response
         else:
             chat_parameters = self.get_chat_parameters()
-            chat_completion = await openai.ChatCompletion.acreate(**chat_parameters)
+            chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
             text = chat_completion.choices[0].message.content
         self.logger.debug(f"LLM response: {text}")
         end = time.time()
@@ -534,9 +587,7 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
                     ]
                 )
                 vector_db_result = f"Found {len(docs_with_scores)} similar documents:\n{docs_with_scores_str}"
-                messages = format_openai_chat_messages_from_transcript(
-                    self.transcript, self.call_script.text_template
-                )
+                messages = self.context_builder.build(self.transcript, self.call_script.text_template)
                 messages.insert(
                     -1, vector_db_result_to_openai_chat_message(vector_db_result)
                 )
@@ -571,11 +622,14 @@ class ChatGPTAgent(RespondAgent[ChatGPTAgentConfig]):
         chat_parameters["messages"][0]["content"] = re.sub(r'(\n\s*){2,}\n', '\n\n',
                                                            chat_parameters["messages"][0]["content"]).strip()
         chat_parameters["messages"] = self.trim_messages_to_fit(chat_parameters["messages"])
-        stream = await openai.ChatCompletion.acreate(**chat_parameters)
+        stream = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
         self.last_chat_parameters_text = chat_parameters
 
         async for message in collate_response_async(
-                openai_get_tokens(stream), get_functions=True
+                self.mark_first_token(openai_get_tokens(stream)),
+                get_functions=True,
+                language=self.agent_config.language,
+                min_clause_length=self.agent_config.first_clause_min_length,
         ):
             yield message
 
@@ -594,16 +648,12 @@ class ChatGPTAgentOld(RespondAgent[ChatGPTAgentConfigOLD]):
             agent_config=agent_config, action_factory=action_factory, logger=logger
         )
         if agent_config.azure_params:
-            openai.api_type = agent_config.azure_params.api_type
-            openai.api_base = getenv("AZURE_OPENAI_API_BASE")
-            openai.api_version = agent_config.azure_params.api_version
-            openai.api_key = getenv("AZURE_OPENAI_API_KEY")
+            self.openai_client = OpenAIClientRegistry.get_instance().get_azure_client(
+                api_version=agent_config.azure_params.api_version, api_type=agent_config.azure_params.api_type
+            )
         else:
-            openai.api_type = "open_ai"
-            openai.api_base = "https://api.openai.com/v1"
-            openai.api_version = None
-            openai.api_key = openai_api_key or getenv("OPENAI_API_KEY")
-        if not openai.api_key:
+            self.openai_client = OpenAIClientRegistry.get_instance().get_openai_client(openai_api_key)
+        if not self.openai_client.api_key:
             raise ValueError("OPENAI_API_KEY must be set in environment or passed in")
         self.first_response = None
         self.is_first_response = True
@@ -666,7 +716,7 @@ class ChatGPTAgentOld(RespondAgent[ChatGPTAgentConfigOLD]):
         parameters = self.get_chat_parameters(messages, ignore_assert=True)
         parameters["stream"] = False
         self.logger.info('Attempting create response for the first message.')
-        chat_completion = await openai.ChatCompletion.acreate(**parameters)
+        chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **parameters)
         return chat_completion.choices[0].message.content
 
     def attach_transcript(self, transcript: Transcript):
@@ -689,7 +739,7 @@ class ChatGPTAgentOld(RespondAgent[ChatGPTAgentConfigOLD]):
             text = self.first_response
         else:
             chat_parameters = self.get_chat_parameters()
-            chat_completion = await openai.ChatCompletion.acreate(**chat_parameters)
+            chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
             text = chat_completion.choices[0].message.content
         self.logger.debug(f"LLM response: {text}")
         return text, False
@@ -699,7 +749,7 @@ class ChatGPTAgentOld(RespondAgent[ChatGPTAgentConfigOLD]):
             # Create the chat stream
             self.logger.info('attempt_stream_response')
             stream = await asyncio.wait_for(
-                openai.ChatCompletion.acreate(**chat_parameters),
+                self.openai_client.acreate(openai.ChatCompletion, **chat_parameters),
                 timeout=self.agent_config.timeout_generator_seconds
             )
             self.logger.info('have attempt_stream_response')
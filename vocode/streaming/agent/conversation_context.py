@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+
+from vocode.streaming.agent.utils import format_openai_chat_message
+from vocode.streaming.models.events import Sender
+from vocode.streaming.models.transcript import Message, Transcript
+
+DEFAULT_TOKENIZER_MODEL = "gpt-3.5-turbo"
+# distinct contents counted per conversation, the history plus the system prompts of recent turns
+TOKEN_COUNT_CACHE_SIZE = 512
+
+_tokenizers: Dict[str, tiktoken.Encoding] = {}
+
+
+def get_tokenizer(model_name: str = DEFAULT_TOKENIZER_MODEL) -> tiktoken.Encoding:
+    """The tokenizer of the model, loaded once per process and shared by all agents."""
+    if model_name not in _tokenizers:
+        _tokenizers[model_name] = tiktoken.encoding_for_model(model_name)
+    return _tokenizers[model_name]
+
+
+class TokenCounter:
+    """Counts the tokens of message contents, encoding each distinct content once."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_TOKENIZER_MODEL,
+        tokenizer: Optional[tiktoken.Encoding] = None,
+        cache_size: int = TOKEN_COUNT_CACHE_SIZE,
+    ):
+        self.tokenizer = tokenizer or get_tokenizer(model_name)
+        self.cache_size = cache_size
+        self.counts: "OrderedDict[str, int]" = OrderedDict()
+        self.encoded = 0
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        count = self.counts.get(text)
+        if count is not None:
+            self.counts.move_to_end(text)
+            return count
+        count = len(self.tokenizer.encode(text))
+        self.encoded += 1
+        self.counts[text] = count
+        if len(self.counts) > self.cache_size:
+            self.counts.popitem(last=False)
+        return count
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        return self.count(message.get("content"))
+
+
+def trim_messages_to_budget(
+    messages: List[Dict[str, Any]], token_counter: TokenCounter, max_tokens: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Drops the oldest messages after the system prompt until the rest fits `max_tokens`. Returns the
+    kept and the dropped messages.
+    """
+    token_counts = [token_counter.count_message(message) for message in messages]
+    total_tokens = sum(token_counts)
+    cut = 1
+    while total_tokens > max_tokens and cut < len(messages):
+        total_tokens -= token_counts[cut]
+        cut += 1
+    if cut == 1:
+        return messages, []
+    return messages[:1] + messages[cut:], messages[1:cut]
+
+
+class ConversationContextBuilder:
+    """
+    Keeps the OpenAI chat messages of a transcript up to date as events are added, so a turn formats
+    only the events logged since the previous one instead of the whole history.
+    Formats the same messages as `format_openai_chat_messages_from_transcript`.
+    """
+
+    def __init__(self):
+        self.transcript: Optional[Transcript] = None
+        self.messages: List[Dict[str, Any]] = []
+        self.num_event_logs = 0
+        # consecutive bot messages are merged into one chat message, the last one may still grow
+        self.bot_messages: List[Message] = []
+        self.bot_texts: List[str] = []
+        self.bot_message_index = -1
+        self.bot_messages_open = False
+
+    def reset(self, transcript: Transcript):
+        self.transcript = transcript
+        self.messages = []
+        self.num_event_logs = 0
+        self.bot_messages = []
+        self.bot_texts = []
+        self.bot_message_index = -1
+        self.bot_messages_open = False
+
+    def update(self, transcript: Transcript) -> List[Dict[str, Any]]:
+        if transcript is not self.transcript or len(transcript.event_logs) < self.num_event_logs:
+            self.reset(transcript)
+        # the last bot message is cut off in place when the bot is interrupted
+        if self.bot_messages and self.bot_messages[-1].text != self.bot_texts[-1]:
+            self.bot_texts = [message.text for message in self.bot_messages]
+            self.set_bot_message()
+        for event_log in transcript.event_logs[self.num_event_logs:]:
+            if isinstance(event_log, Message) and event_log.sender == Sender.BOT:
+                if not self.bot_messages_open:
+                    self.bot_messages, self.bot_texts = [], []
+                    self.bot_message_index = len(self.messages)
+                    self.messages.append({})
+                    self.bot_messages_open = True
+                self.bot_messages.append(event_log)
+                self.bot_texts.append(event_log.text)
+                self.set_bot_message()
+                continue
+            self.bot_messages_open = False
+            chat_message = format_openai_chat_message(event_log)
+            if chat_message is not None:
+                self.messages.append(chat_message)
+        self.num_event_logs = len(transcript.event_logs)
+        return self.messages
+
+    def set_bot_message(self):
+        # replaced rather than mutated, messages handed out for earlier requests stay as they were
+        self.messages[self.bot_message_index] = {"role": "assistant", "content": " ".join(self.bot_texts)}
+
+    def build(self, transcript: Transcript, prompt_preamble: Optional[str] = None) -> List[Dict[str, Any]]:
+        messages = self.update(transcript)
+        return ([{"role": "system", "content": prompt_preamble}] if prompt_preamble else []) + messages
@@ -10,10 +10,11 @@ from vocode.streaming.action.factory import ActionFactory
 from vocode.streaming.agent.base_agent import RespondAgent
 from vocode.streaming.agent.utils import (
     format_openai_chat_messages_from_transcript,
-    openai_get_tokens, llama3_collate_response_async)
+    openai_get_tokens, collate_response_async)
 from vocode.streaming.models.actions import FunctionCall
 from vocode.streaming.models.agent import LLAMA3AgentConfig
 from vocode.streaming.models.transcript import Transcript
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
 
 
 class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
@@ -28,11 +29,10 @@ class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
             agent_config=agent_config, action_factory=action_factory, logger=logger
         )
 
-        openai.api_type = "open_ai"
-        openai.api_base = agent_config.api_base
-        openai.api_version = None
-        openai.api_key = api_key or getenv("LLAMA3_API_KEY")
-        if not openai.api_key:
+        self.openai_client = OpenAIClientRegistry.get_instance().get_client(
+            agent_config.api_base, api_key or getenv("LLAMA3_API_KEY")
+        )
+        if not self.openai_client.api_key:
             raise ValueError("OPENAI_API_KEY must be set in environment or passed in")
         self.first_response = None
         self.is_first_response = True
@@ -69,9 +69,9 @@ class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
         parameters = self.get_chat_parameters(messages)
         parameters["stream"] = True
         self.logger.info('Attempting to stream response for first message.')
-        stream = await openai.ChatCompletion.acreate(**parameters)
-        async for message in llama3_collate_response_async(
-                openai_get_tokens(stream)
+        stream = await self.openai_client.acreate(openai.ChatCompletion, **parameters)
+        async for message in collate_response_async(
+                openai_get_tokens(stream), language=self.agent_config.language
         ):
             yield message, True
 
@@ -81,7 +81,7 @@ class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
         parameters = self.get_chat_parameters(messages, ignore_assert=True)
         parameters["stream"] = False
         self.logger.info('Attempting create response for the first message.')
-        chat_completion = await openai.ChatCompletion.acreate(**parameters)
+        chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **parameters)
         return chat_completion.choices[0].message.content
 
     def attach_transcript(self, transcript: Transcript):
@@ -104,7 +104,7 @@ class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
             text = self.first_response
         else:
             chat_parameters = self.get_chat_parameters()
-            chat_completion = await openai.ChatCompletion.acreate(**chat_parameters)
+            chat_completion = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
             text = chat_completion.choices[0].message.content
         self.logger.debug(f"LLM response: {text}")
         return text, False
@@ -122,8 +122,10 @@ class LLAMA3Agent(RespondAgent[LLAMA3AgentConfig]):
         chat_parameters["stream"] = True
 
         self.logger.info('Attempting to stream response.')
-        stream = await openai.ChatCompletion.acreate(**chat_parameters)
-        async for message in llama3_collate_response_async(
-                openai_get_tokens(stream)
+        stream = await self.openai_client.acreate(openai.ChatCompletion, **chat_parameters)
+        async for message in collate_response_async(
+                openai_get_tokens(stream),
+                language=self.agent_config.language,
+                min_clause_length=self.agent_config.first_clause_min_length,
         ):
             yield message, True
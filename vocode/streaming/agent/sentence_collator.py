@@ -0,0 +1,250 @@
+"""
+Incremental segmentation of streamed LLM output into the sentences sent to the synthesizer. Each
+character is scanned once as tokens arrive, whatever the length of the sentence.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, List, Optional
+
+SENTENCE_ENDINGS = [".", "!", "?", "\n"]
+
+# characters a word may start with before the abbreviation itself, e.g. "(např."
+OPENING_PUNCTUATION = "([{\"'„“‚‘«»"
+CLAUSE_ENDINGS = ",;"
+
+
+@dataclass(frozen=True)
+class LanguageRules:
+    # words followed by a period that never end a sentence, lowercase and without the final period
+    abbreviations: FrozenSet[str] = field(default_factory=frozenset)
+    # a first clause may be emitted early before these words
+    conjunctions: FrozenSet[str] = field(default_factory=frozenset)
+
+
+LANGUAGE_RULES = {
+    "en": LanguageRules(
+        abbreviations=frozenset(
+            ["mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx", "inc", "ltd"]
+        ),
+        conjunctions=frozenset(["and", "but", "so", "because", "or", "which", "while", "although"]),
+    ),
+    "cs": LanguageRules(
+        abbreviations=frozenset(
+            [
+                "např", "tzv", "tj", "t.j", "mj", "atd", "apod", "resp", "popř", "př", "č", "čp", "ul", "tel", "ing",
+                "mgr", "bc", "mudr", "judr", "phdr", "rndr", "doc", "prof", "sv", "p", "pí", "s.r.o", "a.s",
+                "spol", "cca",
+            ]
+        ),
+        conjunctions=frozenset(
+            ["a", "ale", "protože", "že", "nebo", "když", "který", "která", "které", "aby", "takže", "jestli"]
+        ),
+    ),
+    "sk": LanguageRules(
+        abbreviations=frozenset(
+            [
+                "napr", "tzv", "tj", "t.j", "atď", "resp", "príp", "č", "ul", "tel", "ing", "mgr", "bc",
+                "mudr", "judr", "phdr", "rndr", "doc", "prof", "sv", "p", "s.r.o", "a.s", "spol", "cca",
+            ]
+        ),
+        conjunctions=frozenset(
+            ["a", "ale", "pretože", "že", "alebo", "keď", "ktorý", "ktorá", "ktoré", "aby", "takže", "či"]
+        ),
+    ),
+    "pl": LanguageRules(
+        abbreviations=frozenset(
+            [
+                "np", "tzn", "tzw", "tj", "itd", "itp", "ul", "nr", "godz", "dr", "mgr", "inż", "prof", "św", "wg",
+                "al", "pt", "sp", "ds", "ew",
+            ]
+        ),
+        conjunctions=frozenset(
+            ["i", "a", "ale", "bo", "ponieważ", "że", "lub", "albo", "gdy", "który", "która", "które", "żeby", "więc"]
+        ),
+    ),
+}
+LANGUAGE_ALIASES = {"cz": "cs"}
+
+# abbreviations of one language are words of another, e.g. "Ok.", so without a known language only numbers,
+# single letters and dotted words keep their period, clauses only end at commas
+DEFAULT_LANGUAGE_RULES = LanguageRules()
+
+
+def get_language_rules(language: Optional[str]) -> LanguageRules:
+    """Rules of a language given as e.g. "cs", "cs-CZ" or "pl_PL", the default rules when unknown."""
+    if not language:
+        return DEFAULT_LANGUAGE_RULES
+    code = language.lower().replace("_", "-").split("-")[0]
+    return LANGUAGE_RULES.get(LANGUAGE_ALIASES.get(code, code), DEFAULT_LANGUAGE_RULES)
+
+
+class SentenceCollator:
+    """
+    Splits streamed text into sentences, scanning only the characters added since the last `feed`.
+
+    A period after a number, a single letter or inside a dotted word is a sentence ending only when
+    the text after it doesn't continue the sentence: "3.20", "15. května" and "e.g." are not split,
+    "$5. $6" is. Periods after the abbreviations of the language never end a sentence. A line
+    starting like a list item ("1. ", "2)") ends only at a newline.
+
+    With `min_clause_length`, the first segment of the response is emitted early at a comma or before
+    a conjunction once it has that many characters, so synthesis of a long first sentence can start
+    before the sentence is complete.
+    """
+
+    def __init__(
+        self,
+        language: Optional[str] = None,
+        sentence_endings: Iterable[str] = SENTENCE_ENDINGS,
+        min_clause_length: Optional[int] = None,
+    ):
+        self.rules = get_language_rules(language)
+        self.sentence_endings = frozenset(sentence_endings)
+        # once a segment has started, only these characters change the state
+        self.special_characters = re.compile(r"[\s" + re.escape("".join(self.sentence_endings)) + "]")
+        self.min_clause_length = min_clause_length
+        self.buffer = ""
+        # next character of the buffer to scan
+        self.position = 0
+        self.segment_start = 0
+        self.first_character: Optional[int] = None
+        self.word_start = 0
+        # None until the first characters of the segment tell
+        self.list_item: Optional[bool] = None
+        # list items start at the beginning of the response or after a newline
+        self.at_line_start = True
+        # a period that ends a sentence only if the text after it doesn't continue the sentence
+        self.pending_period: Optional[int] = None
+        self.segments_emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Adds streamed text, returns the segments it completed."""
+        self.buffer += text
+        segments: List[str] = []
+        while self.position < len(self.buffer):
+            if self.pending_period is None and self.list_item is not None:
+                match = self.special_characters.search(self.buffer, self.position)
+                if match is None:
+                    self.position = len(self.buffer)
+                    break
+                self.position = match.start()
+            self.scan(self.position, segments)
+            self.position += 1
+        self.compact()
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """The rest of the text at the end of the stream."""
+        segment = self.buffer[self.segment_start:].strip()
+        self.buffer = ""
+        self.position = 0
+        self.start_segment(0)
+        self.at_line_start = True
+        if self.is_speakable(segment):
+            self.segments_emitted += 1
+            return segment
+        return None
+
+    def scan(self, i: int, segments: List[str]):
+        char = self.buffer[i]
+        if self.pending_period is not None:
+            if not self.resolve_pending_period(i, segments):
+                return
+        if char.isspace():
+            if char == "\n" and "\n" in self.sentence_endings:
+                self.emit(i + 1, segments)
+                return
+            if self.can_emit_clause():
+                self.scan_clause_ending(i, segments)
+            self.word_start = i + 1
+            return
+        if self.first_character is None:
+            self.first_character = i
+        if self.list_item is None and not char.isdigit():
+            self.list_item = self.at_line_start and i > self.first_character and char in ".)"
+        if self.list_item or char not in self.sentence_endings:
+            return
+        if char != ".":
+            self.emit(i + 1, segments)
+            return
+        word = self.buffer[self.word_start:i].lstrip(OPENING_PUNCTUATION).lower()
+        if word in self.rules.abbreviations:
+            return
+        if word and (word[-1].isdigit() or len(word) == 1 or "." in word):
+            self.pending_period = i
+            return
+        self.emit(i + 1, segments)
+
+    def resolve_pending_period(self, i: int, segments: List[str]) -> bool:
+        """Decides the pending period from the character at `i`, False while still undecided."""
+        period = self.pending_period
+        assert period is not None
+        char = self.buffer[i]
+        if char == "\n":
+            self.pending_period = None
+            return True
+        if char.isspace():
+            self.word_start = i + 1
+            return False
+        self.pending_period = None
+        # "5." directly followed by text is never an ending, after a space it depends on the next word
+        if i > period + 1 and not (char.islower() or char.isdigit()):
+            self.emit(period + 1, segments)
+            self.word_start = i
+        return True
+
+    def can_emit_clause(self) -> bool:
+        return (
+            self.min_clause_length is not None
+            and self.segments_emitted == 0
+            and not self.list_item
+            and self.first_character is not None
+        )
+
+    def scan_clause_ending(self, i: int, segments: List[str]):
+        assert self.min_clause_length is not None and self.first_character is not None
+        if self.buffer[i - 1] in CLAUSE_ENDINGS:
+            if i - self.first_character >= self.min_clause_length:
+                self.emit(i, segments)
+            return
+        word = self.buffer[self.word_start:i].lower()
+        if word in self.rules.conjunctions:
+            # the length up to the conjunction, without the space before it
+            if self.word_start - 1 - self.first_character >= self.min_clause_length:
+                word_start = self.word_start
+                self.emit(word_start, segments)
+                self.first_character = word_start
+                self.list_item = False
+
+    def emit(self, end: int, segments: List[str]):
+        segment = self.buffer[self.segment_start:end].strip()
+        if self.is_speakable(segment):
+            segments.append(segment)
+            self.segments_emitted += 1
+        self.at_line_start = self.buffer[end - 1] == "\n"
+        self.start_segment(end)
+
+    def start_segment(self, start: int):
+        self.segment_start = start
+        self.word_start = start
+        self.first_character = None
+        self.list_item = None
+        self.pending_period = None
+
+    @staticmethod
+    def is_speakable(segment: str) -> bool:
+        return any(char.isalnum() for char in segment)
+
+    def compact(self):
+        """Drops the emitted text from the buffer."""
+        offset = self.segment_start
+        if offset == 0:
+            return
+        self.buffer = self.buffer[offset:]
+        self.position -= offset
+        self.segment_start = 0
+        self.word_start -= offset
+        if self.first_character is not None:
+            self.first_character -= offset
+        if self.pending_period is not None:
+            self.pending_period -= offset
@@ -1,5 +1,3 @@
-from copy import deepcopy
-import re
 import logging
 from typing import (
     Dict,
@@ -15,6 +13,7 @@ from typing import (
 )
 
 from openai.openai_object import OpenAIObject
+from vocode.streaming.agent.sentence_collator import SENTENCE_ENDINGS, SentenceCollator
 from vocode.streaming.models.actions import FunctionCall, FunctionFragment
 from vocode.streaming.models.events import Sender
 from vocode.streaming.models.transcript import (
@@ -25,91 +24,39 @@ from vocode.streaming.models.transcript import (
     Transcript,
 )
 
-SENTENCE_ENDINGS = [".", "!", "?", "\n"]
-
 
 async def collate_response_async(
         gen: AsyncIterable[Union[str, FunctionFragment]],
         sentence_endings: List[str] = SENTENCE_ENDINGS,
         get_functions: Literal[True, False] = False,
+        language: Optional[str] = None,
+        min_clause_length: Optional[int] = None,
 ) -> AsyncGenerator[Union[str, FunctionCall], None]:
-    sentence_endings_pattern = "|".join(map(re.escape, sentence_endings))
-    list_item_ending_pattern = r"\n"
-    buffer = ""
+    """
+    Collates streamed tokens into sentences, see SentenceCollator. Function call fragments are joined
+    into a single FunctionCall yielded after the text when `get_functions` is set.
+    """
+    collator = SentenceCollator(
+        language=language, sentence_endings=sentence_endings, min_clause_length=min_clause_length
+    )
     function_name_buffer = ""
     function_args_buffer = ""
-    prev_ends_with_money = False
     async for token in gen:
         if not token:
             continue
         if isinstance(token, str):
-            if prev_ends_with_money and token.startswith(" "):
-                yield buffer.strip()
-                buffer = ""
-
-            buffer += token
-            possible_list_item = bool(re.match(r"^\d+[ .]", buffer))
-            ends_with_money = bool(re.findall(r"\$\d+.$", buffer))
-            if re.findall(
-                    list_item_ending_pattern
-                    if possible_list_item
-                    else sentence_endings_pattern,
-                    token,
-            ):
-                if not ends_with_money:
-                    to_return = buffer.strip()
-                    if to_return:
-                        yield to_return
-                    buffer = ""
-            prev_ends_with_money = ends_with_money
+            for sentence in collator.feed(token):
+                yield sentence
         elif isinstance(token, FunctionFragment):
             function_name_buffer += token.name
             function_args_buffer += token.arguments
-    to_return = buffer.strip()
+    to_return = collator.flush()
     if to_return:
         yield to_return
     if function_name_buffer and get_functions:
         yield FunctionCall(name=function_name_buffer, arguments=function_args_buffer)
 
 
-# FIXME: quick and dirty. Rewrite function to have a single collator.
-async def llama3_collate_response_async(
-        gen: AsyncIterable[Union[str, FunctionFragment]],
-        sentence_endings: List[str] = SENTENCE_ENDINGS,
-        get_functions: Literal[True, False] = False,
-) -> AsyncGenerator[Union[str, FunctionCall], None]:
-    # sentence_endings_pattern = "|".join(map(re.escape, sentence_endings))
-    sentence_endings_pattern = r"(" + "|".join(map(re.escape, sentence_endings)) + ")"
-    list_item_ending_pattern = r"\n"
-    buffer = ""
-    function_name_buffer = ""
-    function_args_buffer = ""
-    prev_ends_with_money = False
-    async for token in gen:
-        if isinstance(token, str):
-            # Split the token by sentence ending patterns, retaining the punctuation
-            parts = re.split(f"({sentence_endings_pattern})", token)
-
-            for part in parts:
-                if not part:
-                    continue
-
-                buffer += part
-                # Check if the part ends with sentence-ending punctuation
-                if re.search(sentence_endings_pattern, part):
-                    if len(buffer.strip()) > 1:
-                        yield buffer.strip()
-                    buffer = ""
-        elif isinstance(token, FunctionFragment):
-            if buffer:
-                yield buffer
-                buffer = ""
-            function_name_buffer += token.name
-            function_args_buffer += token.arguments
-    if buffer:
-        yield buffer
-
-
 async def openai_get_tokens(gen) -> AsyncGenerator[Union[str, FunctionFragment], None]:
     async for event in gen:
         choices = event.get("choices", [])
@@ -151,6 +98,30 @@ def get_sentence_from_buffer(buffer: str):
         return None, None
 
 
+def format_openai_chat_message(event_log: EventLog) -> Optional[Dict[str, Any]]:
+    if isinstance(event_log, Message):
+        return {
+            "role": "assistant" if event_log.sender == Sender.BOT else "user",
+            "content": event_log.text,
+        }
+    elif isinstance(event_log, ActionStart):
+        return {
+            "role": "assistant",
+            "content": None,
+            "function_call": {
+                "name": event_log.action_type,
+                "arguments": event_log.action_input.params.json(),
+            },
+        }
+    elif isinstance(event_log, ActionFinish):
+        return {
+            "role": "function",
+            "name": event_log.action_type,
+            "content": event_log.action_output.response.json(),
+        }
+    return None
+
+
 def format_openai_chat_messages_from_transcript(
         transcript: Transcript, prompt_preamble: Optional[str] = None
 ) -> List[dict]:
@@ -159,55 +130,18 @@ def format_openai_chat_messages_from_transcript(
     )
 
     # merge consecutive bot messages
-    new_event_logs: List[EventLog] = []
-    idx = 0
-    while idx < len(transcript.event_logs):
-        bot_messages_buffer: List[Message] = []
-        current_log = transcript.event_logs[idx]
-        while isinstance(current_log, Message) and current_log.sender == Sender.BOT:
-            bot_messages_buffer.append(current_log)
-            idx += 1
-            try:
-                current_log = transcript.event_logs[idx]
-            except IndexError:
-                break
-        if bot_messages_buffer:
-            merged_bot_message = deepcopy(bot_messages_buffer[-1])
-            merged_bot_message.text = " ".join(
-                event_log.text for event_log in bot_messages_buffer
-            )
-            new_event_logs.append(merged_bot_message)
+    bot_messages_buffer: List[str] = []
+    for event_log in transcript.event_logs:
+        if isinstance(event_log, Message) and event_log.sender == Sender.BOT:
+            bot_messages_buffer.append(event_log.text)
+            if len(bot_messages_buffer) > 1:
+                chat_messages[-1] = {"role": "assistant", "content": " ".join(bot_messages_buffer)}
+                continue
         else:
-            new_event_logs.append(current_log)
-            idx += 1
-
-    for event_log in new_event_logs:
-        if isinstance(event_log, Message):
-            chat_messages.append(
-                {
-                    "role": "assistant" if event_log.sender == Sender.BOT else "user",
-                    "content": event_log.text,
-                }
-            )
-        elif isinstance(event_log, ActionStart):
-            chat_messages.append(
-                {
-                    "role": "assistant",
-                    "content": None,
-                    "function_call": {
-                        "name": event_log.action_type,
-                        "arguments": event_log.action_input.params.json(),
-                    },
-                }
-            )
-        elif isinstance(event_log, ActionFinish):
-            chat_messages.append(
-                {
-                    "role": "function",
-                    "name": event_log.action_type,
-                    "content": event_log.action_output.response.json(),
-                }
-            )
+            bot_messages_buffer = []
+        chat_message = format_openai_chat_message(event_log)
+        if chat_message is not None:
+            chat_messages.append(chat_message)
     return chat_messages
 
 
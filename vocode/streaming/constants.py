@@ -1,3 +1,10 @@
 TEXT_TO_SPEECH_CHUNK_SIZE_SECONDS = 0.4
 PER_CHUNK_ALLOWANCE_SECONDS = 0.01
 ALLOWED_IDLE_TIME = 15
+IDLE_PROMPT = (
+    "THIS IS SYSTEM MESSAGE: Conversation idle for too long. If conversation is in czech "
+    "SAY: Slyšíme se? Jste ještě na lince?"
+    "If conversation is in english SAY: Are you still there?"
+    "If conversation is in slovak SAY: Ste ešte na linke?"
+    "If conversation is in polish SAY: Czy nadal tam jesteś?"
+)
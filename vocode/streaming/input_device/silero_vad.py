@@ -1,8 +1,33 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
 import torch
 import asyncio
 
 
+def load_silero_model(use_onnx: bool = False) -> torch.nn.Module:
+    logger = logging.getLogger(__name__)
+    try:
+        model, _ = torch.hub.load(
+            repo_or_dir='snakers4/silero-vad',
+            model='silero_vad',
+            source='local',
+            onnx=use_onnx
+        )
+    except FileNotFoundError:
+        logger.warning("Could not find local VAD model, downloading from GitHub!")
+        model, _ = torch.hub.load(
+            repo_or_dir='snakers4/silero-vad',
+            model='silero_vad',
+            source='github',
+            onnx=use_onnx
+        )
+    return model
+
+
 class SileroVAD:
     INT16_NORM_CONST = 32768.0
 
@@ -23,22 +48,7 @@ class SileroVAD:
             self.vad_wrapper.model = await loop.run_in_executor(self.executor, self.vad_wrapper.load_model)
 
     def load_model(self, use_onnx: bool = False) -> torch.nn.Module:
-        try:
-            model, _ = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                source='local',
-                onnx=use_onnx
-            )
-        except FileNotFoundError:
-            self.logger.warning("Could not find local VAD model, downloading from GitHub!")
-            model, _ = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                source='github',
-                onnx=use_onnx
-            )
-        return model
+        return load_silero_model(use_onnx)
 
     def process_chunk(self, chunk: bytes) -> bool:
         if len(chunk) != self.window_size:
@@ -51,3 +61,204 @@ class SileroVAD:
 
     def reset_states(self) -> None:
         self.model.reset_states()
+
+
+class SileroVADStream:
+    """
+    Per-conversation handle on the shared BatchedSileroVAD. Holds the recurrent state of this stream,
+    which is swapped into the shared model around every batched forward pass.
+    """
+
+    def __init__(self, engine: "BatchedSileroVAD", threshold: float = 0.5):
+        self.engine = engine
+        self.threshold = threshold
+        self.state: Optional[torch.Tensor] = None
+        self.context: Optional[torch.Tensor] = None
+
+    async def post_init(self):
+        await self.engine.load_model()
+
+    async def process_chunk(self, chunk: bytes) -> bool:
+        speech_prob = await self.engine.get_speech_prob(self, chunk)
+        return speech_prob > self.threshold
+
+    async def process_chunks(self, chunks: List[bytes]) -> List[bool]:
+        speech_probs = await self.engine.get_speech_probs(self, chunks)
+        return [speech_prob > self.threshold for speech_prob in speech_probs]
+
+    def reset_states(self) -> None:
+        self.state = None
+        self.context = None
+
+    def close(self) -> None:
+        self.engine.release(self)
+
+
+class BatchedSileroVAD:
+    """
+    Process-wide Silero VAD: the model is loaded once and the frames pending from all conversations are
+    collected for `tick_seconds` and run through the model as one batched forward pass.
+
+    The Silero model keeps its recurrent state (`_state`, batch on dim 1) and audio context
+    (`_context`, batch on dim 0) on the module, so each stream's state is concatenated in before
+    the pass and split back out afterwards.
+    """
+
+    INT16_NORM_CONST = 32768.0
+
+    _instances: Dict[Tuple[int, int], "BatchedSileroVAD"] = {}
+
+    def __init__(
+        self,
+        sample_rate: int,
+        window_size: int,
+        tick_seconds: float = 0.005,
+        max_batch_size: int = 256,
+    ):
+        # Silero VAD is optimized for performance on single CPU thread
+        torch.set_num_threads(1)
+
+        self.logger = logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.window_size = window_size
+        self.tick_seconds = tick_seconds
+        self.max_batch_size = max_batch_size
+        self.model: Optional[torch.nn.Module] = None
+        self.state_shape: Optional[torch.Size] = None
+        self.context_shape: Optional[torch.Size] = None
+        # all model calls go through this single thread, so they never run concurrently
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="silero-vad")
+        self.streams: Set[SileroVADStream] = set()
+        self.pending: Dict[SileroVADStream, Deque[Tuple[bytes, asyncio.Future]]] = {}
+        self.batch_loop_task: Optional[asyncio.Task] = None
+        self.pending_event: Optional[asyncio.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.frames_processed = 0
+        self.batches_processed = 0
+
+    @classmethod
+    def get_instance(cls, sample_rate: int, window_size: int) -> "BatchedSileroVAD":
+        key = (sample_rate, window_size)
+        if key not in cls._instances:
+            cls._instances[key] = cls(sample_rate=sample_rate, window_size=window_size)
+        return cls._instances[key]
+
+    def create_stream(self, threshold: float = 0.5) -> SileroVADStream:
+        stream = SileroVADStream(self, threshold=threshold)
+        self.streams.add(stream)
+        return stream
+
+    def _load_model(self) -> None:
+        if self.model is not None:
+            return
+        self.logger.info("Loading shared VAD model...")
+        model = load_silero_model()
+        # one pass on silence to learn the shape of the per-stream state
+        model(torch.zeros(1, self.window_size // 2), self.sample_rate)
+        self.state_shape = model._state.shape
+        self.context_shape = model._context.shape
+        model.reset_states()
+        self.model = model
+
+    async def load_model(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._load_model)
+
+    async def get_speech_prob(self, stream: SileroVADStream, chunk: bytes) -> float:
+        speech_probs = await self.get_speech_probs(stream, [chunk])
+        return speech_probs[0]
+
+    async def get_speech_probs(self, stream: SileroVADStream, chunks: List[bytes]) -> List[float]:
+        """Queues consecutive frames of one stream, they go through the model in order."""
+        for chunk in chunks:
+            if len(chunk) != self.window_size:
+                raise ValueError(f"Chunk size must be {self.window_size} bytes")
+        self._ensure_batch_loop()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in chunks]
+        self.pending.setdefault(stream, deque()).extend(
+            (bytes(chunk), future) for chunk, future in zip(chunks, futures)
+        )
+        self.pending_event.set()
+        return list(await asyncio.gather(*futures))
+
+    def release(self, stream: SileroVADStream) -> None:
+        self.streams.discard(stream)
+        for _, future in self.pending.pop(stream, ()):
+            future.cancel()
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "active_streams": len(self.streams),
+            "frames_processed": self.frames_processed,
+            "batches_processed": self.batches_processed,
+            "average_batch_size": self.frames_processed / max(self.batches_processed, 1),
+        }
+
+    def _ensure_batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.batch_loop_task is None or self.batch_loop_task.done():
+            # streams from a previous event loop can't be resolved anymore
+            self.pending.clear()
+            self.loop = loop
+            self.pending_event = asyncio.Event()
+            self.batch_loop_task = loop.create_task(self._run_batch_loop())
+
+    async def _run_batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.pending_event.wait()
+            await asyncio.sleep(self.tick_seconds)
+            self.pending_event.clear()
+            while True:
+                # one frame per stream per pass so each stream's frames stay in order
+                batch: List[Tuple[SileroVADStream, bytes, asyncio.Future]] = []
+                for stream, frames in list(self.pending.items()):
+                    if not frames:
+                        continue
+                    chunk, future = frames.popleft()
+                    if not future.cancelled():
+                        batch.append((stream, chunk, future))
+                    if len(batch) >= self.max_batch_size:
+                        break
+                self.pending = {stream: frames for stream, frames in self.pending.items() if frames}
+                if not batch:
+                    break
+                try:
+                    speech_probs = await loop.run_in_executor(
+                        self.executor, self._forward, [(stream, chunk) for stream, chunk, _ in batch]
+                    )
+                except Exception as e:
+                    self.logger.exception("Batched VAD forward pass failed", exc_info=True)
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), speech_prob in zip(batch, speech_probs):
+                    if not future.done():
+                        future.set_result(speech_prob)
+
+    def _forward(self, batch: List[Tuple[SileroVADStream, bytes]]) -> List[float]:
+        streams = [stream for stream, _ in batch]
+        audio = np.frombuffer(b"".join(chunk for _, chunk in batch), dtype=np.int16)
+        audio = torch.from_numpy(audio.reshape(len(batch), -1).astype(np.float32)) / self.INT16_NORM_CONST
+
+        self.model._state = torch.cat(
+            [stream.state if stream.state is not None else torch.zeros(self.state_shape) for stream in streams],
+            dim=1,
+        )
+        self.model._context = torch.cat(
+            [stream.context if stream.context is not None else torch.zeros(self.context_shape) for stream in streams],
+            dim=0,
+        )
+        self.model._last_sr = self.sample_rate
+        self.model._last_batch_size = len(batch)
+        speech_probs = self.model(audio, self.sample_rate)
+
+        for stream, state, context in zip(
+            streams, self.model._state.split(1, dim=1), self.model._context.split(1, dim=0)
+        ):
+            stream.state = state
+            stream.context = context
+        self.frames_processed += len(batch)
+        self.batches_processed += 1
+        return speech_probs.flatten().tolist()
@@ -1,13 +1,16 @@
 import logging
 import os
+import time
 import wave
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
-import numpy as np
+from typing import List, Optional
 
-from vocode.streaming.input_device.silero_vad import SileroVAD
+from vocode.streaming.input_device.silero_vad import BatchedSileroVAD
+from vocode.streaming.input_device.vad_gate import VADGate
 from vocode.streaming.transcriber import BaseTranscriber
-from vocode.streaming.utils import prepare_audio_for_vad
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_plan import AudioFormat, AudioPipelinePlan, plan_audio_pipeline
 
 
 class AudioStreamHandler:
@@ -15,109 +18,100 @@ class AudioStreamHandler:
     VAD_FRAME_SIZE = 512
     VAD_SPEECH_PAD_MS = 192
     VAD_SPEECH_MIN_DURATION_MS = 64
-
-    def __init__(self, conversation_id: str, transcriber: BaseTranscriber):
+    VAD_AUDIO_FORMAT = AudioFormat(VAD_SAMPLE_RATE, AudioEncoding.LINEAR16)
+
+    def __init__(
+        self,
+        conversation_id: str,
+        transcriber: BaseTranscriber,
+        audio_pipeline_plan: Optional[AudioPipelinePlan] = None,
+    ):
         self.conversation_id = conversation_id
         self.audio_buffer = []  # Buffer for storing audio chunks
         self.logger = logging.getLogger(__name__)  # Set up logging
         self.executor = ThreadPoolExecutor(max_workers=2)
         self.transcriber = transcriber
         self.audio_buffer_denoised = []
-        self.frame_buffer = bytearray()
+        # chunks are gated one after another, their frames must reach the gate in order
+        self.receive_lock = asyncio.Lock()
+        self.audio_pipeline_plan = audio_pipeline_plan or self.create_audio_pipeline_plan(transcriber)
+        # both keep their resampler state between chunks of this call
+        self.vad_audio_converter = None
+        if self.audio_pipeline_plan.vad_conversion is not None:
+            self.vad_audio_converter = self.audio_pipeline_plan.vad_conversion.create_converter()
+        self.transcriber_audio_converter = self.audio_pipeline_plan.transcriber_conversion.create_converter()
+        # when the VAD last heard the user, frames are classified as soon as they arrive
+        self.last_speech_timestamp: Optional[float] = None
         if transcriber.transcriber_config.vad:
             self.logger.info("Using Silero for VAD.")
-            self.vad_wrapper = SileroVAD(
+            # the model is shared by all conversations in the process, only the recurrent state is per call
+            self.vad_wrapper = BatchedSileroVAD.get_instance(
                 sample_rate=self.VAD_SAMPLE_RATE,
                 window_size=self.VAD_FRAME_SIZE,
-            )
+            ).create_stream()
             speech_pad_samples = int(self.VAD_SAMPLE_RATE * self.VAD_SPEECH_PAD_MS / 1000) * 2
             speech_min_samples = int(self.VAD_SAMPLE_RATE * self.VAD_SPEECH_MIN_DURATION_MS / 1000) * 2
-            self.speech_pad_frames = int(speech_pad_samples / self.VAD_FRAME_SIZE)
-            self.speech_min_frames = int(speech_min_samples / self.VAD_FRAME_SIZE)
-            self.padding_frames_left = 0
-            self.offset_samples = speech_pad_samples + speech_min_samples
-            self.frame_buffer_is_speech = np.zeros(self.speech_pad_frames + self.speech_min_frames).astype(np.bool_)
+            self.vad_gate = VADGate(
+                frame_size=self.VAD_FRAME_SIZE,
+                speech_pad_frames=int(speech_pad_samples / self.VAD_FRAME_SIZE),
+                speech_min_frames=int(speech_min_samples / self.VAD_FRAME_SIZE),
+            )
         else:
             self.logger.info("Not using VAD.")
             self.vad_wrapper = None
-        self.vad_triggered = False
+            self.vad_gate = None
+
+    @classmethod
+    def create_audio_pipeline_plan(cls, transcriber: BaseTranscriber) -> AudioPipelinePlan:
+        """Inbound plan for a handler created without one, the outbound side is left as a passthrough."""
+        transcriber_config = transcriber.get_transcriber_config()
+        input_device_config = transcriber_config.input_device_config or transcriber_config
+        input_format = AudioFormat(input_device_config.sampling_rate, input_device_config.audio_encoding)
+        return plan_audio_pipeline(
+            provider_formats=[input_format],
+            output_format=input_format,
+            input_format=input_format,
+            transcriber_formats=transcriber.get_supported_audio_formats(),
+            vad_format=cls.VAD_AUDIO_FORMAT if transcriber_config.vad else None,
+        )
 
     async def post_init(self):
         self.logger.info("Loading VAD model...")
         if self.vad_wrapper is not None:
-            loop = asyncio.get_running_loop()
-            self.vad_wrapper.model = await loop.run_in_executor(
-                self.executor,
-                self.vad_wrapper.load_model
-            )
+            await self.vad_wrapper.post_init()
 
     async def receive_audio(self, chunk: bytes):
         if self.vad_wrapper is None:
-            self.transcriber.send_audio(chunk)
+            self.send_to_transcriber(chunk)
         else:
-            # Run prepare_audio_for_vad in the executor
-            loop = asyncio.get_running_loop()
-            prepared_chunk = await loop.run_in_executor(
-                self.executor,
-                prepare_audio_for_vad,
-                chunk,
-                self.transcriber.transcriber_config.input_device_config.sampling_rate,
-                self.VAD_SAMPLE_RATE,
-                self.transcriber.transcriber_config.input_device_config.audio_encoding.value,
-            )
-            self.frame_buffer.extend(prepared_chunk)
-            await self.process_frame_buffer()
-
-    async def process_frame_buffer(self) -> None:
-        loop = asyncio.get_running_loop()
-        while len(self.frame_buffer) >= self.VAD_FRAME_SIZE + self.offset_samples:  # 2 bytes per 16-bit sample
-            frame_to_process = self.frame_buffer[self.offset_samples:self.offset_samples + self.VAD_FRAME_SIZE]
-            is_speech = await loop.run_in_executor(self.executor, self.vad_wrapper.process_chunk, frame_to_process)
-            if is_speech:
-                if self.speech_min_frames < 2 or self.frame_buffer_is_speech[-(self.speech_min_frames - 1):].all():
-                    # If the speech segment is long enough, trigger VAD and pad preceding frames with ones
-                    self.frame_buffer_is_speech[-(self.speech_pad_frames + self.speech_min_frames):] = True
-                    self.padding_frames_left = self.speech_pad_frames
-                    self.vad_triggered = True
-                else:
-                    self.vad_triggered = False
-                self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [True]])
-            else:
-                if self.vad_triggered and self.padding_frames_left > 0:
-                    # If VAD is triggered, pad the following speech frames with ones
-                    self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [True]])
-                    self.padding_frames_left -= 1
-                else:
-                    self.vad_triggered = False
-                    self.frame_buffer_is_speech = np.concatenate([self.frame_buffer_is_speech, [False]])
-
-            # Remove speech segments shorter than minimal required duration
-            if self.speech_min_frames > 1:
-                frame_buffer_is_speech_filtered = self._remove_short_speech_segments(self.frame_buffer_is_speech)
-            else:
-                frame_buffer_is_speech_filtered = self.frame_buffer_is_speech
-
-            frame_to_send = self.frame_buffer[:self.VAD_FRAME_SIZE]
-            self.audio_buffer.append(frame_to_send)
-            del self.frame_buffer[:self.VAD_FRAME_SIZE]
-
-            if not frame_buffer_is_speech_filtered[0]:
-                frame_to_send = bytearray(len(frame_to_send))
-            self.frame_buffer_is_speech = self.frame_buffer_is_speech[1:]
+            async with self.receive_lock:
+                prepared_chunk = chunk
+                if self.vad_audio_converter is not None:
+                    # Run the conversion in the executor, the lock keeps the chunks in order
+                    loop = asyncio.get_running_loop()
+                    prepared_chunk = await loop.run_in_executor(
+                        self.executor,
+                        self.vad_audio_converter.convert,
+                        chunk,
+                    )
+                await self.process_frames(self.vad_gate.add_audio(prepared_chunk))
+
+    def send_to_transcriber(self, chunk: bytes):
+        if self.transcriber_audio_converter is not None:
+            chunk = self.transcriber_audio_converter.convert(chunk)
+        self.transcriber.send_audio(chunk)
+
+    async def process_frames(self, frames: List[bytes]) -> None:
+        """Classifies all frames completed by a chunk together and sends the frames released by the gate."""
+        if not frames:
+            return
+        is_speech = await self.vad_wrapper.process_chunks(frames)
+        if any(is_speech):
+            self.last_speech_timestamp = time.time()
+        for frame, frame_to_send in self.vad_gate.gate(is_speech):
+            self.audio_buffer.append(frame)
             self.audio_buffer_denoised.append(frame_to_send)
-            self.transcriber.send_audio(frame_to_send)
-
-    def _remove_short_speech_segments(self, frame_buffer: np.array) -> np.array:
-        """Remove detected speech frames shorter than minimal required duration"""
-        result = np.zeros(self.speech_pad_frames + 1).astype(np.bool_)
-        frame_buffer_windows = np.lib.stride_tricks.as_strided(
-            frame_buffer,
-            shape=(frame_buffer.size - (self.speech_min_frames - 1), self.speech_min_frames),
-            strides=(1, 1)
-        )
-        for i in np.where(frame_buffer_windows.all(axis=1))[0]:
-            result[i:i + self.speech_min_frames] = True
-        return result
+            self.send_to_transcriber(frame_to_send)
 
     def __save_audio(self, audio_buffer, output_path):
         with wave.open(output_path, 'wb') as wf:
@@ -153,4 +147,6 @@ class AudioStreamHandler:
                 self.logger.info(f"File {denoised_output_path} already exists, not overwriting.")
 
     def terminate(self):
+        if self.vad_wrapper is not None:
+            self.vad_wrapper.close()
         self.executor.shutdown(wait=False)
@@ -0,0 +1,147 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class VADGate:
+    """
+    Zeroes out non-speech frames of 16-bit linear audio based on per-frame VAD decisions.
+
+    Frames are classified `speech_pad_frames + speech_min_frames` frames ahead of the frame being sent,
+    so that speech detected later can still pad the frames preceding it. A speech frame triggers once it
+    follows at least `speech_min_frames - 1` speech (or padded) frames; a trigger pads the pending frames
+    before it and the next `speech_pad_frames` non-speech frames after it. A frame is sent as-is only if
+    it starts a window of `speech_min_frames` frames that are all marked as speech.
+
+    Audio and per-frame flags live in preallocated buffers that are compacted in place. All frames
+    completed by a chunk are handed out together for classification, and the padding and
+    minimum-duration masks for the frames they release are computed with vectorized operations.
+    """
+
+    def __init__(
+        self,
+        frame_size: int,
+        speech_pad_frames: int,
+        speech_min_frames: int,
+        initial_capacity_frames: int = 64,
+    ):
+        self.frame_size = frame_size
+        self.speech_pad_frames = speech_pad_frames
+        self.speech_min_frames = speech_min_frames
+        self.window_frames = max(speech_min_frames, 1)
+        self.lookahead_frames = speech_pad_frames + speech_min_frames
+
+        capacity = max(initial_capacity_frames, 2 * self.lookahead_frames + 1)
+        self.audio = bytearray(capacity * frame_size)
+        self.audio_start = 0
+        self.audio_end = 0
+        # flags of the frames from the next one to send up to the last classified one,
+        # the first `lookahead_frames` of them are never classified and stay False
+        self.is_speech = np.zeros(capacity, dtype=np.bool_)
+        self.flags_start = 0
+        self.flags_end = self.lookahead_frames
+        self.frames_pending_classification = 0
+
+        # state of the trigger automaton after the last classified frame
+        self.triggered = False
+        self.padding_frames_left = 0
+        self.speech_run = 0
+        # position of the last trigger relative to flags_start, a trigger pads every pending frame before it
+        self.last_trigger = -1
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self.audio_end - self.audio_start
+
+    def add_audio(self, chunk: bytes) -> List[bytes]:
+        """Buffers the chunk and returns the frames it completed, to be classified and passed to gate()."""
+        self._reserve_audio(len(chunk))
+        self.audio[self.audio_end : self.audio_end + len(chunk)] = chunk
+        self.audio_end += len(chunk)
+
+        lookahead_bytes = self.lookahead_frames * self.frame_size
+        complete_frames = max(self.buffered_bytes - lookahead_bytes, 0) // self.frame_size
+        new_frames = complete_frames - self.frames_pending_classification
+        if new_frames == 0:
+            return []
+        first = self.audio_start + lookahead_bytes + self.frames_pending_classification * self.frame_size
+        self.frames_pending_classification = complete_frames
+        return [
+            bytes(self.audio[first + i * self.frame_size : first + (i + 1) * self.frame_size])
+            for i in range(new_frames)
+        ]
+
+    def gate(self, is_speech: Sequence[bool]) -> List[Tuple[bytes, bytes]]:
+        """
+        Takes the VAD decisions for the oldest frames returned by add_audio() and returns one
+        (raw frame, gated frame) pair per frame that can now be sent, in order.
+        """
+        num_frames = len(is_speech)
+        if num_frames == 0:
+            return []
+        self._reserve_flags(num_frames)
+
+        # frame i is sent right after frame i + lookahead_frames is classified,
+        # by then it is padded if any trigger happened after it
+        last_triggers = np.empty(num_frames, dtype=np.int64)
+        for i, speech in enumerate(is_speech):
+            position = self.flags_end - self.flags_start
+            if speech:
+                if self.speech_min_frames < 2 or self.speech_run >= self.speech_min_frames - 1:
+                    self.last_trigger = position
+                    self.padding_frames_left = self.speech_pad_frames
+                    self.triggered = True
+                else:
+                    self.triggered = False
+                flag = True
+            elif self.triggered and self.padding_frames_left > 0:
+                self.padding_frames_left -= 1
+                flag = True
+            else:
+                self.triggered = False
+                flag = False
+            self.is_speech[self.flags_end] = flag
+            self.speech_run = self.speech_run + 1 if flag else 0
+            self.flags_end += 1
+            last_triggers[i] = self.last_trigger
+
+        # frames [i, last trigger) are padded, the rest of the window must be speech on its own
+        not_speech_before = np.concatenate(
+            ([0], np.cumsum(~self.is_speech[self.flags_start : self.flags_end]))
+        )
+        frame_indexes = np.arange(num_frames)
+        window_start = np.clip(last_triggers, frame_indexes, frame_indexes + self.window_frames)
+        should_send = not_speech_before[frame_indexes + self.window_frames] == not_speech_before[window_start]
+
+        output = []
+        for i in range(num_frames):
+            start = self.audio_start + i * self.frame_size
+            frame = bytes(self.audio[start : start + self.frame_size])
+            output.append((frame, frame if should_send[i] else bytes(self.frame_size)))
+
+        self.audio_start += num_frames * self.frame_size
+        self.frames_pending_classification -= num_frames
+        self.flags_start += num_frames
+        self.last_trigger -= num_frames
+        return output
+
+    def _reserve_audio(self, num_bytes: int):
+        if self.audio_end + num_bytes <= len(self.audio):
+            return
+        buffered = self.audio[self.audio_start : self.audio_end]
+        if len(buffered) + num_bytes > len(self.audio) // 2:
+            self.audio = bytearray(2 * (len(buffered) + num_bytes))
+        self.audio[: len(buffered)] = buffered
+        self.audio_start = 0
+        self.audio_end = len(buffered)
+
+    def _reserve_flags(self, num_frames: int):
+        if self.flags_end + num_frames <= len(self.is_speech):
+            return
+        live = self.flags_end - self.flags_start
+        is_speech = self.is_speech[self.flags_start : self.flags_end].copy()
+        if live + num_frames > len(self.is_speech) // 2:
+            self.is_speech = np.zeros(2 * (live + num_frames), dtype=np.bool_)
+        self.is_speech[:live] = is_speech
+        self.flags_start = 0
+        self.flags_end = live
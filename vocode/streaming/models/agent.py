@@ -72,6 +72,8 @@ class AgentConfig(TypedModel, type=AgentType.BASE.value):
     initial_message: Optional[BaseMessage] = None
     generate_responses: bool = True
     allowed_idle_time_seconds: Optional[float] = None
+    # sent to the agent as the user's turn when the conversation is idle, defaults to IDLE_PROMPT
+    idle_prompt: Optional[str] = None
     allow_agent_to_be_cut_off: bool = True
     end_conversation_on_goodbye: bool = False
     send_filler_audio: Union[bool, FillerAudioConfig] = False
@@ -80,12 +82,17 @@ class AgentConfig(TypedModel, type=AgentType.BASE.value):
     actions: Optional[List[ActionConfig]] = None
     use_interrupt_agent: bool = False
     interrupt_agent_prompt: Optional[str] = None
+    # interrupt decisions of the local classifier at least this confident skip the LLM, None always asks the LLM,
+    # pick it with playground/streaming/interrupt_classifier_eval.py on utterances labeled by the LLM, e.g. 0.8
+    interrupt_classifier_confidence_threshold: Optional[float] = None
     interrupt_agent_transcript_prompt_prefix: Optional[
         str] = "" #"<SYSTEM: YOU WERE INTERRUPTED CONFIRM WITH VERY SHORT STATMENT YOU UNDESTOOD WHAT CUSTOMER SAID. DON'T REPEAT YOURSELF SO IF YOU NEED TO CLARIFY REPHRASE THE QUESTION. FOLLOW THIS RULES ONLY > "
 
     initial_audio_path: Optional[str] = None  # path to audio file.
     # Filler picker specials
-    language: Optional[str] = None  # Language of the fillers to be used (determines the folder)
+    language: Optional[str] = None  # Language of the fillers to be used (determines the folder) and of sentence splitting
+    # emits the first clause of a response at a comma or conjunction once it has this many characters, None waits for the sentence
+    first_clause_min_length: Optional[int] = None
     prompt_template: Optional[
         dict] = None  # Prompt template to be used for filler generation (SAY part mostly). Passed as dict.
 
@@ -130,6 +137,9 @@ class ChatGPTAgentConfig(AgentConfig, type=AgentType.CHAT_GPT.value):
     last_messages_cnt: int = CHAT_GPT_AGENT_LAST_USER_MESSAGE_COUNT
 
     max_chars_check: int = 600
+    # extracts the dialog state while the reply is generated, the extraction prompt then ends with the user's
+    # message instead of the first sentences of the reply, disable it to extract from the reply as before
+    speculative_dialog_state_extraction: bool = True
 
     class Config:
         arbitrary_types_allowed = True
@@ -43,6 +43,12 @@ class SynthesizerConfig(TypedModel, type=SynthesizerType.BASE.value):
     audio_encoding: AudioEncoding
     should_encode_as_wav: bool = False
     sentiment_config: Optional[SentimentConfig] = None
+    # Decode streamed MP3 frame by frame instead of re-decoding the whole buffer on every chunk
+    incremental_mp3_decoding: bool = True
+    # Serve repeated messages from a CachingSynthesizer, see SynthesizerFactory
+    cache_audio: bool = False
+    # Sentences synthesized while an earlier one is still being requested, 0 synthesizes one at a time
+    synthesis_lookahead: int = 2
 
     # Filler picker specials
     language: Optional[str] = None  # Language of the fillers to be used (determines the folder)
@@ -105,6 +111,7 @@ class GoogleSynthesizerConfig(SynthesizerConfig, type=SynthesizerType.GOOGLE.val
 
 ELEVEN_LABS_ADAM_VOICE_ID = "pNInz6obpgDQGcFmaJgB"
 ELEVEN_LABS_MULAW_8000 = "ulaw_8000"
+ELEVEN_LABS_MP3_44100 = "mp3_44100_128"
 
 
 class ElevenLabsSynthesizerConfig(
@@ -119,6 +126,8 @@ class ElevenLabsSynthesizerConfig(
     model_id: Optional[str]
     use_speaker_boost: Optional[bool] = True
     output_format: Optional[str] = ELEVEN_LABS_MULAW_8000
+    # memory tier of the converted audio cache, shared by all calls in the process
+    audio_cache_max_memory_bytes: int = 64 * 1024 * 1024
 
     @validator("voice_id")
     def set_name(cls, voice_id):
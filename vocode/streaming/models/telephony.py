@@ -37,6 +37,23 @@ class VonageConfig(BaseModel):
     record: bool = False
 
 
+class AdmissionConfig(BaseModel):
+    """Limits above which a process takes no new calls, None disables a limit."""
+
+    max_event_loop_lag_ms: Optional[float] = 100
+    max_active_calls: Optional[int] = None
+    # CPU time of the event loop thread as a percentage of one core, it can't use more
+    max_cpu_percent: Optional[float] = 90
+    # outbound calls dialed within the window count as about to connect until their websocket connects
+    max_pending_outbound_calls: Optional[int] = 10
+    outbound_dial_window_seconds: float = 60
+    sample_interval_seconds: float = 0.5
+    # lag and CPU are the highest of the samples in this window, so a single good sample doesn't admit calls
+    health_window_seconds: float = 5
+    # inbound calls are forwarded here when the process is saturated, rejected as busy when not set
+    overflow_number: Optional[str] = None
+
+
 class CallEntity(BaseModel):
     phone_number: str
 
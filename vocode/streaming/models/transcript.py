@@ -1,14 +1,14 @@
 import json
 import time
 from copy import copy
-from copy import deepcopy
-from typing import List, Optional, Tuple, Any, Dict
+from typing import List, Optional, Tuple, Any, Dict, Type
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from vocode.streaming.models.actions import ActionInput, ActionOutput
 from vocode.streaming.models.events import ActionEvent, Sender, Event, EventType
 from vocode.streaming.utils.events_manager import EventsManager, RedisEventsManager
+from vocode.streaming.utils.turn_timeline import TurnTimeline
 
 SENDER_TO_OPENAI_ROLE = {Sender.HUMAN: 'user', Sender.BOT: 'assistant'}
 
@@ -71,6 +71,78 @@ class BeliefStateEntry(BaseModel):
     timestamp: float = Field(default_factory=time.time)
 
 
+class TranscriptIndex:
+    """
+    Positions of the event logs by sender and by event type, extended as events are logged, so the
+    transcript helpers don't scan the whole conversation.
+    """
+
+    def __init__(self):
+        self.reset([])
+
+    def reset(self, event_logs: List[EventLog]):
+        self.event_logs = event_logs
+        self.count = 0
+        self.positions_by_sender: Dict[Sender, List[int]] = {}
+        self.positions_by_type: Dict[Type[EventLog], List[int]] = {}
+        self.last_bot_message_position: Optional[int] = None
+        # the bot messages up to the first human message after them, see Transcript.last_assistant
+        self.first_assistant_messages: List[Message] = []
+        self.first_assistant_messages_closed = False
+        self.rendered_lines: List[str] = []
+        self.rendered: Optional[str] = None
+
+    def sync(self, event_logs: List[EventLog]):
+        if event_logs is not self.event_logs or len(event_logs) < self.count:
+            self.reset(event_logs)
+        for position in range(self.count, len(event_logs)):
+            self.add(position, event_logs[position])
+        self.count = len(event_logs)
+
+    def add(self, position: int, event_log: EventLog):
+        self.positions_by_sender.setdefault(event_log.sender, []).append(position)
+        self.positions_by_type.setdefault(type(event_log), []).append(position)
+        if event_log.sender == Sender.BOT:
+            if isinstance(event_log, Message):
+                # the previous bot message may have been filled in since it was rendered
+                self.refresh_last_bot_message()
+                self.last_bot_message_position = position
+            if not self.first_assistant_messages_closed:
+                self.first_assistant_messages.append(event_log)
+        elif event_log.sender == Sender.HUMAN and self.first_assistant_messages:
+            self.first_assistant_messages_closed = True
+        self.rendered_lines.append(event_log.to_string())
+        self.rendered = None
+
+    def get_positions(self, sender: Sender) -> List[int]:
+        return self.positions_by_sender.get(sender, [])
+
+    def get_last_position(self, sender: Sender) -> Optional[int]:
+        positions = self.get_positions(sender)
+        return positions[-1] if positions else None
+
+    def render(self) -> str:
+        self.refresh_last_bot_message()
+        if self.rendered is None:
+            self.rendered = "\n".join(self.rendered_lines)
+        return self.rendered
+
+    def refresh_last_bot_message(self):
+        """The last bot message is logged empty and filled in place while it is spoken."""
+        position = self.last_bot_message_position
+        if position is None:
+            return
+        line = self.event_logs[position].to_string()
+        if line != self.rendered_lines[position]:
+            self.rendered_lines[position] = line
+            self.rendered = None
+
+    def invalidate(self, position: int):
+        """The event at `position` was changed in place."""
+        self.rendered_lines[position] = self.event_logs[position].to_string()
+        self.rendered = None
+
+
 class Transcript(BaseModel):
     event_logs: List[EventLog] = []
     start_time: float = Field(default_factory=time.time)
@@ -82,9 +154,19 @@ class Transcript(BaseModel):
     current_dialog_state: Optional[Any] = None
     current_start_index: int = -1
 
+    _index: TranscriptIndex = PrivateAttr(default_factory=TranscriptIndex)
+
     class Config:
         arbitrary_types_allowed = True
 
+    @property
+    def index(self) -> TranscriptIndex:
+        self._index.sync(self.event_logs)
+        return self._index
+
+    def get_event_logs_by_type(self, event_type: Type[EventLog]) -> List[EventLog]:
+        return [self.event_logs[position] for position in self.index.positions_by_type.get(event_type, [])]
+
     def log_gpt_message(self, message: str, message_type="base"):
         event_class = GPTMessageEvent if message_type == "base" else GPTFollowUpEvent
         if self.redis_events_manager is not None:
@@ -138,11 +220,11 @@ class Transcript(BaseModel):
 
     @property
     def user_messages(self) -> List[Message]:
-        return [message for message in self.event_logs if message.sender == Sender.HUMAN]
+        return [self.event_logs[position] for position in self.index.get_positions(Sender.HUMAN)]
 
     @property
     def assistant_messages(self) -> List[Message]:
-        return [message for message in self.event_logs if message.sender == Sender.BOT]
+        return [self.event_logs[position] for position in self.index.get_positions(Sender.BOT)]
 
     def get_message_history(self):
         return [{"role": SENDER_TO_OPENAI_ROLE[log.sender], "content": log.text}
@@ -151,36 +233,18 @@ class Transcript(BaseModel):
 
     @property
     def last_user_message(self) -> Optional[str]:
-        user_messages = self.user_messages
-        if len(user_messages) == 0:
+        position = self.index.get_last_position(Sender.HUMAN)
+        if position is None:
             return None
-        return user_messages[-1].text
+        return self.event_logs[position].text
 
     @property
     def last_assistant(self) -> Optional[str]:
-        assistant_messages = []
-        temp_messages = []
-
-        # Iterate through each event log entry, reversed
-        for log in reversed(self.event_logs):
-            if log.sender == Sender.BOT:
-                # If the sender is the bot, append message to the temporary list
-                temp_messages.append(log.text)
-            elif log.sender == Sender.HUMAN and temp_messages:
-                # If the sender is human and there are messages in the temporary list,
-                # assign the temporary list to the main list and clear the temporary list
-                assistant_messages = temp_messages.copy()
-                temp_messages = []
-            # If there are no bot messages after a human message, just continue
-
-        # If there were no human messages after the last sequence of bot messages,
-        # assign the temp messages to assistant_messages
-        if temp_messages:
-            assistant_messages = temp_messages
-
+        # The bot messages before the first human message that follows them, joined. Usually the
+        # greeting of the conversation.
+        assistant_messages = self.index.first_assistant_messages
         if assistant_messages:
-            # Join the messages into a single string, maintaining original order
-            return " ".join(reversed(assistant_messages))
+            return " ".join(message.text for message in assistant_messages)
 
         return None
 
@@ -217,6 +281,8 @@ class Transcript(BaseModel):
         self.redis_events_manager = redis_events_manager
 
     def to_string(self, include_timestamps: bool = False) -> str:
+        if not include_timestamps:
+            return self.index.render()
         return "\n".join(
             event.to_string(include_timestamp=include_timestamps)
             for event in self.event_logs
@@ -311,18 +377,19 @@ class Transcript(BaseModel):
         )
 
     def get_last_user_message(self):
-        for idx, message in enumerate(self.event_logs[::-1]):
-            if message.sender == Sender.HUMAN:
-                return -1 * (idx + 1), message.to_string()
+        position = self.index.get_last_position(Sender.HUMAN)
+        if position is not None:
+            return position - len(self.event_logs), self.event_logs[position].to_string()
 
     def get_last_bot_message(self):
-        for idx, message in enumerate(self.event_logs[::-1]):
-            if message.sender == Sender.BOT:
-                return -1 * (idx + 1), message.to_string()
+        position = self.index.get_last_position(Sender.BOT)
+        if position is not None:
+            return position - len(self.event_logs), self.event_logs[position].to_string()
+
     def get_last_bot_text(self):
-        for idx, message in enumerate(self.event_logs[::-1]):
-            if message.sender == Sender.BOT:
-                return message.text
+        position = self.index.get_last_position(Sender.BOT)
+        if position is not None:
+            return self.event_logs[position].text
 
     def add_action_start_log(self, action_input: ActionInput, conversation_id: str):
         timestamp = time.time()
@@ -366,14 +433,14 @@ class Transcript(BaseModel):
 
     def update_last_bot_message_on_cut_off(self, text: str):
         # TODO: figure out what to do for the event
-        for event_log in reversed(self.event_logs):
-            if isinstance(event_log, Message) and event_log.sender == Sender.BOT:
-                event_log.text = text
-                break
+        index = self.index
+        if index.last_bot_message_position is not None:
+            self.event_logs[index.last_bot_message_position].text = text
+            index.invalidate(index.last_bot_message_position)
 
     def render_conversation(self, include_belief_state: bool = False) -> str:
-        conversation_str = ""
-        extended_dialog_states = deepcopy(self.dialog_states_history)  # to avoid adding to the history.
+        conversation_lines: List[str] = []
+        extended_dialog_states = list(self.dialog_states_history)  # to avoid adding to the history.
 
         # Append the current dialog state to the history if it's not None
         if self.current_dialog_state is not None:
@@ -395,18 +462,18 @@ class Transcript(BaseModel):
 
                 # If the current log index is the start for the next belief state, print this belief state
                 if log_index >= current_entry.start_message_index:
-                    conversation_str += f"Now using new belief state:\n{current_entry.belief_state.json(indent=4)}\n"
+                    conversation_lines.append(f"Now using new belief state:\n{current_entry.belief_state.json(indent=4)}\n")
 
                     if current_entry.decision:
-                        conversation_str += f"Decision made based on the belief state:\n{current_entry.decision}\n"
+                        conversation_lines.append(f"Decision made based on the belief state:\n{current_entry.decision}\n")
 
                     # Move to the next entry in the dialog state history
                     current_entry_index += 1
 
             # Now, print the log message
-            conversation_str += f"{log.timestamp} {log.sender}: {log.text}\n"
+            conversation_lines.append(f"{log.timestamp} {log.sender}: {log.text}\n")
 
-        return conversation_str
+        return "".join(conversation_lines)
 
 
 class TranscriptEvent(Event, type=EventType.TRANSCRIPT):
@@ -422,6 +489,7 @@ class TranscriptEvent(Event, type=EventType.TRANSCRIPT):
 
 class TranscriptCompleteEvent(Event, type=EventType.TRANSCRIPT_COMPLETE):
     transcript: Transcript
+    turn_timelines: List[TurnTimeline] = []
 
     def json(self, *args, **kwargs):
         # Use the dict method to serialize the model and exclude specific fields that should not be serialized.
@@ -433,6 +501,7 @@ class TranscriptCompleteEvent(Event, type=EventType.TRANSCRIPT_COMPLETE):
             data_dict["current_dialog_state"] = serialied_current_dialog_state
         else:
             data_dict["current_dialog_state"] = None
+        data_dict["turn_timelines"] = [json.loads(timeline.json()) for timeline in self.turn_timelines]
         # Use Python's json.dumps method for JSON serialization
 
         # TODO consider to serialize in a different way.
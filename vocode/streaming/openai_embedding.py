@@ -1,14 +1,10 @@
 import openai
 
-import vocode
-from vocode.streaming.models.agent import AZURE_OPENAI_DEFAULT_API_TYPE
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
 
+OPENAI_EMBEDDING_API_VERSION = "2023-03-15-preview"
 
-def openai_embed(text: str) -> list:
-    open_ai_dict = {}
-    open_ai_dict["api_type"] = AZURE_OPENAI_DEFAULT_API_TYPE
-    open_ai_dict["api_base"] = vocode.getenv('AZURE_OPENAI_API_BASE')
-    open_ai_dict["api_version"] = "2023-03-15-preview"
-    open_ai_dict["api_key"] = vocode.getenv('AZURE_OPENAI_API_KEY')
 
-    return openai.Embedding.create(engine='text-embedding-ada-002', input=text, **open_ai_dict)['data'][0]['embedding']
+def openai_embed(text: str) -> list:
+    client = OpenAIClientRegistry.get_instance().get_azure_client(api_version=OPENAI_EMBEDDING_API_VERSION)
+    return client.create(openai.Embedding, engine='text-embedding-ada-002', input=text)['data'][0]['embedding']
@@ -4,12 +4,10 @@ import asyncio
 import json
 import logging
 import os
-import queue
-import threading
 import time
 import typing
 from asyncio import Lock
-from typing import Any, Awaitable, Callable, Generic, Optional, Tuple, TypeVar
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
 
 from azure.ai.textanalytics.aio import TextAnalyticsClient
 
@@ -31,6 +29,7 @@ from vocode.streaming.constants import (
     TEXT_TO_SPEECH_CHUNK_SIZE_SECONDS,
     PER_CHUNK_ALLOWANCE_SECONDS,
     ALLOWED_IDLE_TIME,
+    IDLE_PROMPT,
 )
 from vocode.streaming.ignored_while_talking_fillers_fork import OpenAIEmbeddingOverTalkingFillerDetector
 from vocode.streaming.input_device.stream_handler import AudioStreamHandler
@@ -52,20 +51,25 @@ from vocode.streaming.synthesizer.base_synthesizer import (
     SynthesisResult,
     FillerAudio,
 )
+from vocode.streaming.synthesizer.greeting_presynthesis import GreetingPresynthesizer, split_initial_message
 from vocode.streaming.transcriber.base_transcriber import (
     Transcription,
     BaseTranscriber,
 )
 from vocode.streaming.utils import create_conversation_id, get_chunk_size_per_second
+from vocode.streaming.utils.audio_plan import AudioFormat, AudioPipelinePlan, plan_audio_pipeline
 from vocode.streaming.utils.conversation_logger_adapter import wrap_logger
 from vocode.streaming.utils.events_manager import EventsManager, RedisEventsManager, dump_transcript_api
 from vocode.streaming.utils.interruption_worker import InterruptWorker
 from vocode.streaming.utils.state_manager import ConversationStateManager
+from vocode.streaming.utils.timers import Timer, TimerService
+from vocode.streaming.utils.turn_timeline import TurnTimeline, TurnTimelinePoint, TurnTimelineTracker
 from vocode.streaming.utils.worker import (
     AsyncQueueWorker,
     InterruptibleAgentResponseWorker,
     InterruptibleEvent,
     InterruptibleEventFactory,
+    InterruptibleEventRegistry,
     InterruptibleAgentResponseEvent,
 )
 
@@ -83,7 +87,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
             interruptible_event: InterruptibleEvent = (
                 super().create_interruptible_event(payload, is_interruptible)
             )
-            self.conversation.interruptible_events.put_nowait(interruptible_event)
+            self.conversation.interruptible_events.register(interruptible_event)
             return interruptible_event
 
         def create_interruptible_agent_response_event(
@@ -97,7 +101,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
                 is_interruptible=is_interruptible,
                 agent_response_tracker=agent_response_tracker,
             )
-            self.conversation.interruptible_events.put_nowait(interruptible_event)
+            self.conversation.interruptible_events.register(interruptible_event)
             return interruptible_event
 
     class TranscriptionsWorker(AsyncQueueWorker):
@@ -120,6 +124,10 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.let_bot_finish_speaking = let_bot_finish_speaking
 
         async def propagate_transcription(self, transcription: Transcription):
+            user_speech_end = None
+            if self.conversation.audio_stream_handler is not None:
+                user_speech_end = self.conversation.audio_stream_handler.last_speech_timestamp
+            self.conversation.turn_timelines.start_turn(user_speech_end=user_speech_end)
             event = self.interruptible_event_factory.create_interruptible_event(
                 TranscriptionAgentInput(
                     transcription=transcription,
@@ -169,7 +177,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.input_queue = input_queue
             self.conversation = conversation
             self.current_filler_seconds_per_chunk: Optional[int] = None
-            self.filler_audio_started_event: Optional[threading.Event] = None
+            self.filler_audio_started_event: Optional[asyncio.Event] = None
 
         async def wait_for_filler_audio_to_finish(self):
             if (
@@ -201,7 +209,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
                 self.conversation.logger.debug("Sending filler audio to output")
                 self.conversation.logger.info(f"BOT (filler): {filler_audio.message.text}")
                 if filler_synthesis_result.chunk_generator is not None:
-                    self.filler_audio_started_event = threading.Event()
+                    self.filler_audio_started_event = asyncio.Event()
                     await self.conversation.send_speech_to_output(
                         filler_audio.message.text,
                         filler_synthesis_result,
@@ -232,6 +240,8 @@ class StreamingConversation(Generic[OutputDeviceType]):
             super().__init__(
                 input_queue=input_queue,
                 output_queue=output_queue,
+                # the next sentences are requested while the current one is still being fetched
+                max_concurrency=1 + conversation.synthesizer.get_synthesizer_config().synthesis_lookahead,
             )
             self.input_queue = input_queue
             self.output_queue = output_queue
@@ -265,8 +275,11 @@ class StreamingConversation(Generic[OutputDeviceType]):
                 )
                 return
             try:
-                self.conversation.mark_last_action_timestamp()  # received agent response.
                 agent_response = item.payload
+                if not isinstance(agent_response, AgentResponseMessage):
+                    # fillers and stops act on the conversation, they don't run ahead of earlier sentences
+                    await self.wait_for_turn()
+                self.conversation.mark_last_action_timestamp()  # received agent response.
 
                 if isinstance(agent_response, AgentResponseFillerAudio):
                     if hasattr(self.conversation.synthesizer, "pick_filler"):
@@ -311,6 +324,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
                     bot_sentiment=self.conversation.bot_sentiment,
                 )
                 self.conversation.mark_last_action_timestamp()  # once speech started creating.
+                self.conversation.turn_timelines.mark(TurnTimelinePoint.TTS_FIRST_BYTE)
                 end_time = time.time()
                 # self.conversation.logger.info(
                 #     "Getting response from Synth took {} seconds".format(end_time - start_time))
@@ -373,6 +387,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
                     item.interruption_event,
                     TEXT_TO_SPEECH_CHUNK_SIZE_SECONDS,
                     transcript_message=transcript_message,
+                    turn_timeline=self.conversation.turn_timelines.current,
                 )
                 # publish the transcript message now that it includes what was said during send_speech_to_output
                 self.conversation.transcript.maybe_publish_transcript_event_from_message(
@@ -434,6 +449,8 @@ class StreamingConversation(Generic[OutputDeviceType]):
         self.audio_stream_handler = None  # FIXME: try to set it here or in the start method in the beginning.
         self.agent = agent
         self.synthesizer = synthesizer
+        self.audio_pipeline_plan = self.create_audio_pipeline_plan()
+        self.synthesizer.set_provider_audio_format(self.audio_pipeline_plan.provider_format)
         self.synthesis_enabled = True
         self.text_analysis_client = text_analysis_client
 
@@ -442,7 +459,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
         self.over_talking_filler_detector = over_talking_filler_detector
         self.openai_embeddings_response_classifier = openai_embeddings_response_classifier
 
-        self.interruptible_events: queue.Queue[InterruptibleEvent] = queue.Queue()
+        self.interruptible_events = InterruptibleEventRegistry(logger=self.logger)
         self.interruptible_event_factory = self.QueueingInterruptibleEventFactory(
             conversation=self
         )
@@ -509,6 +526,8 @@ class StreamingConversation(Generic[OutputDeviceType]):
         self.transcript = Transcript()
         self.transcript.attach_events_manager(self.events_manager)
         self.transcript.attach_redis_events_manager(self.redis_event_manger)
+        self.turn_timelines = TurnTimelineTracker(conversation_id=self.id, logger=self.logger)
+        self.agent.attach_turn_timeline_tracker(self.turn_timelines)
         self.bot_sentiment = None
         if self.agent.get_agent_config().track_bot_sentiment:
             self.sentiment_config = (
@@ -528,14 +547,17 @@ class StreamingConversation(Generic[OutputDeviceType]):
         self.active = False
         self.terminate_called = False
 
+        self.idle_timer: Optional[Timer] = None
         self.last_action_timestamp = 0.0
         self.mark_last_action_timestamp()
 
         self.last_filler_timestamp = 0.0
         self.mark_last_filler_timestamp()
 
-        self.check_for_idle_task: Optional[asyncio.Task] = None
-        self.track_bot_sentiment_task: Optional[asyncio.Task] = None
+        # process-wide timers instead of a polling task per conversation
+        self.timers = TimerService.get_instance()
+        self.track_bot_sentiment_timer: Optional[Timer] = None
+        self.last_sentiment_transcript: Optional[str] = None
 
         self.current_transcription_is_interrupt: bool = False
 
@@ -561,6 +583,31 @@ class StreamingConversation(Generic[OutputDeviceType]):
     def create_state_manager(self) -> ConversationStateManager:
         return ConversationStateManager(conversation=self)
 
+    def create_audio_pipeline_plan(self) -> AudioPipelinePlan:
+        output_format = AudioFormat(self.output_device.sampling_rate, self.output_device.audio_encoding)
+        synthesizer_config = self.synthesizer.get_synthesizer_config()
+        if AudioFormat(synthesizer_config.sampling_rate, synthesizer_config.audio_encoding) != output_format:
+            self.logger.warning(
+                f"Synthesizer produces {synthesizer_config.audio_encoding.value}@{synthesizer_config.sampling_rate}Hz"
+                f" but the output device plays {output_format}"
+            )
+        provider_formats = self.synthesizer.get_provider_audio_formats()
+        if self.agent.get_agent_config().initial_audio_path:
+            # the prerecorded initial audio is stored in the configured provider format
+            provider_formats = provider_formats[:1]
+
+        transcriber_config = self.transcriber.get_transcriber_config()
+        input_device_config = transcriber_config.input_device_config or transcriber_config
+        plan = plan_audio_pipeline(
+            provider_formats=provider_formats,
+            output_format=output_format,
+            input_format=AudioFormat(input_device_config.sampling_rate, input_device_config.audio_encoding),
+            transcriber_formats=self.transcriber.get_supported_audio_formats(),
+            vad_format=AudioStreamHandler.VAD_AUDIO_FORMAT if transcriber_config.vad else None,
+        )
+        self.logger.info(f"Audio pipeline plan: {plan.describe()}")
+        return plan
+
     def reconstruct_synthesis_result(self, filepath, message, chunk_size):
         # You would probably need to convert this raw data back to a file-like object or the expected 'Any' type
         return self.synthesizer.create_synthesis_result_from_wav(filepath, message, chunk_size)
@@ -574,8 +621,10 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.synthesizer.synthesizer_config.output_format_to_cache_file_extension()), "File extension must be correct."
         assert isinstance(self.synthesizer, ElevenLabsSynthesizer), "Only ElevenLabsSynthesizer is supported."
         self.synthesizer: ElevenLabsSynthesizer
-        with open(initial_audio_path, 'rb') as f:
-            audio_data = f.read()
+        audio_data = await GreetingPresynthesizer.get_instance().get_initial_audio(self.id)
+        if audio_data is None:
+            with open(initial_audio_path, 'rb') as f:
+                audio_data = f.read()
 
         synth_result = self.synthesizer.create_synthesis_result_from_bytes(audio_data, initial_message,
                                                                            self.agent_responses_worker.chunk_size)
@@ -632,11 +681,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
             asyncio.create_task(self.handle_initial_audio(initial_audio_path=initial_audio_path,
                                                           initial_message=initial_message))
         elif initial_message:
-            # FIXME: use collator like in the agent.
-            initial_message_generator = [x for x in initial_message.text.split(".") if x.strip() != ""]
-            for message in initial_message_generator:
-                message = BaseMessage(text=f'{message}.')
-                asyncio.create_task(self.send_initial_message(message))
+            asyncio.create_task(self.send_initial_messages(split_initial_message(initial_message)))
         elif isinstance(self.agent, ChatGPTAgentOld):
             self.logger.info("Creating first response")
             first_response_generator = self.agent.create_first_response()
@@ -644,7 +689,11 @@ class StreamingConversation(Generic[OutputDeviceType]):
             async for response in first_response_generator:
                 self.logger.info(response)
                 asyncio.create_task(self.send_initial_message(BaseMessage(text=response[0])))  # returns tuple.
-        self.audio_stream_handler = AudioStreamHandler(conversation_id=self.id, transcriber=self.transcriber)
+        self.audio_stream_handler = AudioStreamHandler(
+            conversation_id=self.id,
+            transcriber=self.transcriber,
+            audio_pipeline_plan=self.audio_pipeline_plan,
+        )
         await self.audio_stream_handler.post_init()
         if mark_ready:
             await mark_ready()
@@ -652,11 +701,9 @@ class StreamingConversation(Generic[OutputDeviceType]):
             await self.update_bot_sentiment()
         self.active = True
         if self.synthesizer.get_synthesizer_config().sentiment_config:
-            self.track_bot_sentiment_task = asyncio.create_task(
-                self.track_bot_sentiment()
-            )
+            self.track_bot_sentiment_timer = self.timers.call_every(1, self.track_bot_sentiment)
 
-        self.check_for_idle_task = asyncio.create_task(self.check_for_idle())
+        self.idle_timer = self.timers.call_later(self.get_allowed_idle_time(), self.handle_idle)
         if len(self.events_manager.subscriptions) > 0:
             self.events_task = asyncio.create_task(self.events_manager.start())
 
@@ -664,51 +711,69 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.redis_task = asyncio.create_task(self.redis_event_manger.start())
         self.logger.info("Conversation started")
 
-    async def send_initial_message(self, initial_message: BaseMessage):
+    async def send_initial_messages(self, initial_messages: List[BaseMessage]):
+        # greetings synthesized while the telephony webhook was answered are played right away
+        greeting_presynthesizer = GreetingPresynthesizer.get_instance()
+        synthesis_results = await asyncio.gather(
+            *(greeting_presynthesizer.get_synthesis_result(self.id, message, self.synthesizer)
+              for message in initial_messages)
+        )
+        # synthesized messages would overtake presynthesized ones, so only the leading ones are used
+        if None in synthesis_results:
+            first_missing = synthesis_results.index(None)
+            synthesis_results[first_missing:] = [None] * (len(synthesis_results) - first_missing)
+        await asyncio.gather(
+            *(self.send_initial_message(message, synthesis_result)
+              for message, synthesis_result in zip(initial_messages, synthesis_results))
+        )
+
+    async def send_initial_message(
+            self, initial_message: BaseMessage, synthesis_result: Optional[SynthesisResult] = None
+    ):
         # TODO: configure if initial message is interruptible
         self.transcriber.mute()
         initial_message_tracker = asyncio.Event()
-        agent_response_event = (
-            self.interruptible_event_factory.create_interruptible_agent_response_event(
-                AgentResponseMessage(message=initial_message),
+        if synthesis_result is not None:
+            self.agent_responses_worker.produce_interruptible_agent_response_event_nonblocking(
+                (initial_message, synthesis_result),
                 is_interruptible=False,
                 agent_response_tracker=initial_message_tracker,
             )
-        )
-        self.agent_responses_worker.consume_nonblocking(agent_response_event)
+        else:
+            agent_response_event = (
+                self.interruptible_event_factory.create_interruptible_agent_response_event(
+                    AgentResponseMessage(message=initial_message),
+                    is_interruptible=False,
+                    agent_response_tracker=initial_message_tracker,
+                )
+            )
+            self.agent_responses_worker.consume_nonblocking(agent_response_event)
         await initial_message_tracker.wait()
         self.transcriber.unmute()
 
-    async def check_for_idle(self):
+    def get_allowed_idle_time(self) -> float:
+        return self.agent.get_agent_config().allowed_idle_time_seconds or ALLOWED_IDLE_TIME
+
+    def handle_idle(self):
         """Asks if user still here."""
-        while self.is_active():
-            self.logger.info("Checking for idle")
-            if time.time() - self.last_action_timestamp > (
-                    self.agent.get_agent_config().allowed_idle_time_seconds
-                    or ALLOWED_IDLE_TIME
-            ):
-                self.logger.info("Conversation idle for too long")
-                # TODO: parametrize this message.
-                transcription = Transcription(
-                    message="THIS IS SYSTEM MESSAGE: Conversation idle for too long. If conversation is in czech " + \
-                            "SAY: Slyšíme se? Jste ještě na lince?" + \
-                            "If conversation is in english SAY: Are you still there?" + \
-                            "If conversation is in slovak SAY: Ste ešte na linke?" + \
-                            "If conversation is in polish SAY: Czy nadal tam jesteś?",
-                    confidence=1.0,
-                    is_final=True,
-                    is_interrupt=True)
-                self.transcriptions_worker.consume_nonblocking(transcription)
-            await asyncio.sleep(2)  # checks every 2 seconds
+        if not self.is_active():
+            return
+        self.logger.info("Conversation idle for too long")
+        transcription = Transcription(
+            message=self.agent.get_agent_config().idle_prompt or IDLE_PROMPT,
+            confidence=1.0,
+            is_final=True,
+            is_interrupt=True)
+        self.transcriptions_worker.consume_nonblocking(transcription)
+        # asks again if the user stays silent for another idle period
+        self.idle_timer = self.timers.call_later(self.get_allowed_idle_time(), self.handle_idle)
 
     async def track_bot_sentiment(self):
-        """Updates self.bot_sentiment every second based on the current transcript"""
-        prev_transcript = None
-        while self.is_active():
-            await asyncio.sleep(1)
-            if self.transcript.to_string() != prev_transcript:
-                await self.update_bot_sentiment()
-                prev_transcript = self.transcript.to_string()
+        """Updates self.bot_sentiment based on the current transcript, run every second"""
+        transcript = self.transcript.to_string()
+        if transcript != self.last_sentiment_transcript:
+            await self.update_bot_sentiment()
+            self.last_sentiment_transcript = transcript
 
     async def update_bot_sentiment(self):
         new_bot_sentiment = await self.bot_sentiment_analyser.analyse(
@@ -735,6 +800,8 @@ class StreamingConversation(Generic[OutputDeviceType]):
 
     def mark_last_action_timestamp(self):
         self.last_action_timestamp = time.time()
+        if self.idle_timer is not None:
+            self.idle_timer.reschedule(self.get_allowed_idle_time())
 
     def mark_last_filler_timestamp(self):
         """ Used to prevent noisy calls interrupting after fillers, but passing after other actions like Are You There. """
@@ -745,16 +812,7 @@ class StreamingConversation(Generic[OutputDeviceType]):
 
         Returns true if any events were interrupted - which is used as a flag for the agent (is_interrupt)
         """
-        num_interrupts = 0
-        while True:
-            try:
-                interruptible_event = self.interruptible_events.get_nowait()
-                if not interruptible_event.is_interrupted():
-                    if interruptible_event.interrupt():
-                        self.logger.debug("Interrupting event")
-                        num_interrupts += 1
-            except queue.Empty:
-                break
+        num_interrupts = self.interruptible_events.interrupt_all()
         self.agent.cancel_current_task()
         self.agent_responses_worker.cancel_current_task()
 
@@ -793,16 +851,18 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self,
             message: str,
             synthesis_result: SynthesisResult,
-            stop_event: threading.Event,
+            stop_event: asyncio.Event,
             seconds_per_chunk: int,
             transcript_message: Optional[Message] = None,
-            started_event: Optional[threading.Event] = None,
+            started_event: Optional[asyncio.Event] = None,
+            turn_timeline: Optional[TurnTimeline] = None,
     ):
         """
         - Sends the speech chunk by chunk to the output device
           - update the transcript message as chunks come in (transcript_message is always provided for non filler audio utterances)
         - If the stop_event is set, the output is stopped
         - Sets started_event when the first chunk is sent
+        - Marks when the first chunk is sent and when the playback ends on turn_timeline
 
         Importantly, we rate limit the chunks sent to the output. For interrupts to work properly,
         the next chunk of audio can only be sent after the last chunk is played, so we send
@@ -846,6 +906,8 @@ class StreamingConversation(Generic[OutputDeviceType]):
                 if started_event:
                     started_event.set()
             self.output_device.consume_nonblocking(chunk_result.chunk)
+            if chunk_idx == 0 and turn_timeline:
+                turn_timeline.mark(TurnTimelinePoint.FIRST_AUDIO_SENT)
             end_time = time.time()
             await asyncio.sleep(
                 max(
@@ -867,6 +929,10 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.transcriber.unmute()
         if transcript_message:
             transcript_message.text = message_sent
+        if turn_timeline:
+            turn_timeline.mark(
+                TurnTimelinePoint.PLAYBACK_INTERRUPTED if cut_off else TurnTimelinePoint.PLAYBACK_FINISHED
+            )
         return message_sent, cut_off
 
     def mark_terminated(self):
@@ -893,15 +959,16 @@ class StreamingConversation(Generic[OutputDeviceType]):
         self.broadcast_interrupt()
         api_key = os.getenv("TRANSCRIPT_API_KEY", None)
         api_url = os.getenv("TRANSCRIPT_API_URL", None)
-        complete_transcript = TranscriptCompleteEvent(conversation_id=self.id, transcript=self.transcript)
+        self.turn_timelines.finish_turn()
+        complete_transcript = TranscriptCompleteEvent(
+            conversation_id=self.id, transcript=self.transcript, turn_timelines=self.turn_timelines.completed
+        )
         if api_key and api_url:
             self.logger.info("Sending transcript to API")
             transcript_url = f'{api_url}/{self.id}/'
             await dump_transcript_api(transcript=complete_transcript.json(), key=api_key, url=transcript_url)
         self.save_transcript(complete_transcript.json())
-        self.events_manager.publish_event(
-            TranscriptCompleteEvent(conversation_id=self.id, transcript=self.transcript)
-        )
+        self.events_manager.publish_event(complete_transcript)
         self.logger.info("Saving audio")
         self.audio_stream_handler.save_debug_audios()
         self.logger.info("audio saved")
@@ -909,12 +976,12 @@ class StreamingConversation(Generic[OutputDeviceType]):
             self.audio_stream_handler.vad_wrapper.reset_states()
             self.logger.info("Reset VAD model states")
 
-        if self.check_for_idle_task:
-            self.logger.debug("Terminating check_for_idle Task")
-            self.check_for_idle_task.cancel()
-        if self.track_bot_sentiment_task:
-            self.logger.debug("Terminating track_bot_sentiment Task")
-            self.track_bot_sentiment_task.cancel()
+        if self.idle_timer:
+            self.logger.debug("Cancelling idle timer")
+            self.idle_timer.cancel()
+        if self.track_bot_sentiment_timer:
+            self.logger.debug("Cancelling track_bot_sentiment timer")
+            self.track_bot_sentiment_timer.cancel()
 
         if self.post_call_callback:
             asyncio.create_task(self.post_call_callback(self))
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from opentelemetry import metrics
+
+meter = metrics.get_meter(__name__)
+
+cache_hits_counter = meter.create_counter(
+    name="synthesizer.audio_cache.hits",
+    unit="1",
+)
+cache_misses_counter = meter.create_counter(
+    name="synthesizer.audio_cache.misses",
+    unit="1",
+)
+cache_evictions_counter = meter.create_counter(
+    name="synthesizer.audio_cache.evictions",
+    unit="1",
+)
+
+DEFAULT_MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def create_audio_cache_key(*parts: object) -> str:
+    """Stable key for everything that determines the produced audio (text, voice, model, output format...)."""
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class MemoryAudioCache:
+    """LRU of ready-to-play audio, evicting the least recently used entries beyond `max_bytes`."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.size_bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.entries.get(key)
+        if audio is not None:
+            self.entries.move_to_end(key)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+        self.entries[key] = audio
+        self.size_bytes += len(audio)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+            self.evictions += 1
+            cache_evictions_counter.add(1)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DiskAudioCache:
+    """Audio files under `directory`, read and written off the event loop."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.audio")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.get_path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, audio: bytes):
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first so readers never see a partial file
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(audio)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+
+    async def contains(self, key: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, os.path.exists, self.get_path(key))
+
+    async def put(self, key: str, audio: bytes):
+        await asyncio.get_running_loop().run_in_executor(None, self._write, key, audio)
+
+
+class TieredAudioCache:
+    """
+    Process-wide cache of synthesized audio already converted to the output rate and encoding:
+    a memory LRU in front of a disk tier. Memory hits cost no I/O and no decoding, disk hits are
+    read in the executor and promoted to memory.
+    """
+
+    _instances: Dict[Tuple[str, int], "TieredAudioCache"] = {}
+
+    def __init__(self, directory: str, max_memory_bytes: int = DEFAULT_MEMORY_CACHE_MAX_BYTES):
+        self.logger = logging.getLogger(__name__)
+        self.memory = MemoryAudioCache(max_memory_bytes)
+        self.disk = DiskAudioCache(directory)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(
+        cls, directory: str, max_memory_bytes: int = DEFAULT_MEMORY_CACHE_MAX_BYTES
+    ) -> "TieredAudioCache":
+        key = (directory, max_memory_bytes)
+        if key not in cls._instances:
+            cls._instances[key] = cls(directory, max_memory_bytes)
+        return cls._instances[key]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory_hits += 1
+            cache_hits_counter.add(1, {"tier": "memory"})
+            return audio
+        audio = await self.disk.get(key)
+        if audio is not None:
+            self.disk_hits += 1
+            cache_hits_counter.add(1, {"tier": "disk"})
+            self.memory.put(key, audio)
+            return audio
+        self.misses += 1
+        cache_misses_counter.add(1)
+        return None
+
+    async def contains(self, key: str) -> bool:
+        """Checks for an entry without reading it, lookups aren't counted in the stats."""
+        return key in self.memory.entries or await self.disk.contains(key)
+
+    async def put(self, key: str, audio: bytes):
+        self.memory.put(key, audio)
+        try:
+            await self.disk.put(key, audio)
+        except OSError as e:
+            # the memory tier still serves it
+            self.logger.warning(f"Could not write audio to the disk cache: {e}")
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / max(lookups, 1),
+            "evictions": self.memory.evictions,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size_bytes,
+        }
@@ -133,13 +133,7 @@ class AzureSynthesizer(BaseSynthesizer[AzureSynthesizerConfig]):
             if os.path.exists(filler_audio_path):
                 audio_data = open(filler_audio_path, "rb").read()
             else:
-                self.logger.debug(f"Generating filler audio for {filler_phrase.text}")
-                ssml = self.create_ssml(filler_phrase.text)
-                result = await asyncio.get_event_loop().run_in_executor(
-                    self.thread_pool_executor, self.synthesizer.speak_ssml, ssml
-                )
-                offset = self.synthesizer_config.sampling_rate * self.OFFSET_MS // 1000
-                audio_data = result.audio_data[offset:]
+                audio_data = await self.synthesize_filler_phrase(filler_phrase)
                 with open(filler_audio_path, "wb") as f:
                     f.write(audio_data)
             filler_phrase_audios.append(
@@ -151,6 +145,18 @@ class AzureSynthesizer(BaseSynthesizer[AzureSynthesizerConfig]):
             )
         return filler_phrase_audios
 
+    def get_filler_phrases(self) -> List[BaseMessage]:
+        return FILLER_PHRASES
+
+    async def synthesize_filler_phrase(self, phrase: BaseMessage) -> bytes:
+        self.logger.debug(f"Generating filler audio for {phrase.text}")
+        ssml = self.create_ssml(phrase.text)
+        result = await asyncio.get_event_loop().run_in_executor(
+            self.thread_pool_executor, self.synthesizer.speak_ssml, ssml
+        )
+        offset = self.synthesizer_config.sampling_rate * self.OFFSET_MS // 1000
+        return result.audio_data[offset:]
+
     def add_marks(self, message: str, index=0) -> str:
         search_result = re.search(r"([\.\,\:\;\-\—]+)", message)
         if search_result is None:
@@ -166,6 +172,10 @@ class AzureSynthesizer(BaseSynthesizer[AzureSynthesizerConfig]):
     def word_boundary_cb(self, evt, pool):
         pool.add(evt)
 
+    def uses_bot_sentiment(self) -> bool:
+        # the emotion is rendered as an mstts:express-as style
+        return True
+
     def create_ssml(
         self, message: str, bot_sentiment: Optional[BotSentiment] = None
     ) -> str:
@@ -8,7 +8,6 @@ from typing import (
     Generic,
     List,
     Optional,
-    Tuple,
     TypeVar,
     Union,
 )
@@ -24,8 +23,10 @@ from opentelemetry.trace import Span
 from vocode.streaming.agent.bot_sentiment_analyser import BotSentiment
 from vocode.streaming.models.agent import FillerAudioConfig
 from vocode.streaming.models.message import BaseMessage
-from vocode.streaming.synthesizer.miniaudio_worker import MiniaudioWorker
+from vocode.streaming.synthesizer.miniaudio_worker import MiniaudioOutput, MiniaudioWorker
 from vocode.streaming.utils import convert_wav, get_chunk_size_per_second
+from vocode.streaming.utils.audio_plan import AudioFormat
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
 from vocode.streaming.models.audio_encoding import AudioEncoding
 from vocode.streaming.models.synthesizer import SynthesizerConfig
 
@@ -133,13 +134,24 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
                 synthesizer_config.sampling_rate == 8000
             ), "MuLaw encoding only supports 8kHz sampling rate"
         self.filler_audios: List[FillerAudio] = []
-        if aiohttp_session:
-            # the caller is responsible for closing the session
-            self.aiohttp_session = aiohttp_session
-            self.should_close_session_on_tear_down = False
-        else:
-            self.aiohttp_session = aiohttp.ClientSession()
-            self.should_close_session_on_tear_down = True
+        # the caller is responsible for closing the session it passes
+        self.maybe_aiohttp_session = aiohttp_session
+        self.should_close_session_on_tear_down = False
+
+    @property
+    def aiohttp_session(self) -> aiohttp.ClientSession:
+        """The session passed in, or the one shared with the other synthesizers of the loop, see HTTPSessionPool."""
+        if self.maybe_aiohttp_session is not None:
+            return self.maybe_aiohttp_session
+        return HTTPSessionPool.get_instance().get_session(self.get_api_base_url())
+
+    @aiohttp_session.setter
+    def aiohttp_session(self, aiohttp_session: aiohttp.ClientSession):
+        self.maybe_aiohttp_session = aiohttp_session
+
+    def get_api_base_url(self) -> Optional[str]:
+        """URL of the provider API, synthesizers calling the same host share pooled connections."""
+        return None
 
     async def empty_generator(self):
         yield SynthesisResult.ChunkResult(b"", True)
@@ -147,6 +159,14 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
     def get_synthesizer_config(self) -> SynthesizerConfig:
         return self.synthesizer_config
 
+    def get_provider_audio_formats(self) -> List[AudioFormat]:
+        """Formats the synthesizer can get audio from its provider in, the configured one first."""
+        return [AudioFormat(self.synthesizer_config.sampling_rate, self.synthesizer_config.audio_encoding)]
+
+    def set_provider_audio_format(self, audio_format: AudioFormat):
+        if audio_format not in self.get_provider_audio_formats():
+            raise ValueError(f"{type(self).__name__} can't produce {audio_format}")
+
     def get_typing_noise_filler_audio(self) -> FillerAudio:
         return FillerAudio(
             message=BaseMessage(text="<typing noise>"),
@@ -169,9 +189,33 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
     async def get_phrase_filler_audios(self) -> List[FillerAudio]:
         return []
 
+    def get_filler_phrases(self) -> List[BaseMessage]:
+        """Phrases the synthesizer plays as fillers, see synthesize_filler_phrase."""
+        return []
+
+    async def synthesize_filler_phrase(self, phrase: BaseMessage) -> bytes:
+        """The audio of a filler phrase, which caching wrappers store in their audio cache."""
+        raise NotImplementedError
+
     def ready_synthesizer(self):
         pass
 
+    async def is_message_cached(self, message: BaseMessage) -> bool:
+        return False
+
+    def can_presynthesize(self) -> bool:
+        """Whether the synthesizer has an audio cache that presynthesize can fill."""
+        return False
+
+    def uses_bot_sentiment(self) -> bool:
+        """Whether the bot sentiment passed to create_speech changes the audio."""
+        return False
+
+    async def presynthesize(self, message: BaseMessage):
+        """Synthesizes the message into the synthesizer's cache so calls can play it without a request."""
+        # nothing to fill without an audio cache, see can_presynthesize
+        return
+
     # given the number of seconds the message was allowed to go until, where did we get in the message?
     def get_message_cutoff_from_total_response_length(
         self, message: BaseMessage, seconds: int, size_of_output: int
@@ -220,6 +264,9 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
         else:
             chunk_transform = lambda chunk: chunk
 
+        # the conversation passes a float chunk size (seconds per chunk * bytes per second)
+        chunk_size = int(chunk_size)
+
         async def chunk_generator(output_bytes):
             for i in range(0, len(output_bytes), chunk_size):
                 if i + chunk_size > len(output_bytes):
@@ -248,7 +295,7 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
             Union[bytes, None]
         ] = asyncio.Queue()
         miniaudio_worker_output_queue: asyncio.Queue[
-            Tuple[bytes, bool]
+            MiniaudioOutput
         ] = asyncio.Queue()
         miniaudio_worker = MiniaudioWorker(
             self.synthesizer_config,
@@ -272,7 +319,7 @@ class BaseSynthesizer(Generic[SynthesizerConfigType]):
             while True:
                 # Get the wav chunk and the flag from the output queue of the MiniaudioWorker
 
-                wav_chunk, is_last = await miniaudio_worker.output_queue.get()
+                wav_chunk, is_last, _ = await miniaudio_worker.output_queue.get()
                 if self.synthesizer_config.should_encode_as_wav:
                     wav_chunk = encode_as_wav(wav_chunk, self.synthesizer_config)
 
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+from typing import Any, List, Optional, Tuple
+
+from vocode.streaming.agent.bot_sentiment_analyser import BotSentiment
+from vocode.streaming.models.agent import FillerAudioConfig
+from vocode.streaming.models.message import BaseMessage, SSMLMessage
+from vocode.streaming.models.synthesizer import SynthesizerConfig
+from vocode.streaming.synthesizer.audio_cache import TieredAudioCache, create_audio_cache_key
+from vocode.streaming.synthesizer.base_synthesizer import (
+    FILLER_AUDIO_PATH,
+    BaseSynthesizer,
+    FillerAudio,
+    SynthesisResult,
+)
+from vocode.streaming.utils import get_chunk_size_per_second
+from vocode.streaming.utils.audio_plan import AudioFormat
+
+# config fields that don't change the produced audio
+FINGERPRINT_EXCLUDED_FIELDS = {
+    "api_key",
+    "user_id",
+    "sentiment_config",
+    "prompt_template",
+    "cache_audio",
+    "synthesis_lookahead",
+}
+
+
+def get_synthesizer_fingerprint(synthesizer: BaseSynthesizer) -> str:
+    config = synthesizer.get_synthesizer_config()
+    config_fields = json.loads(config.json(exclude=FINGERPRINT_EXCLUDED_FIELDS))
+    return create_audio_cache_key(type(synthesizer).__name__, json.dumps(config_fields, sort_keys=True))
+
+
+class CachingSynthesizer(BaseSynthesizer):
+    """
+    Serves repeated messages of any synthesizer from a TieredAudioCache.
+
+    On a miss the wrapped synthesizer's chunks are passed through as they are produced and the
+    complete utterance is cached along with where the message was cut off every
+    `CUTOFF_RESOLUTION_SECONDS`, so cached results answer get_message_up_to like the original.
+    The audio of the wrapped synthesizer's filler phrases is kept in the same cache. Everything else
+    is delegated to the wrapped synthesizer, including the BaseSynthesizer methods it overrides.
+    """
+
+    CUTOFF_RESOLUTION_SECONDS = 0.1
+
+    def __init__(
+        self,
+        synthesizer: BaseSynthesizer,
+        audio_cache: Optional[TieredAudioCache] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        # the session and config belong to the wrapped synthesizer, BaseSynthesizer.__init__ is not called
+        self.synthesizer = synthesizer
+        self.synthesizer_config = synthesizer.get_synthesizer_config()
+        self.logger = logger or logging.getLogger(__name__)
+        self.audio_cache = audio_cache or TieredAudioCache.get_instance(
+            os.path.join(
+                os.getenv("FILLER_AUDIO_PATH") or FILLER_AUDIO_PATH,
+                "cache",
+                type(synthesizer).__name__,
+            )
+        )
+        self.fingerprint = get_synthesizer_fingerprint(synthesizer)
+        self.bytes_per_second = get_chunk_size_per_second(
+            self.synthesizer_config.audio_encoding, self.synthesizer_config.sampling_rate
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes missing on the wrapper, the methods of BaseSynthesizer are delegated below
+        return getattr(self.synthesizer, name)
+
+    @property
+    def filler_audios(self) -> List[FillerAudio]:
+        return self.synthesizer.filler_audios
+
+    @filler_audios.setter
+    def filler_audios(self, filler_audios: List[FillerAudio]):
+        self.synthesizer.filler_audios = filler_audios
+
+    def get_cache_key(self, message: BaseMessage, bot_sentiment: Optional[BotSentiment]) -> str:
+        text = message.ssml if isinstance(message, SSMLMessage) else message.text
+        if not self.synthesizer.uses_bot_sentiment():
+            # the same audio whatever the sentiment, e.g. presynthesized without one and played with one
+            bot_sentiment = None
+        return create_audio_cache_key(
+            text,
+            bot_sentiment.json() if bot_sentiment is not None else None,
+            self.fingerprint,
+        )
+
+    @staticmethod
+    def pack_entry(audio: bytes, cutoffs: List[Tuple[float, str]]) -> bytes:
+        header = json.dumps(cutoffs).encode()
+        return struct.pack(">I", len(header)) + header + audio
+
+    @staticmethod
+    def unpack_entry(entry: bytes) -> Tuple[bytes, List[Tuple[float, str]]]:
+        (header_length,) = struct.unpack(">I", entry[:4])
+        cutoffs = [tuple(cutoff) for cutoff in json.loads(entry[4 : 4 + header_length])]
+        return entry[4 + header_length :], cutoffs
+
+    def record_cutoffs(self, result: SynthesisResult, num_bytes: int) -> List[Tuple[float, str]]:
+        # only the points where the cutoff changes are kept
+        cutoffs: List[Tuple[float, str]] = []
+        duration = num_bytes / self.bytes_per_second
+        num_steps = int(duration / self.CUTOFF_RESOLUTION_SECONDS) + 1
+        for step in range(num_steps + 1):
+            seconds = round(step * self.CUTOFF_RESOLUTION_SECONDS, 3)
+            message_up_to = result.get_message_up_to(seconds)
+            if not cutoffs or cutoffs[-1][1] != message_up_to:
+                cutoffs.append((seconds, message_up_to))
+        return cutoffs
+
+    @staticmethod
+    def get_cached_message_up_to(cutoffs: List[Tuple[float, str]], seconds: float) -> str:
+        message_up_to = cutoffs[0][1] if cutoffs else ""
+        for cutoff_seconds, cutoff_message in cutoffs:
+            if cutoff_seconds > seconds:
+                break
+            message_up_to = cutoff_message
+        return message_up_to
+
+    def create_synthesis_result_from_cache(
+        self, audio: bytes, cutoffs: List[Tuple[float, str]], chunk_size: int
+    ) -> SynthesisResult:
+        chunk_size = int(chunk_size)
+
+        async def chunk_generator():
+            if not audio:
+                yield SynthesisResult.ChunkResult(b"", True)
+            for i in range(0, len(audio), chunk_size):
+                yield SynthesisResult.ChunkResult(audio[i : i + chunk_size], i + chunk_size >= len(audio))
+
+        return SynthesisResult(
+            chunk_generator(),
+            lambda seconds: self.get_cached_message_up_to(cutoffs, seconds),
+        )
+
+    def create_caching_result(self, result: SynthesisResult, cache_key: str) -> SynthesisResult:
+        async def chunk_generator():
+            audio = bytearray()
+            async for chunk_result in result.chunk_generator:
+                audio.extend(chunk_result.chunk)
+                yield chunk_result
+            # some providers mark every chunk they receive as last, only the exhausted generator is complete,
+            # an interrupted utterance is not cached
+            cutoffs = self.record_cutoffs(result, len(audio))
+            asyncio.create_task(self.audio_cache.put(cache_key, self.pack_entry(bytes(audio), cutoffs)))
+
+        return SynthesisResult(chunk_generator(), result.get_message_up_to)
+
+    async def create_speech(
+        self,
+        message: BaseMessage,
+        chunk_size: int,
+        bot_sentiment: Optional[BotSentiment] = None,
+    ) -> SynthesisResult:
+        if self.synthesizer_config.should_encode_as_wav:
+            # every chunk carries its own WAV header, so cached audio can't be rechunked
+            return await self.synthesizer.create_speech(message, chunk_size, bot_sentiment=bot_sentiment)
+        cache_key = self.get_cache_key(message, bot_sentiment)
+        entry = await self.audio_cache.get(cache_key)
+        if entry is not None:
+            audio, cutoffs = self.unpack_entry(entry)
+            return self.create_synthesis_result_from_cache(audio, cutoffs, chunk_size)
+        result = await self.synthesizer.create_speech(message, chunk_size, bot_sentiment=bot_sentiment)
+        return self.create_caching_result(result, cache_key)
+
+    async def is_message_cached(self, message: BaseMessage) -> bool:
+        if self.synthesizer_config.should_encode_as_wav:
+            return await self.synthesizer.is_message_cached(message)
+        return await self.audio_cache.contains(self.get_cache_key(message, None))
+
+    def uses_bot_sentiment(self) -> bool:
+        return self.synthesizer.uses_bot_sentiment()
+
+    def can_presynthesize(self) -> bool:
+        if self.synthesizer_config.should_encode_as_wav:
+            return self.synthesizer.can_presynthesize()
+        return True
+
+    async def presynthesize(self, message: BaseMessage):
+        if self.synthesizer_config.should_encode_as_wav:
+            await self.synthesizer.presynthesize(message)
+            return
+        result = await self.synthesizer.create_speech(message, self.bytes_per_second)
+        audio = b"".join([chunk_result.chunk async for chunk_result in result.chunk_generator])
+        cutoffs = self.record_cutoffs(result, len(audio))
+        await self.audio_cache.put(self.get_cache_key(message, None), self.pack_entry(audio, cutoffs))
+
+    def get_api_base_url(self) -> Optional[str]:
+        return self.synthesizer.get_api_base_url()
+
+    def get_synthesizer_config(self) -> SynthesizerConfig:
+        return self.synthesizer.get_synthesizer_config()
+
+    def get_typing_noise_filler_audio(self) -> FillerAudio:
+        return self.synthesizer.get_typing_noise_filler_audio()
+
+    async def set_filler_audios(self, filler_audio_config: FillerAudioConfig):
+        if type(self.synthesizer).set_filler_audios is not BaseSynthesizer.set_filler_audios:
+            await self.synthesizer.set_filler_audios(filler_audio_config)
+            return
+        # the phrase fillers come through get_phrase_filler_audios of the wrapper, from the audio cache
+        await BaseSynthesizer.set_filler_audios(self, filler_audio_config)
+
+    async def get_phrase_filler_audios(self) -> List[FillerAudio]:
+        filler_phrases = self.synthesizer.get_filler_phrases()
+        if not filler_phrases:
+            return await self.synthesizer.get_phrase_filler_audios()
+        filler_audios = []
+        for filler_phrase in filler_phrases:
+            # the filler audio of a phrase may be trimmed differently than its create_speech audio
+            cache_key = create_audio_cache_key("filler", filler_phrase.text, self.fingerprint)
+            entry = await self.audio_cache.get(cache_key)
+            if entry is not None:
+                audio, _ = self.unpack_entry(entry)
+            else:
+                audio = await self.synthesizer.synthesize_filler_phrase(filler_phrase)
+                await self.audio_cache.put(cache_key, self.pack_entry(audio, []))
+            filler_audios.append(FillerAudio(filler_phrase, audio, self.synthesizer_config))
+        return filler_audios
+
+    def get_message_cutoff_from_total_response_length(
+        self, message: BaseMessage, seconds: int, size_of_output: int
+    ) -> str:
+        return self.synthesizer.get_message_cutoff_from_total_response_length(message, seconds, size_of_output)
+
+    def get_message_cutoff_from_voice_speed(self, message: BaseMessage, seconds: int, words_per_minute: int) -> str:
+        return self.synthesizer.get_message_cutoff_from_voice_speed(message, seconds, words_per_minute)
+
+    def create_synthesis_result_from_wav(self, file: Any, message: BaseMessage, chunk_size: int) -> SynthesisResult:
+        return self.synthesizer.create_synthesis_result_from_wav(file, message, chunk_size)
+
+    def get_provider_audio_formats(self) -> List[AudioFormat]:
+        return self.synthesizer.get_provider_audio_formats()
+
+    def set_provider_audio_format(self, audio_format: AudioFormat):
+        self.synthesizer.set_provider_audio_format(audio_format)
+        self.fingerprint = get_synthesizer_fingerprint(self.synthesizer)
+
+    def ready_synthesizer(self):
+        self.synthesizer.ready_synthesizer()
+
+    async def tear_down(self):
+        await self.synthesizer.tear_down()
@@ -27,6 +27,9 @@ class CoquiSynthesizer(BaseSynthesizer[CoquiSynthesizerConfig]):
         self.voice_prompt = synthesizer_config.voice_prompt
         self.use_xtts = synthesizer_config.use_xtts
 
+    def get_api_base_url(self) -> Optional[str]:
+        return COQUI_BASE_URL
+
     def get_request(self, text: str) -> Tuple[str, Dict[str, str], Dict[str, object]]:
         url = COQUI_BASE_URL
         headers = {
@@ -1,10 +1,9 @@
 import asyncio
-import audioop
 import hashlib
 import logging
 import os
 from io import BytesIO
-from typing import Optional, List, AsyncGenerator, Union, Tuple, Any
+from typing import Optional, List, AsyncGenerator, Union, Any
 
 import aiohttp
 from opentelemetry.trace import Span
@@ -17,16 +16,19 @@ from vocode.streaming.models.audio_encoding import AudioEncoding
 from vocode.streaming.models.message import BaseMessage
 from vocode.streaming.models.synthesizer import (
     ElevenLabsSynthesizerConfig,
-    SynthesizerType, ELEVEN_LABS_MULAW_8000,
+    SynthesizerType, ELEVEN_LABS_MULAW_8000, ELEVEN_LABS_MP3_44100,
 )
 from vocode.streaming.synthesizer.base_synthesizer import (
     BaseSynthesizer,
     SynthesisResult,
     tracer, FillerAudio, FILLER_AUDIO_PATH, encode_as_wav,
 )
-from vocode.streaming.synthesizer.miniaudio_worker import MiniaudioWorker
+from vocode.streaming.synthesizer.audio_cache import TieredAudioCache, create_audio_cache_key
+from vocode.streaming.synthesizer.miniaudio_worker import MiniaudioOutput, MiniaudioWorker
 from vocode.streaming.utils import convert_wav
-from vocode.streaming.utils.mp3_helper import decode_mp3
+from vocode.streaming.utils.audio_codec import ulaw_to_linear
+from vocode.streaming.utils.audio_plan import AudioFormat
+from vocode.streaming.utils.mp3_helper import DECODED_MP3_SAMPLE_RATE, decode_mp3
 
 ADAM_VOICE_ID = "pNInz6obpgDQGcFmaJgB"
 ELEVEN_LABS_BASE_URL = "https://api.elevenlabs.io/v1/"
@@ -64,10 +66,69 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
         self.filler_picker = filler_picker
         self.ignore_cache = ignore_cache
 
+    def get_api_base_url(self) -> Optional[str]:
+        return ELEVEN_LABS_BASE_URL
+
+    @staticmethod
+    def get_output_format_audio_format(output_format: str) -> AudioFormat:
+        if output_format.startswith("ulaw"):
+            return AudioFormat(8000, AudioEncoding.MULAW)
+        elif output_format.startswith("mp3"):
+            # the MP3 decoder always outputs at DECODED_MP3_SAMPLE_RATE
+            return AudioFormat(DECODED_MP3_SAMPLE_RATE, AudioEncoding.LINEAR16, codec="mp3")
+        raise ValueError(f"Unknown output format {output_format}")
+
+    def get_provider_output_formats(self) -> List[str]:
+        # only the formats the synthesis paths below can handle, the configured one first
+        output_formats = [self.output_format]
+        configured_audio_format = self.get_output_format_audio_format(self.output_format)
+        for output_format in (ELEVEN_LABS_MULAW_8000, ELEVEN_LABS_MP3_44100):
+            if self.get_output_format_audio_format(output_format) != configured_audio_format:
+                output_formats.append(output_format)
+        return output_formats
+
+    def get_provider_audio_formats(self) -> List[AudioFormat]:
+        return [self.get_output_format_audio_format(output_format) for output_format in self.get_provider_output_formats()]
+
+    def set_provider_audio_format(self, audio_format: AudioFormat):
+        for output_format in self.get_provider_output_formats():
+            if self.get_output_format_audio_format(output_format) == audio_format:
+                if output_format != self.output_format:
+                    self.logger.info(f"Switching ElevenLabs output format from {self.output_format} to {output_format}")
+                # the cache path and file extension follow the config
+                self.output_format = output_format
+                self.synthesizer_config.output_format = output_format
+                return
+        super().set_provider_audio_format(audio_format)
+
+    @property
+    def filler_path(self):
+        return FILLER_AUDIO_PATH if os.getenv("FILLER_AUDIO_PATH") is None else os.getenv("FILLER_AUDIO_PATH")
+
     @property
     def cache_path(self):
-        filler_path = FILLER_AUDIO_PATH if os.getenv("FILLER_AUDIO_PATH") is None else os.getenv("FILLER_AUDIO_PATH")
-        return os.path.join(filler_path, "elevenlabs", self.model_id, self.voice_id, self.output_format)
+        return os.path.join(self.filler_path, "elevenlabs", self.model_id, self.voice_id, self.output_format)
+
+    @property
+    def audio_cache(self) -> TieredAudioCache:
+        # holds audio converted to the output format, the files under cache_path keep what ElevenLabs sent
+        return TieredAudioCache.get_instance(
+            os.path.join(self.filler_path, "elevenlabs", "converted"),
+            self.synthesizer_config.audio_cache_max_memory_bytes,
+        )
+
+    def get_audio_cache_key(self, message_text: str) -> str:
+        return create_audio_cache_key(
+            message_text,
+            self.voice_id,
+            self.model_id,
+            self.output_format,
+            self.stability,
+            self.similarity_boost,
+            self.use_speaker_boost,
+            self.synthesizer_config.sampling_rate,
+            self.synthesizer_config.audio_encoding.value,
+        )
 
     @staticmethod
     def hash_message(message_text: str) -> str:
@@ -119,9 +180,12 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             self.logger.warning(f"Filler picker returned None for {bot_message} and {user_message}")
         return None
 
-    def read_audio_from_cache(self, message_text: str):
+    def get_cache_file_path(self, message_text: str) -> str:
         file_extension = self.synthesizer_config.output_format_to_cache_file_extension()
-        file_path = os.path.join(self.cache_path, f"{self.hash_message(message_text)}.{file_extension}")
+        return os.path.join(self.cache_path, f"{self.hash_message(message_text)}.{file_extension}")
+
+    def read_audio_from_cache(self, message_text: str):
+        file_path = self.get_cache_file_path(message_text)
         if os.path.exists(file_path):
             return open(file_path, "rb").read()
         return None
@@ -131,7 +195,7 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
         if audio_data is not None:
             if self.output_format == ELEVEN_LABS_MULAW_8000:
                 if self.synthesizer_config.audio_encoding == AudioEncoding.LINEAR16:
-                    audio_data = audioop.ulaw2lin(audio_data, 2)
+                    audio_data = ulaw_to_linear(audio_data)
 
                 return audio_data
 
@@ -141,17 +205,48 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
 
         return None
 
-    async def save_audio_to_cache(self, audio_data: bytes, message_text: str):
+    def convert_provider_audio(self, audio_data: bytes) -> bytes:
+        """Converts audio as sent by ElevenLabs to the output sampling rate and encoding."""
+        if self.synthesizer_config.output_format_to_cache_file_extension() == 'mulaw':
+            if self.synthesizer_config.audio_encoding == AudioEncoding.LINEAR16:
+                return ulaw_to_linear(audio_data)
+            return audio_data
+        return convert_wav(
+            decode_mp3(audio_data),
+            output_sample_rate=self.synthesizer_config.sampling_rate,
+            output_encoding=self.synthesizer_config.audio_encoding,
+        )
+
+    async def get_converted_audio(self, message_text: str) -> Optional[bytes]:
+        """Looks up ready-to-play audio, falling back to (and converting) the provider audio saved on disk."""
+        cache_key = self.get_audio_cache_key(message_text)
+        audio_data = await self.audio_cache.get(cache_key)
+        if audio_data is not None:
+            return audio_data
+        loop = asyncio.get_running_loop()
+        provider_audio = await loop.run_in_executor(None, self.read_audio_from_cache, message_text)
+        if provider_audio is None:
+            return None
+        audio_data = await loop.run_in_executor(None, self.convert_provider_audio, provider_audio)
+        await self.audio_cache.put(cache_key, audio_data)
+        return audio_data
+
+    async def save_converted_audio(self, audio_data: bytes, message_text: str):
         if self.ignore_cache:
-            self.logger.info("Ignoring cache")
             return
-        os.makedirs(self.cache_path, exist_ok=True)
-        file_extension = self.synthesizer_config.output_format_to_cache_file_extension()
-        file_path = os.path.join(self.cache_path, f"{self.hash_message(message_text)}.{file_extension}")
+        await self.audio_cache.put(self.get_audio_cache_key(message_text), audio_data)
 
-        with open(file_path, 'wb') as file:
+    def _write_audio_file(self, audio_data: bytes, message_text: str):
+        os.makedirs(self.cache_path, exist_ok=True)
+        with open(self.get_cache_file_path(message_text), 'wb') as file:
             file.write(audio_data)
 
+    async def save_audio_to_cache(self, audio_data: bytes, message_text: str):
+        if self.ignore_cache:
+            self.logger.info("Ignoring cache")
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self._write_audio_file, audio_data, message_text)
+
     def set_fillers_cache(self):
         self.fillers_cache = {}
         self.logger.info("Setting filler cache")
@@ -173,7 +268,7 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
                                            chunk_size: Optional[int] = None) -> SynthesisResult:
         if self.synthesizer_config.output_format_to_cache_file_extension() == 'mulaw':
             if self.synthesizer_config.audio_encoding == AudioEncoding.LINEAR16:
-                audio_data = audioop.ulaw2lin(audio_data, 2)
+                audio_data = ulaw_to_linear(audio_data)
 
             async def generator():
                 # TODO there is no-rechunking
@@ -203,21 +298,24 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
                                                              message: BaseMessage,
                                                              chunk_size: int) -> AsyncGenerator[
         SynthesisResult.ChunkResult, None]:
-        full_audio = b''
+        provider_audio = bytearray()
+        full_audio = bytearray()
         response: aiohttp.ClientResponse
         stream_reader = response.content
         chunk_size = int(chunk_size)
         # Chunked as they come from Elevenlabs
         async for chunk in stream_reader.iter_any():
+            provider_audio.extend(chunk)
             if self.output_format == ELEVEN_LABS_MULAW_8000 and self.synthesizer_config.audio_encoding == AudioEncoding.LINEAR16:
-                chunk = audioop.ulaw2lin(chunk, 2)
-            full_audio += chunk
+                chunk = ulaw_to_linear(chunk)
+            full_audio.extend(chunk)
             for i in range(0, len(chunk), chunk_size):
                 is_last = i + chunk_size >= len(chunk)
                 yield SynthesisResult.ChunkResult(chunk[i:i + chunk_size], is_last)
 
         self.logger.info(f"Saving audio for message: {message.text}")
-        await self.save_audio_to_cache(full_audio, message.text)
+        await self.save_audio_to_cache(bytes(provider_audio), message.text)
+        await self.save_converted_audio(bytes(full_audio), message.text)
 
     async def experimental_mp3_streaming_output_generator(
             self,
@@ -230,7 +328,7 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             Union[bytes, None]
         ] = asyncio.Queue()
         miniaudio_worker_output_queue: asyncio.Queue[
-            Tuple[bytes, bool]
+            MiniaudioOutput
         ] = asyncio.Queue()
         miniaudio_worker = MiniaudioWorker(
             self.synthesizer_config,
@@ -253,6 +351,7 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             self.logger.info(f"Saving audio for message: {message.text}")
             await self.save_audio_to_cache(complete_audio_data, message.text)
 
+        converted_audio_chunks = []
         try:
             asyncio.create_task(send_chunks())
 
@@ -260,7 +359,11 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             while True:
                 # Get the wav chunk and the flag from the output queue of the MiniaudioWorker
 
-                wav_chunk, is_last = await miniaudio_worker.output_queue.get()
+                wav_chunk, is_last, decode_failed = await miniaudio_worker.output_queue.get()
+                converted_audio_chunks.append(wav_chunk)
+                if is_last and not decode_failed:
+                    # only complete utterances are cached, not ones cut short by an undecodable chunk
+                    asyncio.create_task(self.save_converted_audio(b''.join(converted_audio_chunks), message.text))
                 if self.synthesizer_config.should_encode_as_wav:
                     wav_chunk = encode_as_wav(wav_chunk, self.synthesizer_config)
                 yield SynthesisResult.ChunkResult(wav_chunk, is_last)
@@ -319,6 +422,26 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
         audio_data = await response.read()
         await self.save_audio_to_cache(audio_data, message.text)
 
+    async def is_message_cached(self, message: BaseMessage) -> bool:
+        if await self.audio_cache.contains(self.get_audio_cache_key(message.text)):
+            return True
+        return await asyncio.get_running_loop().run_in_executor(
+            None, os.path.exists, self.get_cache_file_path(message.text)
+        )
+
+    def can_presynthesize(self) -> bool:
+        return not self.ignore_cache
+
+    async def presynthesize(self, message: BaseMessage):
+        response = await self.__send_request(message, ignore_streaming=True)
+        audio_data = await response.read()
+        await self.save_audio_to_cache(audio_data, message.text)
+        # replaces converted audio of an earlier synthesis too
+        converted_audio = await asyncio.get_running_loop().run_in_executor(
+            None, self.convert_provider_audio, audio_data
+        )
+        await self.save_converted_audio(converted_audio, message.text)
+
     async def create_speech(
             self,
             message: BaseMessage,
@@ -326,20 +449,9 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             bot_sentiment: Optional[BotSentiment] = None
     ) -> SynthesisResult:
         if not self.ignore_cache:
-            cached_audio = self.get_cached_audio(message.text)
+            cached_audio = await self.get_converted_audio(message.text)
             if cached_audio is not None:
-                async def generator():
-                    # Ensure that chunk_size is an integer
-                    for i in range(0, len(cached_audio), int(chunk_size)):
-                        is_last = i + chunk_size >= len(cached_audio)
-                        yield SynthesisResult.ChunkResult(cached_audio[i:i + int(chunk_size)], is_last)
-
-                return SynthesisResult(
-                    generator(),  # should be wav
-                    lambda seconds: self.get_message_cutoff_from_voice_speed(
-                        message, seconds, self.words_per_minute
-                    ),
-                )
+                return self.create_synthesis_result_from_converted_audio(cached_audio, message, chunk_size)
 
         response = await self.__send_request(message)
         create_speech_span = tracer.start_span(
@@ -373,12 +485,37 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
                 f"synthesizer.{SynthesizerType.ELEVEN_LABS.value.split('_', 1)[-1]}.convert",
             )
 
-            result = self.create_synthesis_result_from_bytes(audio_data, message)
+            converted_audio = await asyncio.get_running_loop().run_in_executor(
+                None, self.convert_provider_audio, audio_data
+            )
+            await self.save_converted_audio(converted_audio, message.text)
+            result = self.create_synthesis_result_from_converted_audio(converted_audio, message, chunk_size)
 
             convert_span.end()
 
             return result
 
+    def create_synthesis_result_from_converted_audio(
+            self,
+            audio_data: bytes,
+            message: BaseMessage,
+            chunk_size: int,
+    ) -> SynthesisResult:
+        async def generator():
+            if not audio_data:
+                yield SynthesisResult.ChunkResult(b'', True)
+            # Ensure that chunk_size is an integer
+            for i in range(0, len(audio_data), int(chunk_size)):
+                is_last = i + chunk_size >= len(audio_data)
+                yield SynthesisResult.ChunkResult(audio_data[i:i + int(chunk_size)], is_last)
+
+        return SynthesisResult(
+            generator(),  # should be wav
+            lambda seconds: self.get_message_cutoff_from_voice_speed(
+                message, seconds, self.words_per_minute
+            ),
+        )
+
     async def get_phrase_filler_audios(self) -> List[FillerAudio]:
         # Kept for compatibility with the old code.
         filler_phrase_audios = []
@@ -390,10 +527,14 @@ class ElevenLabsSynthesizer(BaseSynthesizer[ElevenLabsSynthesizerConfig]):
             self.logger.info("No filler picker provided, skipping fillers validation")
             return
 
-        for filler_text in self.filler_picker.all_fillers:
-            cached_audio = self.read_audio_from_cache(filler_text)
-            if cached_audio is None or flush_cache:
-                self.logger.info(f"Creating audio for missing filler: {filler_text}")
-                await self.save_filler_to_cache(filler_text)
+        # imported here so the presynthesis CLI can run as a module
+        from vocode.streaming.synthesizer.presynthesis import collect_phrases, presynthesize_phrases
 
-        # TODO generate other parts of call script to cache from prompt JSON also
+        # the rest of the call script is prewarmed by the presynthesis CLI
+        report = await presynthesize_phrases(
+            self,
+            collect_phrases(fillers=self.filler_picker.all_fillers),
+            diff=not flush_cache,
+            logger=self.logger,
+        )
+        self.logger.info(f"Validated fillers: {report}")
@@ -17,6 +17,8 @@ from vocode.streaming.models.synthesizer import (
     SynthesizerType,
 )
 from vocode.streaming.synthesizer.azure_synthesizer import AzureSynthesizer
+from vocode.streaming.synthesizer.base_synthesizer import BaseSynthesizer
+from vocode.streaming.synthesizer.caching_synthesizer import CachingSynthesizer
 from vocode.streaming.synthesizer.eleven_labs_synthesizer import ElevenLabsSynthesizer
 from vocode.streaming.synthesizer.google_synthesizer import GoogleSynthesizer
 from vocode.streaming.synthesizer.gtts_synthesizer import GTTSSynthesizer
@@ -35,6 +37,20 @@ class SynthesizerFactory:
         synthesizer_config: SynthesizerConfig,
         logger: Optional[logging.Logger] = None,
         aiohttp_session: Optional[aiohttp.ClientSession] = None,
+    ) -> BaseSynthesizer:
+        synthesizer = self.create_provider_synthesizer(
+            synthesizer_config, logger=logger, aiohttp_session=aiohttp_session
+        )
+        # ElevenLabs caches its audio itself and the conversation relies on its own methods, e.g. for fillers
+        if synthesizer_config.cache_audio and not isinstance(synthesizer, ElevenLabsSynthesizer):
+            return CachingSynthesizer(synthesizer, logger=logger)
+        return synthesizer
+
+    def create_provider_synthesizer(
+        self,
+        synthesizer_config: SynthesizerConfig,
+        logger: Optional[logging.Logger] = None,
+        aiohttp_session: Optional[aiohttp.ClientSession] = None,
     ):
         if isinstance(synthesizer_config, GoogleSynthesizerConfig):
             return GoogleSynthesizer(
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from vocode.streaming.constants import TEXT_TO_SPEECH_CHUNK_SIZE_SECONDS
+from vocode.streaming.models.agent import AgentConfig
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import SynthesizerConfig
+from vocode.streaming.synthesizer.base_synthesizer import BaseSynthesizer, SynthesisResult
+from vocode.streaming.synthesizer.factory import SynthesizerFactory
+from vocode.streaming.utils import get_chunk_size_per_second
+
+DEFAULT_GREETING_TTL_SECONDS = 60
+# how long a connected call waits for a greeting still being synthesized before synthesizing it itself
+DEFAULT_GREETING_WAIT_SECONDS = 5
+
+
+def split_initial_message(initial_message: BaseMessage) -> List[BaseMessage]:
+    # FIXME: use collator like in the agent.
+    return [BaseMessage(text=f"{sentence}.") for sentence in initial_message.text.split(".") if sentence.strip() != ""]
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class PresynthesizedGreeting:
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        # message text -> task with the audio chunks of the message
+        self.messages: Dict[str, asyncio.Future] = {}
+        self.initial_audio: Optional[asyncio.Future] = None
+
+    def cancel(self):
+        for task in [*self.messages.values(), self.initial_audio]:
+            if task is not None and not task.done():
+                task.cancel()
+
+
+class GreetingPresynthesizer:
+    """
+    Synthesizes the greeting of a call while the telephony webhook is answered, so the conversation
+    can play it as soon as the media stream opens instead of starting synthesis only then. Greetings
+    are kept by conversation ID until the conversation takes them or `ttl_seconds` pass.
+    """
+
+    _instance: Optional["GreetingPresynthesizer"] = None
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_GREETING_TTL_SECONDS,
+        wait_seconds: float = DEFAULT_GREETING_WAIT_SECONDS,
+        synthesizer_factory: Optional[SynthesizerFactory] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.synthesizer_factory = synthesizer_factory or SynthesizerFactory()
+        self.logger = logger or logging.getLogger(__name__)
+        self.greetings: Dict[str, PresynthesizedGreeting] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @classmethod
+    def get_instance(cls) -> "GreetingPresynthesizer":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def evict_expired(self):
+        now = time.monotonic()
+        for conversation_id, greeting in list(self.greetings.items()):
+            if greeting.expires_at <= now:
+                greeting.cancel()
+                del self.greetings[conversation_id]
+                self.expired += 1
+
+    def start(
+        self,
+        conversation_id: str,
+        agent_config: AgentConfig,
+        synthesizer_config: SynthesizerConfig,
+        synthesizer_factory: Optional[SynthesizerFactory] = None,
+    ):
+        """Starts synthesizing the greeting of the conversation in the background."""
+        self.evict_expired()
+        if agent_config.initial_message is None:
+            return
+        greeting = PresynthesizedGreeting(expires_at=time.monotonic() + self.ttl_seconds)
+        if agent_config.initial_audio_path:
+            greeting.initial_audio = asyncio.get_running_loop().run_in_executor(
+                None, read_file, agent_config.initial_audio_path
+            )
+        else:
+            synthesizer = (synthesizer_factory or self.synthesizer_factory).create_synthesizer(synthesizer_config, logger=self.logger)
+            messages = split_initial_message(agent_config.initial_message)
+            for message in messages:
+                greeting.messages[message.text] = asyncio.create_task(self.synthesize(synthesizer, message))
+            asyncio.create_task(self.tear_down_when_done(synthesizer, list(greeting.messages.values())))
+        self.greetings[conversation_id] = greeting
+
+    async def synthesize(self, synthesizer: BaseSynthesizer, message: BaseMessage) -> List[bytes]:
+        synthesizer_config = synthesizer.get_synthesizer_config()
+        chunk_size = (
+            get_chunk_size_per_second(synthesizer_config.audio_encoding, synthesizer_config.sampling_rate)
+            * TEXT_TO_SPEECH_CHUNK_SIZE_SECONDS
+        )
+        synthesis_result = await synthesizer.create_speech(message, chunk_size)
+        return [chunk_result.chunk async for chunk_result in synthesis_result.chunk_generator]
+
+    async def tear_down_when_done(self, synthesizer: BaseSynthesizer, tasks: List[asyncio.Future]):
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await synthesizer.tear_down()
+
+    async def wait_for(self, task: asyncio.Future, conversation_id: str):
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=self.wait_seconds)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Greeting of {conversation_id} not synthesized in {self.wait_seconds}s")
+        except Exception:
+            self.logger.exception(f"Presynthesizing the greeting of {conversation_id} failed")
+        return None
+
+    def take_task(self, conversation_id: str, message_text: Optional[str]) -> Optional[asyncio.Future]:
+        self.evict_expired()
+        greeting = self.greetings.get(conversation_id)
+        if greeting is None:
+            return None
+        if message_text is None:
+            task, greeting.initial_audio = greeting.initial_audio, None
+        else:
+            task = greeting.messages.pop(message_text, None)
+        if greeting.initial_audio is None and not greeting.messages:
+            del self.greetings[conversation_id]
+        return task
+
+    async def get_synthesis_result(
+        self, conversation_id: str, message: BaseMessage, synthesizer: BaseSynthesizer
+    ) -> Optional[SynthesisResult]:
+        """The presynthesized audio of a greeting message, None when the conversation has to synthesize it."""
+        task = self.take_task(conversation_id, message.text)
+        if task is None:
+            return None
+        chunks = await self.wait_for(task, conversation_id)
+        if chunks is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        total_bytes = sum(len(chunk) for chunk in chunks)
+
+        async def chunk_generator():
+            if not chunks:
+                yield SynthesisResult.ChunkResult(b"", True)
+            for i, chunk in enumerate(chunks):
+                yield SynthesisResult.ChunkResult(chunk, i == len(chunks) - 1)
+
+        return SynthesisResult(
+            chunk_generator(),
+            lambda seconds: synthesizer.get_message_cutoff_from_total_response_length(message, seconds, total_bytes),
+        )
+
+    async def get_initial_audio(self, conversation_id: str) -> Optional[bytes]:
+        """The preloaded `initial_audio_path` audio of the conversation, None when it has to be read."""
+        task = self.take_task(conversation_id, None)
+        if task is None:
+            return None
+        audio_data = await self.wait_for(task, conversation_id)
+        if audio_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return audio_data
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self.greetings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
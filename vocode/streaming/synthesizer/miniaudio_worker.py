@@ -1,23 +1,36 @@
 from __future__ import annotations
 import queue
 
-from typing import Optional, Tuple, Union
+from typing import NamedTuple, Optional, Union
 import asyncio
 import miniaudio
 
+from vocode.streaming.models.audio_encoding import AudioEncoding
 from vocode.streaming.models.synthesizer import SynthesizerConfig
 from vocode.streaming.utils import convert_wav
-from vocode.streaming.utils.mp3_helper import decode_mp3
+from vocode.streaming.utils.audio_codec import AudioConverter
+from vocode.streaming.utils.mp3_helper import (
+    DECODED_MP3_SAMPLE_RATE,
+    StreamingMp3Decoder,
+    decode_mp3,
+)
 from vocode.streaming.utils.worker import ThreadAsyncWorker, logger
 
 
+class MiniaudioOutput(NamedTuple):
+    chunk: bytes
+    is_last: bool
+    # the mp3 couldn't be decoded, the utterance ending with this chunk is cut short
+    decode_failed: bool = False
+
+
 class MiniaudioWorker(ThreadAsyncWorker[Union[bytes, None]]):
     def __init__(
         self,
         synthesizer_config: SynthesizerConfig,
         chunk_size: int,
         input_queue: asyncio.Queue[Union[bytes, None]],
-        output_queue: asyncio.Queue[Tuple[bytes, bool]],
+        output_queue: asyncio.Queue[MiniaudioOutput],
     ) -> None:
         super().__init__(input_queue, output_queue)
         self.output_queue = output_queue  # for typing
@@ -26,12 +39,90 @@ class MiniaudioWorker(ThreadAsyncWorker[Union[bytes, None]]):
         self._ended = False
 
     def _run_loop(self):
+        if self.synthesizer_config.incremental_mp3_decoding:
+            self._run_incremental_loop()
+        else:
+            self._run_buffered_loop()
+
+    def _get_mp3_chunk(self) -> Optional[bytes]:
+        # blocks until the next chunk or sentinel, returns None when terminated too
+        while not self._ended:
+            try:
+                return self.input_janus_queue.sync_q.get(timeout=1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put_output_chunks(self, output_buffer: bytearray) -> bytearray:
+        # chunk up the buffer in chunks of chunk_size bytes, but keep the last chunk (less than chunk size)
+        output_buffer_idx = 0
+        while output_buffer_idx < len(output_buffer) - self.chunk_size:
+            chunk = output_buffer[
+                output_buffer_idx : output_buffer_idx + self.chunk_size
+            ]
+            self.output_janus_queue.sync_q.put(
+                MiniaudioOutput(chunk, False)
+            )  # don't need to use bytes() since we already sliced it (which is a copy)
+            output_buffer_idx += self.chunk_size
+        return output_buffer[output_buffer_idx:]
+
+    def _run_incremental_loop(self):
+        """
+        Decodes each utterance with a StreamingMp3Decoder so only newly arrived frames are decoded,
+        and resamples with state carried across chunks. The output is identical to the buffered loop.
+        """
+        while not self._ended:
+            first_chunk = self._get_mp3_chunk()
+            if self._ended:
+                break
+            if first_chunk is None:
+                self.output_janus_queue.sync_q.put(MiniaudioOutput(b"", True))
+                continue
+            # chunks of the current utterance are fed to the decoder until the None sentinel
+            pending_chunks = [first_chunk]
+            utterance_ended = False
+            decode_failed = False
+
+            def read_fragment() -> Optional[bytes]:
+                nonlocal utterance_ended
+                mp3_chunk = pending_chunks.pop() if pending_chunks else self._get_mp3_chunk()
+                if mp3_chunk is None:
+                    utterance_ended = True
+                return mp3_chunk
+
+            current_wav_output_buffer = bytearray()
+            audio_converter = AudioConverter(
+                input_sample_rate=DECODED_MP3_SAMPLE_RATE,
+                output_sample_rate=self.synthesizer_config.sampling_rate,
+                output_encoding=self.synthesizer_config.audio_encoding,
+            )
+            try:
+                for pcm_chunk in StreamingMp3Decoder(read_fragment):
+                    current_wav_output_buffer.extend(audio_converter.convert(pcm_chunk))
+                    current_wav_output_buffer = self._put_output_chunks(
+                        current_wav_output_buffer
+                    )
+            except miniaudio.DecodeError as e:
+                logger.exception("MiniaudioWorker error: " + str(e), exc_info=True)
+                decode_failed = True
+                # drop the rest of the broken utterance
+                while not utterance_ended and read_fragment() is not None:
+                    pass
+            if self._ended:
+                break
+            self.output_janus_queue.sync_q.put(
+                MiniaudioOutput(bytes(current_wav_output_buffer), True, decode_failed)
+            )
+
+    def _run_buffered_loop(self):
         # tracks the mp3 so far
         current_mp3_buffer = bytearray()
         # tracks the wav so far
         current_wav_buffer = bytearray()
         # the leftover chunks of the wav that haven't been sent to the output queue yet
         current_wav_output_buffer = bytearray()
+        # the current utterance had a chunk that couldn't be decoded
+        decode_failed = False
         while not self._ended:
             # Get a tuple of (mp3_chunk, is_last) from the input queue
             try:
@@ -42,9 +133,10 @@ class MiniaudioWorker(ThreadAsyncWorker[Union[bytes, None]]):
                 current_mp3_buffer.clear()
                 current_wav_buffer.clear()
                 self.output_janus_queue.sync_q.put(
-                    (bytes(current_wav_output_buffer), True)
+                    MiniaudioOutput(bytes(current_wav_output_buffer), True, decode_failed)
                 )
                 current_wav_output_buffer.clear()
+                decode_failed = False
                 continue
             try:
                 current_mp3_buffer.extend(mp3_chunk)
@@ -52,8 +144,9 @@ class MiniaudioWorker(ThreadAsyncWorker[Union[bytes, None]]):
             except miniaudio.DecodeError as e:
                 # TODO: better logging
                 logger.exception("MiniaudioWorker error: " + str(e), exc_info=True)
+                decode_failed = True
                 self.output_janus_queue.sync_q.put(
-                    (bytes(current_wav_output_buffer), True)
+                    MiniaudioOutput(bytes(current_wav_output_buffer), True, decode_failed)
                 )  # sentinel
                 continue
             converted_output_bytes = convert_wav(
@@ -65,19 +158,9 @@ class MiniaudioWorker(ThreadAsyncWorker[Union[bytes, None]]):
             # and put the difference in the output buffer
             new_bytes = converted_output_bytes[len(current_wav_buffer) :]
             current_wav_output_buffer.extend(new_bytes)
-
-            # chunk up new_bytes in chunks of chunk_size bytes, but keep the last chunk (less than chunk size) in the wav output buffer
-            output_buffer_idx = 0
-            while output_buffer_idx < len(current_wav_output_buffer) - self.chunk_size:
-                chunk = current_wav_output_buffer[
-                    output_buffer_idx : output_buffer_idx + self.chunk_size
-                ]
-                self.output_janus_queue.sync_q.put(
-                    (chunk, False)
-                )  # don't need to use bytes() since we already sliced it (which is a copy)
-                output_buffer_idx += self.chunk_size
-
-            current_wav_output_buffer = current_wav_output_buffer[output_buffer_idx:]
+            current_wav_output_buffer = self._put_output_chunks(
+                current_wav_output_buffer
+            )
             current_wav_buffer.extend(new_bytes)
 
     def terminate(self):
@@ -41,6 +41,9 @@ class PlayHtSynthesizer(BaseSynthesizer[PlayHtSynthesizerConfig]):
         self.words_per_minute = 150
         self.experimental_streaming = synthesizer_config.experimental_streaming
 
+    def get_api_base_url(self) -> Optional[str]:
+        return TTS_ENDPOINT
+
     async def create_speech(
         self,
         message: BaseMessage,
@@ -0,0 +1,245 @@
+"""
+Prewarms synthesizer caches with the static phrases of call scripts so calls play them without
+a provider request.
+
+    python -m vocode.streaming.synthesizer.presynthesis script.json [script.json ...] \
+        --max-concurrency 4 --requests-per-second 2 --dry-run
+
+Every JSON file holds a `synthesizer_config` (which must have `cache_audio` set unless the
+synthesizer caches by itself, like ElevenLabs) and any of `agent_config`, `call_script`,
+`prompt_template` and `fillers`. By default only phrases missing from the cache are synthesized.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import pydantic
+
+from vocode.streaming.models.agent import AgentConfig, FillerAudioConfig
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.model import TypedModel
+from vocode.streaming.models.synthesizer import SynthesizerConfig
+from vocode.streaming.synthesizer.base_synthesizer import FILLER_PHRASES, BaseSynthesizer
+from vocode.streaming.synthesizer.factory import SynthesizerFactory
+
+# keys of call script and prompt template entries whose values are spoken verbatim
+SCRIPT_PHRASE_KEYS = {"say", "say_now_raw_text", "initial_message", "message", "text"}
+
+
+def is_static_phrase(text: str) -> bool:
+    # templated phrases depend on the call and can't be synthesized ahead of time
+    return bool(text.strip()) and "{" not in text
+
+
+def extract_script_phrases(script: Any) -> List[str]:
+    """Collects the spoken phrases of a call script or prompt template (dicts, lists, models or objects)."""
+    phrases: List[str] = []
+    visited: Set[int] = set()
+
+    def visit(value: Any, key: Optional[str] = None):
+        if isinstance(value, str):
+            if key is not None and key.lower() in SCRIPT_PHRASE_KEYS and is_static_phrase(value):
+                phrases.append(value.strip())
+            return
+        if id(value) in visited:
+            return
+        visited.add(id(value))
+        if isinstance(value, pydantic.BaseModel):
+            value = value.dict()
+        elif not isinstance(value, (dict, list, tuple)) and hasattr(value, "__dict__"):
+            value = vars(value)
+        if isinstance(value, dict):
+            for child_key, child in value.items():
+                visit(child, str(child_key))
+        elif isinstance(value, (list, tuple)):
+            for child in value:
+                # a list of phrases under a phrase key, e.g. {"say": ["Hello.", "Hi."]}
+                visit(child, key)
+
+    visit(script)
+    return phrases
+
+
+def collect_phrases(
+    agent_config: Optional[AgentConfig] = None,
+    synthesizer_config: Optional[SynthesizerConfig] = None,
+    call_script: Optional[Any] = None,
+    prompt_template: Optional[Any] = None,
+    fillers: Iterable[str] = (),
+) -> List[str]:
+    """All static phrases of a call setup, deduplicated in the order they were found."""
+    phrases: List[str] = []
+    if agent_config is not None:
+        if agent_config.initial_message is not None:
+            phrases.append(agent_config.initial_message.text)
+        phrases.extend(extract_script_phrases(agent_config.prompt_template))
+        phrases.extend(extract_script_phrases(getattr(agent_config, "call_script", None)))
+        if isinstance(agent_config.send_filler_audio, FillerAudioConfig) and agent_config.send_filler_audio.use_phrases:
+            phrases.extend(filler_phrase.text for filler_phrase in FILLER_PHRASES)
+    if synthesizer_config is not None:
+        phrases.extend(extract_script_phrases(synthesizer_config.prompt_template))
+    phrases.extend(extract_script_phrases(call_script))
+    phrases.extend(extract_script_phrases(prompt_template))
+    phrases.extend(fillers)
+    return list(dict.fromkeys(phrase for phrase in phrases if is_static_phrase(phrase)))
+
+
+class RateLimiter:
+    """Spaces out the starts of provider requests to at most `requests_per_second`."""
+
+    def __init__(self, requests_per_second: Optional[float] = None):
+        self.interval = 1 / requests_per_second if requests_per_second else 0.0
+        self.next_start = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class RetryPolicy:
+    """Exponential backoff between attempts: `backoff_factor * 2 ** attempt` seconds, capped at `max_backoff`."""
+
+    def __init__(self, retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30.0):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+    def get_backoff(self, attempt: int) -> float:
+        return min(self.backoff_factor * (2**attempt), self.max_backoff)
+
+
+class PresynthesisReport:
+    def __init__(self):
+        self.synthesized: List[str] = []
+        self.cached: List[str] = []
+        # phrases a dry run would synthesize
+        self.pending: List[str] = []
+        self.failed: Dict[str, str] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "synthesized": self.synthesized,
+            "cached": self.cached,
+            "pending": self.pending,
+            "failed": self.failed,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.synthesized)} synthesized, {len(self.cached)} cached, "
+            f"{len(self.pending)} pending, {len(self.failed)} failed"
+        )
+
+
+async def presynthesize_phrases(
+    synthesizer: BaseSynthesizer,
+    phrases: Iterable[str],
+    max_concurrency: int = 4,
+    requests_per_second: Optional[float] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    dry_run: bool = False,
+    diff: bool = True,
+    logger: Optional[logging.Logger] = None,
+) -> PresynthesisReport:
+    """
+    Synthesizes `phrases` into the synthesizer's cache, `max_concurrency` at a time.
+
+    With `diff` only phrases missing from the cache are synthesized, otherwise all of them are
+    synthesized again. A `dry_run` only reports the phrases that would be synthesized.
+    """
+    logger = logger or logging.getLogger(__name__)
+    retry_policy = retry_policy or RetryPolicy()
+    rate_limiter = RateLimiter(requests_per_second)
+    report = PresynthesisReport()
+    phrases = list(dict.fromkeys(phrases))
+    if not synthesizer.can_presynthesize():
+        logger.warning(f"{type(synthesizer).__name__} has no audio cache, enable cache_audio to presynthesize")
+        report.failed = {phrase: "no audio cache" for phrase in phrases}
+        return report
+
+    to_synthesize = phrases
+    if diff:
+        is_cached = await asyncio.gather(
+            *(synthesizer.is_message_cached(BaseMessage(text=phrase)) for phrase in phrases)
+        )
+        report.cached = [phrase for phrase, cached in zip(phrases, is_cached) if cached]
+        to_synthesize = [phrase for phrase, cached in zip(phrases, is_cached) if not cached]
+    if dry_run:
+        report.pending = to_synthesize
+        return report
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def presynthesize(phrase: str):
+        async with semaphore:
+            for attempt in range(retry_policy.retries + 1):
+                await rate_limiter.wait()
+                try:
+                    await synthesizer.presynthesize(BaseMessage(text=phrase))
+                    report.synthesized.append(phrase)
+                    return
+                except Exception as e:
+                    if attempt == retry_policy.retries:
+                        logger.error(f"Failed to presynthesize {phrase!r}: {e}")
+                        report.failed[phrase] = str(e)
+                        return
+                    backoff = retry_policy.get_backoff(attempt)
+                    logger.warning(f"Presynthesizing {phrase!r} failed ({e}), retrying in {backoff}s")
+                    await asyncio.sleep(backoff)
+
+    await asyncio.gather(*(presynthesize(phrase) for phrase in to_synthesize))
+    return report
+
+
+async def presynthesize_script_file(path: str, args: argparse.Namespace) -> PresynthesisReport:
+    with open(path) as file:
+        script = json.load(file)
+    synthesizer_config = TypedModel.parse_obj(script["synthesizer_config"])
+    agent_config = TypedModel.parse_obj(script["agent_config"]) if "agent_config" in script else None
+    phrases = collect_phrases(
+        agent_config=agent_config,
+        synthesizer_config=synthesizer_config,
+        call_script=script.get("call_script"),
+        prompt_template=script.get("prompt_template"),
+        fillers=script.get("fillers", []),
+    )
+    synthesizer = SynthesizerFactory().create_synthesizer(synthesizer_config)
+    try:
+        return await presynthesize_phrases(
+            synthesizer,
+            phrases,
+            max_concurrency=args.max_concurrency,
+            requests_per_second=args.requests_per_second,
+            retry_policy=RetryPolicy(retries=args.retries, backoff_factor=args.backoff_factor),
+            dry_run=args.dry_run,
+            diff=not args.all,
+        )
+    finally:
+        await synthesizer.tear_down()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scripts", nargs="+", help="JSON files with a synthesizer config and call script")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--requests-per-second", type=float, default=None)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff-factor", type=float, default=0.5)
+    parser.add_argument("--dry-run", action="store_true", help="only list the phrases that would be synthesized")
+    parser.add_argument("--all", action="store_true", help="synthesize cached phrases again instead of the diff")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    reports = {path: (await presynthesize_script_file(path, args)).to_dict() for path in args.scripts}
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,3 @@
-import audioop
 import logging
 import aiohttp
 from pydub import AudioSegment
@@ -39,6 +38,9 @@ class RimeSynthesizer(BaseSynthesizer[RimeSynthesizerConfig]):
         self.sampling_rate = synthesizer_config.sampling_rate
         self.base_url = synthesizer_config.base_url
 
+    def get_api_base_url(self) -> Optional[str]:
+        return self.synthesizer_config.base_url
+
     async def create_speech(
         self,
         message: BaseMessage,
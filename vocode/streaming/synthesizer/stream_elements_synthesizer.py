@@ -32,6 +32,9 @@ class StreamElementsSynthesizer(BaseSynthesizer[StreamElementsSynthesizerConfig]
         super().__init__(synthesizer_config, aiohttp_session)
         self.voice = synthesizer_config.voice
 
+    def get_api_base_url(self) -> Optional[str]:
+        return self.TTS_ENDPOINT
+
     async def create_speech(
         self,
         message: BaseMessage,
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import aiohttp
+from fastapi import HTTPException
+from opentelemetry import metrics
+
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
+
+meter = metrics.get_meter(__name__)
+
+TWILIO_API_URL = "https://api.twilio.com"
+# Twilio answers 400 while the call isn't in progress yet, the others are transient too
+TWILIO_RECORDING_RETRY_STATUSES = {400, 429, 500, 502, 503, 504}
+
+recording_start_duration_hist = meter.create_histogram(
+    name="telephony.twilio.recording_start_duration",
+    unit="seconds",
+)
+recording_start_failures_counter = meter.create_counter(
+    name="telephony.twilio.recording_start_failures",
+    unit="1",
+)
+
+
+async def start_twilio_recording(
+        account_sid,
+        auth_token,
+        call_sid,
+        retries=3,
+        backoff_factor=0.1,
+        session: Optional[aiohttp.ClientSession] = None,
+):
+    url = f"{TWILIO_API_URL}/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}/Recordings.json"
+    auth = aiohttp.BasicAuth(login=account_sid, password=auth_token)
+    logger = logging.getLogger(__name__)
+    session = session or HTTPSessionPool.get_instance().get_session(TWILIO_API_URL)
+    attempt = 0
+    while attempt < retries:
+        try:
+            async with session.post(url, auth=auth) as response:
+                if response.status == 201:
+                    logger.info(f"Started recording for call {call_sid}")
+                    return await response.json()
+                elif response.status in TWILIO_RECORDING_RETRY_STATUSES:
+                    error_details = await response.text()
+                    logger.error(f"Attempt {attempt + 1}: Starting recording for call failed {call_sid} with error: {error_details}")
+                else:
+                    logger.error(f"Starting recording for call failed {call_sid} with unexpected status code {response.status}!")
+                    raise HTTPException(status_code=response.status, detail="Failed to start recording for call")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Attempt {attempt + 1}: Starting recording for call failed {call_sid} with error: {e!r}")
+        attempt += 1
+        if attempt < retries:
+            await asyncio.sleep(backoff_factor * (2 ** attempt))
+    raise Exception("Failed to start recording after several attempts")
+
+
+async def start_call_recording(
+        account_sid,
+        auth_token,
+        call_sid,
+        on_recording_failed: Optional[Callable[[Exception], Awaitable[None]]] = None,
+        logger: Optional[logging.Logger] = None,
+        **kwargs,
+) -> bool:
+    """
+    Starts the recording of a call, telling `on_recording_failed` when it couldn't be started
+    instead of raising, the call goes on without it. Returns whether the recording started.
+    """
+    logger = logger or logging.getLogger(__name__)
+    start = time.monotonic()
+    try:
+        await start_twilio_recording(account_sid, auth_token, call_sid, **kwargs)
+    except Exception as e:
+        recording_start_failures_counter.add(1)
+        logger.exception(f"Could not start recording for call {call_sid}")
+        if on_recording_failed is not None:
+            await on_recording_failed(e)
+        return False
+    # measured apart from the conversation, which doesn't wait for the recording to start
+    recording_start_duration_hist.record(time.monotonic() - start)
+    return True
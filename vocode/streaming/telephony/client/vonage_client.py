@@ -5,6 +5,7 @@ from vocode.streaming.telephony.client.base_telephony_client import BaseTelephon
 import vonage
 
 from vocode.streaming.telephony.constants import VONAGE_CONTENT_TYPE
+from vocode.streaming.telephony.server.workers import get_call_base_url
 
 
 class VonageClient(BaseTelephonyClient):
@@ -97,7 +98,7 @@ class VonageClient(BaseTelephonyClient):
                 "endpoint": [
                     {
                         "type": "websocket",
-                        "uri": f"wss://{base_url}/connect_call/{conversation_id}",
+                        "uri": f"wss://{get_call_base_url(base_url)}/connect_call/{conversation_id}",
                         "content-type": VONAGE_CONTENT_TYPE,
                         "headers": {},
                     }
@@ -16,7 +16,11 @@ class BaseConfigManager:
     async def get_inbound_dialog_state(self, phone: str) -> Optional[dict]:
         raise NotImplementedError
 
-
+    async def save_config_and_log_call_state(
+        self, conversation_id: str, config: BaseCallConfig, telephony_id: str, state: str, **kwargs
+    ):
+        await self.save_config(conversation_id, config)
+        await self.log_call_state(telephony_id, state, **kwargs)
 
     async def log_call_state(self, telephony_id: str, state: str, **kwargs):
-        pass
\ No newline at end of file
+        pass
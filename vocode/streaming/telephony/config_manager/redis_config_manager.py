@@ -3,131 +3,187 @@ import json
 import logging
 import os
 import time
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
 
-from redis.asyncio import Redis
-from redis.exceptions import ConnectionError
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.connection import SSLConnection
+from redis.exceptions import ConnectionError, TimeoutError
 
 from vocode.streaming.models.telephony import BaseCallConfig
 from vocode.streaming.telephony.config_manager.base_config_manager import (
     BaseConfigManager,
 )
 
+CONFIG_TTL_SECONDS = 60 * 60
+CALL_STATE_TTL_SECONDS = 60 * 60 * 24 * 7
+
+ResultType = TypeVar("ResultType")
+
+
+class LocalConfigCache:
+    """Raw configs this process wrote or read recently, expiring after `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, raw_config = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        return raw_config
+
+    def put(self, key: str, raw_config: str):
+        if len(self.entries) >= self.max_entries and key not in self.entries:
+            # dicts keep insertion order, the oldest entry goes first
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, raw_config)
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
 
 class RedisConfigManager(BaseConfigManager):
+    """
+    Call configs in Redis, read by the process serving the call's websocket.
+
+    All managers of a process share one connection pool. Commands are retried with bounded
+    exponential backoff only when the connection fails. With `local_cache_ttl_seconds` set,
+    configs are also kept in memory so a call connecting to the process that saved its config
+    doesn't wait for Redis.
+    """
 
-    def __init__(self, logger: Optional[logging.Logger] = None):
-        self._build_redis()
+    _connection_pools: Dict[Tuple, ConnectionPool] = {}
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        redis: Optional[Redis] = None,
+        retries: int = 3,
+        backoff_factor: float = 0.1,
+        max_backoff: float = 2.0,
+        local_cache_ttl_seconds: Optional[float] = None,
+    ):
         self.logger = logger or logging.getLogger(__name__)
+        self.redis = redis or Redis(connection_pool=self.get_connection_pool())
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.local_cache = LocalConfigCache(local_cache_ttl_seconds) if local_cache_ttl_seconds else None
 
-    def _build_redis(self):
-        self.redis = Redis(
+    @classmethod
+    def get_connection_pool(cls) -> ConnectionPool:
+        connection_kwargs = dict(
             host=os.environ.get("REDISHOST", "localhost"),
             port=int(os.environ.get("REDISPORT", 6379)),
             username=os.environ.get("REDISUSER", None),
             password=os.environ.get("REDISPASSWORD", None),
-            db=os.environ['REDISDB'],
-            decode_responses=True,
-            ssl=True,
+            db=int(os.environ["REDISDB"]),
         )
+        key = tuple(sorted(connection_kwargs.items()))
+        if key not in cls._connection_pools:
+            cls._connection_pools[key] = ConnectionPool(
+                connection_class=SSLConnection,
+                decode_responses=True,
+                **connection_kwargs,
+            )
+        return cls._connection_pools[key]
 
-    async def _reconnect_redis(self):
-        self.logger.info("Reconnecting to Redis.")
-        await self.redis.close()  # Close the existing connection
-        await self.redis.connection_pool.disconnect()  # Disconnect the connection pool
-        self._build_redis()
-        await self.redis.ping()
+    def get_backoff(self, attempt: int) -> float:
+        return min(self.backoff_factor * (2**attempt), self.max_backoff)
 
-    async def save_config(self, conversation_id: str, config: BaseCallConfig) -> None:
-        # FIXME: resolve blocking calls that might cause the error, try to use bigger timeout.
-        self.logger.debug(f"Saving config for {conversation_id}")
-        for attempt in range(3):  # Retry up to 3 times
+    async def _execute(self, description: str, command: Callable[[], Awaitable[ResultType]]) -> ResultType:
+        for attempt in range(self.retries):
             try:
-                await self.redis.setex(conversation_id, 60 * 60, config.json())
-            except ConnectionError as e:
-                self.logger.warning(f"Attempt {attempt + 1}: Connection error: {e}")
-                if attempt < 2:
-                    await self._reconnect_redis()
-                else:
-                    self.logger.error("Final attempt failed. Unable to get config.")
+                return await command()
+            except (ConnectionError, TimeoutError) as e:
+                if attempt == self.retries - 1:
+                    self.logger.error(f"Failed to {description} after {self.retries} attempts: {e}")
                     raise
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred: {e}")
-                raise
-            await asyncio.sleep(0.5)
+                backoff = self.get_backoff(attempt)
+                self.logger.warning(f"Attempt {attempt + 1} to {description} failed: {e}, retrying in {backoff}s")
+                # idle connections are likely broken too, the ones in use belong to other calls
+                await self.redis.connection_pool.disconnect(inuse_connections=False)
+                await asyncio.sleep(backoff)
+        raise ValueError("retries must be at least 1")
+
+    async def save_config(self, conversation_id: str, config: BaseCallConfig) -> None:
+        self.logger.debug(f"Saving config for {conversation_id}")
+        raw_config = config.json()
+        await self._execute(
+            f"save config for {conversation_id}",
+            lambda: self.redis.setex(conversation_id, CONFIG_TTL_SECONDS, raw_config),
+        )
+        if self.local_cache is not None:
+            self.local_cache.put(conversation_id, raw_config)
+
+    async def save_config_and_log_call_state(
+        self,
+        conversation_id: str,
+        config: BaseCallConfig,
+        telephony_id: str,
+        state: str,
+        **kwargs,
+    ) -> None:
+        self.logger.debug(f"Saving config for {conversation_id} with call state {state}")
+        raw_config = config.json()
+
+        async def save():
+            # one round trip for both writes
+            pipeline = self.redis.pipeline(transaction=False)
+            pipeline.setex(conversation_id, CONFIG_TTL_SECONDS, raw_config)
+            pipeline.setex(self.get_call_state_key(telephony_id, state), CALL_STATE_TTL_SECONDS, json.dumps(kwargs))
+            return await pipeline.execute()
+
+        await self._execute(f"save config for {conversation_id}", save)
+        if self.local_cache is not None:
+            self.local_cache.put(conversation_id, raw_config)
 
     async def get_config(self, conversation_id: str) -> Optional[BaseCallConfig]:
         self.logger.debug(f"Getting config for {conversation_id}")
-        for attempt in range(3):  # Retry up to 3 times
-            try:
-                raw_config = await self.redis.get(conversation_id)
-                if raw_config:
-                    return BaseCallConfig.parse_raw(raw_config)
-            except ConnectionError as e:
-                self.logger.warning(f"Attempt {attempt + 1}: Connection error: {e}")
-                if attempt < 2:
-                    await self._reconnect_redis()
-                else:
-                    self.logger.error("Final attempt failed. Unable to get config.")
-                    raise
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred: {e}")
-                raise
-            await asyncio.sleep(0.5)
+        raw_config = self.local_cache.get(conversation_id) if self.local_cache is not None else None
+        if raw_config is None:
+            raw_config = await self._execute(
+                f"get config for {conversation_id}",
+                lambda: self.redis.get(conversation_id),
+            )
+            if raw_config and self.local_cache is not None:
+                self.local_cache.put(conversation_id, raw_config)
+        if raw_config:
+            return BaseCallConfig.parse_raw(raw_config)
         return None
 
     async def delete_config(self, conversation_id):
         self.logger.debug(f"Deleting config for {conversation_id}")
-        for attempt in range(3):  # Retry up to 3 times
-            try:
-                await self.redis.delete(conversation_id)
-            except ConnectionError as e:
-                self.logger.warning(f"Attempt {attempt + 1}: Connection error: {e}")
-                if attempt < 2:
-                    await self._reconnect_redis()
-                else:
-                    self.logger.error("Final attempt failed. Unable to get config.")
-                    raise
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred: {e}")
-                raise
-            await asyncio.sleep(0.5)
+        if self.local_cache is not None:
+            self.local_cache.delete(conversation_id)
+        await self._execute(
+            f"delete config for {conversation_id}",
+            lambda: self.redis.delete(conversation_id),
+        )
 
     async def get_inbound_dialog_state(self, phone: str) -> Optional[dict]:
         self.logger.debug(f"Getting inbound dialog state for {phone}")
-        key = f"inbound_dialog_state:{phone}"
-        for attempt in range(3):  # Retry up to 3 times
-            try:
-                raw_state = await self.redis.get(key)
-                if raw_state:
-                    return json.loads(raw_state)
-                return None
-            except ConnectionError as e:
-                self.logger.warning(f"Attempt {attempt + 1}: Connection error: {e}")
-                if attempt < 2:
-                    await self._reconnect_redis()
-                else:
-                    self.logger.error("Final attempt failed. Unable to get config.")
-                    raise
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred: {e}")
-                raise
-            await asyncio.sleep(0.5)
+        raw_state = await self._execute(
+            f"get inbound dialog state for {phone}",
+            lambda: self.redis.get(f"inbound_dialog_state:{phone}"),
+        )
+        if raw_state:
+            return json.loads(raw_state)
+        return None
 
-    async def log_call_state(self, telephony_id: str, state: str, **kwargs):
+    @staticmethod
+    def get_call_state_key(telephony_id: str, state: str) -> str:
+        return f"call_state:{telephony_id}:{state}:{time.time()}"
 
-        for attempt in range(3):  # Retry up to 3 times
-            try:
-                await self.redis.setex(f"call_state:{telephony_id}:{state}:{time.time()}", 60 * 60 * 24 * 7,
-                                       json.dumps(kwargs))
-            except ConnectionError as e:
-                self.logger.warning(f"Attempt {attempt + 1}: Connection error: {e}")
-                if attempt < 2:
-                    await self._reconnect_redis()
-                else:
-                    self.logger.error("Final attempt failed. Unable to get config.")
-                    raise
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred: {e}")
-                raise
-            await asyncio.sleep(0.5)
+    async def log_call_state(self, telephony_id: str, state: str, **kwargs):
+        key = self.get_call_state_key(telephony_id, state)
+        await self._execute(
+            f"log call state {state} for {telephony_id}",
+            lambda: self.redis.setex(key, CALL_STATE_TTL_SECONDS, json.dumps(kwargs)),
+        )
@@ -21,6 +21,7 @@ from vocode.streaming.telephony.client.vonage_client import VonageClient
 from vocode.streaming.telephony.config_manager.base_config_manager import (
     BaseConfigManager,
 )
+from vocode.streaming.telephony.server.admission import AdmissionController, AdmissionRejected
 from vocode.streaming.utils import create_conversation_id
 
 
@@ -44,6 +45,8 @@ class OutboundCall:
             ] = None,
             # Keys to press when the call connects, see send_digits https://www.twilio.com/docs/voice/api/call-resource#create-a-call-resource
             output_to_speaker: bool = False,
+            # shared with the TelephonyServer of this process, so dialing backs off when it is overloaded
+            admission_controller: Optional[AdmissionController] = None,
     ):
         self.base_url = base_url
         self.to_phone = to_phone
@@ -72,6 +75,7 @@ class OutboundCall:
         self.synthesizer_config = self.create_synthesizer_config(synthesizer_config)
         self.telephony_id = None
         self.output_to_speaker = output_to_speaker
+        self.admission_controller = admission_controller
 
     def create_telephony_client(self) -> BaseTelephonyClient:
         if self.twilio_config is not None:
@@ -111,6 +115,10 @@ class OutboundCall:
 
     async def start(self):
         self.logger.debug("Starting outbound call")
+        if self.admission_controller is not None:
+            decision = self.admission_controller.admit_outbound(self.conversation_id)
+            if not decision.admitted:
+                raise AdmissionRejected(decision.detail)
         await self.telephony_client.initialize_client()  # FIXME: ugly hack, to make it async.
         # FIXME: not compatible with Vonage
         await self.telephony_client.validate_outbound_call(
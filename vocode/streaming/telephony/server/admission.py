@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from vocode.streaming.models.telephony import AdmissionConfig
+from vocode.streaming.telephony.server.workers import CallsTracker
+
+meter = metrics.get_meter(__name__)
+
+admission_decisions_counter = meter.create_counter(
+    name="telephony.admission.decisions",
+    unit="1",
+)
+
+
+def observe_event_loop_lag(options: CallbackOptions) -> Iterable[Observation]:
+    if AdmissionController.current is not None:
+        yield Observation(AdmissionController.current.loop_health_monitor.lag_ms)
+
+
+def observe_cpu(options: CallbackOptions) -> Iterable[Observation]:
+    if AdmissionController.current is not None:
+        yield Observation(AdmissionController.current.loop_health_monitor.cpu_percent)
+
+
+meter.create_observable_gauge(
+    name="telephony.admission.event_loop_lag",
+    callbacks=[observe_event_loop_lag],
+    unit="ms",
+)
+meter.create_observable_gauge(
+    name="telephony.admission.cpu",
+    callbacks=[observe_cpu],
+    unit="%",
+)
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+@dataclass
+class AdmissionDecision:
+    admitted: bool
+    # what limit was hit, e.g. "event_loop_lag", with the details of it
+    reason: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class LoopHealthMonitor:
+    """
+    Samples the event loop lag and the CPU use of the event loop thread, keeping the samples of the
+    last window. Executor threads are not counted, they don't delay the calls on the loop.
+    """
+
+    def __init__(self, sample_interval_seconds: float, window_seconds: float):
+        self.sample_interval_seconds = sample_interval_seconds
+        self.samples: Deque[Tuple[float, float]] = deque(
+            maxlen=max(int(window_seconds / sample_interval_seconds), 1)
+        )
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            wall_start = time.monotonic()
+            cpu_start = time.thread_time()
+            await asyncio.sleep(self.sample_interval_seconds)
+            elapsed = time.monotonic() - wall_start
+            lag_ms = max(elapsed - self.sample_interval_seconds, 0) * 1000
+            cpu_percent = (time.thread_time() - cpu_start) / elapsed * 100
+            self.samples.append((lag_ms, cpu_percent))
+
+    @property
+    def lag_ms(self) -> float:
+        return max((lag_ms for lag_ms, _ in self.samples), default=0.0)
+
+    @property
+    def cpu_percent(self) -> float:
+        return max((cpu_percent for _, cpu_percent in self.samples), default=0.0)
+
+
+class AdmissionController:
+    """
+    Decides whether this process takes a new call. A process whose event loop already lags, whose
+    CPU is saturated or which has too many calls rejects inbound calls and doesn't dial outbound ones,
+    adding a call would make every call in it stutter.
+    """
+
+    # the last started controller, observed by the loop health gauges
+    current: Optional["AdmissionController"] = None
+
+    def __init__(
+        self,
+        config: Optional[AdmissionConfig] = None,
+        calls_tracker: Optional[CallsTracker] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.config = config or AdmissionConfig()
+        self.calls_tracker = calls_tracker or CallsTracker.get_instance()
+        self.logger = logger or logging.getLogger(__name__)
+        self.loop_health_monitor = LoopHealthMonitor(
+            sample_interval_seconds=self.config.sample_interval_seconds,
+            window_seconds=self.config.health_window_seconds,
+        )
+        # dial times of the outbound calls whose websocket hasn't connected yet, in the order they were dialed
+        self.pending_outbound_calls: Dict[Any, float] = {}
+
+    async def start(self):
+        AdmissionController.current = self
+        self.loop_health_monitor.start()
+
+    async def stop(self):
+        if AdmissionController.current is self:
+            AdmissionController.current = None
+        await self.loop_health_monitor.stop()
+
+    def get_pending_outbound_calls(self) -> int:
+        window_start = time.monotonic() - self.config.outbound_dial_window_seconds
+        for call_key, dial_time in list(self.pending_outbound_calls.items()):
+            if dial_time >= window_start:
+                break
+            del self.pending_outbound_calls[call_key]
+        return len(self.pending_outbound_calls)
+
+    def outbound_call_connected(self, conversation_id: str):
+        """The call counts as active from now on, not as pending too."""
+        self.pending_outbound_calls.pop(conversation_id, None)
+
+    def get_saturation(self) -> Optional[Tuple[str, str]]:
+        """The limit the process is over and the details of it, None if it can take calls."""
+        # started lazily for servers created outside of a running loop without a startup event
+        self.loop_health_monitor.start()
+        config = self.config
+        if self.calls_tracker.draining:
+            return "draining", "the process is draining"
+        lag_ms = self.loop_health_monitor.lag_ms
+        if config.max_event_loop_lag_ms is not None and lag_ms > config.max_event_loop_lag_ms:
+            return "event_loop_lag", f"the event loop lags {lag_ms:.0f}ms"
+        cpu_percent = self.loop_health_monitor.cpu_percent
+        if config.max_cpu_percent is not None and cpu_percent > config.max_cpu_percent:
+            return "cpu", f"CPU at {cpu_percent:.0f}%"
+        expected_calls = self.calls_tracker.active_calls + self.get_pending_outbound_calls()
+        if config.max_active_calls is not None and expected_calls >= config.max_active_calls:
+            return "active_calls", f"{expected_calls} calls active or dialed"
+        return None
+
+    def decide(self, direction: str, saturation: Optional[Tuple[str, str]]) -> AdmissionDecision:
+        if saturation is None:
+            decision = AdmissionDecision(admitted=True)
+        else:
+            reason, detail = saturation
+            decision = AdmissionDecision(admitted=False, reason=reason, detail=detail)
+            self.logger.warning(f"Rejecting {direction} call: {detail}")
+        admission_decisions_counter.add(
+            1, {"direction": direction, "admitted": decision.admitted, "reason": decision.reason or ""}
+        )
+        return decision
+
+    def admit_inbound(self) -> AdmissionDecision:
+        return self.decide("inbound", self.get_saturation())
+
+    def admit_outbound(self, conversation_id: Optional[str] = None) -> AdmissionDecision:
+        saturation = self.get_saturation()
+        pending_outbound_calls = self.get_pending_outbound_calls()
+        if (
+            saturation is None
+            and self.config.max_pending_outbound_calls is not None
+            and pending_outbound_calls >= self.config.max_pending_outbound_calls
+        ):
+            saturation = (
+                "pending_outbound_calls",
+                f"{pending_outbound_calls} outbound calls dialed in the last "
+                f"{self.config.outbound_dial_window_seconds:.0f}s",
+            )
+        decision = self.decide("outbound", saturation)
+        if decision.admitted:
+            # without a conversation ID the call stays pending for the whole window
+            call_key = conversation_id if conversation_id is not None else object()
+            self.pending_outbound_calls[call_key] = time.monotonic()
+        return decision
+
+    def get_stats(self) -> dict:
+        return {
+            "event_loop_lag_ms": self.loop_health_monitor.lag_ms,
+            "cpu_percent": self.loop_health_monitor.cpu_percent,
+            "active_calls": self.calls_tracker.active_calls,
+            "pending_outbound_calls": self.get_pending_outbound_calls(),
+            "draining": self.calls_tracker.draining,
+        }
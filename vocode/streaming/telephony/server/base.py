@@ -1,7 +1,7 @@
 import abc
 import logging
 from functools import partial
-from typing import List, Optional, Callable
+from typing import Awaitable, List, Optional, Callable
 
 from fastapi import APIRouter, Form, Request, Response
 from pydantic import BaseModel, Field
@@ -10,6 +10,7 @@ from vocode.streaming.models.agent import AgentConfig
 from vocode.streaming.models.events import RecordingEvent
 from vocode.streaming.models.synthesizer import SynthesizerConfig
 from vocode.streaming.models.telephony import (
+    AdmissionConfig,
     TwilioCallConfig,
     TwilioConfig,
     VonageCallConfig,
@@ -17,16 +18,21 @@ from vocode.streaming.models.telephony import (
 )
 from vocode.streaming.models.transcriber import TranscriberConfig
 from vocode.streaming.synthesizer.factory import SynthesizerFactory
+from vocode.streaming.synthesizer.greeting_presynthesis import GreetingPresynthesizer
 from vocode.streaming.telephony.client.twilio_client import TwilioClient
 from vocode.streaming.telephony.client.vonage_client import VonageClient
 from vocode.streaming.telephony.config_manager.base_config_manager import (
     BaseConfigManager,
 )
+from vocode.streaming.telephony.conversation.twilio_call import TwilioCall
+from vocode.streaming.telephony.server.admission import AdmissionController
 from vocode.streaming.telephony.server.router.calls import CallsRouter
+from vocode.streaming.telephony.server.workers import calls_stay_in_process
 from vocode.streaming.telephony.templater import Templater
 from vocode.streaming.transcriber.factory import TranscriberFactory
 from vocode.streaming.utils import create_conversation_id
 from vocode.streaming.utils.events_manager import EventsManager
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
 
 
 class AbstractInboundCallConfig(BaseModel, abc.ABC):
@@ -63,6 +69,10 @@ class TelephonyServer:
             logger: Optional[logging.Logger] = None,
             get_data: Optional[Callable] = None,
             setup_agent_config: Optional[Callable] = None,
+            admission_config: Optional[AdmissionConfig] = None,
+            on_recording_failed: Optional[Callable[[TwilioCall, Exception], Awaitable[None]]] = None,
+            # synthesizes the greeting of inbound calls before their media stream connects
+            presynthesize_greetings: bool = True,
     ):
         self.base_url = base_url
         self.logger = logger or logging.getLogger(__name__)
@@ -72,6 +82,15 @@ class TelephonyServer:
         self.events_manager = events_manager
         self.get_data = get_data
         self.setup_agent_config = setup_agent_config
+        self.synthesizer_factory = synthesizer_factory
+        if presynthesize_greetings and not calls_stay_in_process():
+            # another worker would serve the call and synthesize the greeting again
+            self.logger.warning("Not presynthesizing greetings, calls are not routed back to the worker answering them")
+            presynthesize_greetings = False
+        self.presynthesize_greetings = presynthesize_greetings
+        self.admission_controller = AdmissionController(admission_config, logger=self.logger)
+        self.router.add_event_handler("startup", self.admission_controller.start)
+        self.router.add_event_handler("shutdown", self.admission_controller.stop)
         self.calls_router = CallsRouter(
             base_url=base_url,
             config_manager=self.config_manager,
@@ -80,6 +99,8 @@ class TelephonyServer:
             synthesizer_factory=synthesizer_factory,
             events_manager=self.events_manager,
             logger=self.logger,
+            on_recording_failed=on_recording_failed,
+            admission_controller=self.admission_controller,
         )
         self.router.include_router(
             self.calls_router.get_router()
@@ -90,6 +111,8 @@ class TelephonyServer:
                 self.create_inbound_route(inbound_call_config=config),
                 methods=["POST"],
             )
+        # the pooled provider connections outlive calls, they are closed with the app
+        self.router.add_event_handler("shutdown", HTTPSessionPool.get_instance().close)
         # vonage requires an events endpoint
         self.router.add_api_route("/events", self.events, methods=["GET", "POST"])
         self.logger.info(f"Set up events endpoint at https://{self.base_url}/events")
@@ -105,6 +128,19 @@ class TelephonyServer:
         </Response>"""
         return Response(twiml, media_type="application/xml")
 
+    def get_busy_twiml(self):
+        twiml = """<?xml version="1.0" encoding="UTF-8"?>
+        <Response>
+            <Reject reason="busy"/>
+        </Response>"""
+        return Response(twiml, media_type="application/xml")
+
+    def get_overflow_twiml(self):
+        overflow_number = self.admission_controller.config.overflow_number
+        if overflow_number is not None:
+            return self.get_reroute_twiml(number_to_dial=overflow_number)
+        return self.get_busy_twiml()
+
     def create_inbound_route(
             self,
             inbound_call_config: AbstractInboundCallConfig,
@@ -115,6 +151,9 @@ class TelephonyServer:
                 twilio_from: str = Form(alias="From"),
                 twilio_to: str = Form(alias="To"),
         ) -> Response:
+            # rejected before any work is done for the call, a busy process answers late anyway
+            if not self.admission_controller.admit_inbound().admitted:
+                return self.get_overflow_twiml()
             # TODO: rewrite it. Not generic.
             transcriber_config = inbound_call_config.transcriber_config or TwilioCallConfig.default_transcriber_config()
             agent_config = inbound_call_config.agent_config
@@ -138,9 +177,22 @@ class TelephonyServer:
                 from_phone=twilio_from,
                 to_phone=twilio_to,
             )
+            if self.presynthesize_greetings:
+                # the conversation of a Twilio call is identified by the call SID
+                GreetingPresynthesizer.get_instance().start(
+                    twilio_sid, agent_config, synthesizer_config, synthesizer_factory=self.synthesizer_factory
+                )
             #
             conversation_id = create_conversation_id()
-            await self.config_manager.save_config(conversation_id, call_config)
+            await self.config_manager.save_config_and_log_call_state(
+                conversation_id,
+                call_config,
+                telephony_id=twilio_sid,
+                state="inbound",
+                conversation_id=conversation_id,
+                from_phone=twilio_from,
+                to_phone=twilio_to,
+            )
             return self.templater.get_connection_twiml(
                 base_url=self.base_url, call_id=conversation_id
             )
@@ -148,6 +200,8 @@ class TelephonyServer:
         async def vonage_route(
                 vonage_config: VonageConfig, vonage_answer_request: VonageAnswerRequest
         ):
+            if not self.admission_controller.admit_inbound().admitted:
+                return Response(status_code=503)
             call_config = VonageCallConfig(
                 transcriber_config=inbound_call_config.transcriber_config
                                    or VonageCallConfig.default_transcriber_config(),
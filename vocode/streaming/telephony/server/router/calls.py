@@ -1,9 +1,7 @@
 import asyncio
 import os
-import signal
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 import logging
-import aiohttp
 from fastapi import APIRouter, HTTPException, WebSocket
 from vocode.streaming.agent.factory import AgentFactory
 from vocode.streaming.models.telephony import (
@@ -12,6 +10,8 @@ from vocode.streaming.models.telephony import (
     VonageCallConfig,
 )
 from vocode.streaming.synthesizer.factory import SynthesizerFactory
+# start_twilio_recording stays importable from here
+from vocode.streaming.telephony.client.twilio_recording import start_call_recording, start_twilio_recording
 from vocode.streaming.telephony.config_manager.base_config_manager import (
     BaseConfigManager,
 )
@@ -19,33 +19,13 @@ from vocode.streaming.telephony.config_manager.base_config_manager import (
 from vocode.streaming.telephony.conversation.call import Call
 from vocode.streaming.telephony.conversation.twilio_call import TwilioCall
 from vocode.streaming.telephony.conversation.vonage_call import VonageCall
+from vocode.streaming.telephony.server.admission import AdmissionController
+from vocode.streaming.telephony.server.workers import CallsTracker
 from vocode.streaming.transcriber.factory import TranscriberFactory
 from vocode.streaming.utils.base_router import BaseRouter
 from vocode.streaming.utils.events_manager import EventsManager
 
 
-async def start_twilio_recording(account_sid, auth_token, call_sid, retries=3, backoff_factor=0.1):
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}/Recordings.json"
-    auth = aiohttp.BasicAuth(login=account_sid, password=auth_token)
-    logger = logging.getLogger(__name__)
-    attempt = 0
-    while attempt < retries:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, auth=auth) as response:
-                if response.status == 201:
-                    logger.info(f"Started recording for call {call_sid}")
-                    return await response.json()
-                elif response.status == 400:
-                    error_details = await response.text()
-                    logger.error(f"Attempt {attempt + 1}: Starting recording for call failed {call_sid} with error: {error_details}")
-                    attempt += 1
-                    await asyncio.sleep(backoff_factor * (2 ** attempt))
-                else:
-                    logger.error(f"Starting recording for call failed {call_sid} with unexpected status code {response.status}!")
-                    raise HTTPException(status_code=response.status, detail="Failed to start recording for call")
-    raise Exception("Failed to start recording after several attempts")
-
-
 class CallsRouter(BaseRouter):
     def __init__(
             self,
@@ -56,6 +36,10 @@ class CallsRouter(BaseRouter):
             synthesizer_factory: SynthesizerFactory = SynthesizerFactory(),
             events_manager: Optional[EventsManager] = None,
             logger: Optional[logging.Logger] = None,
+            # called when the recording of a call couldn't be started, the call goes on without it
+            on_recording_failed: Optional[Callable[[TwilioCall, Exception], Awaitable[None]]] = None,
+            # told when a dialed outbound call connects
+            admission_controller: Optional[AdmissionController] = None,
     ):
         super().__init__()
         self.base_url = base_url
@@ -65,10 +49,13 @@ class CallsRouter(BaseRouter):
         self.synthesizer_factory = synthesizer_factory
         self.events_manager = events_manager
         self.logger = logger or logging.getLogger(__name__)
+        self.on_recording_failed = on_recording_failed
+        self.admission_controller = admission_controller
         self.router = APIRouter()
         self.router.websocket("/connect_call/{id}")(self.connect_call)
         self.active_calls = 0
         self.calls_ran = 0
+        self.calls_tracker = CallsTracker.get_instance()
         max_calls = os.getenv("WORKER_MAX_CALLS", None)
         self.max_calls = int(max_calls) if max_calls is not None else None
         self.logger.info(f"Max calls: {self.max_calls}")
@@ -125,7 +112,22 @@ class CallsRouter(BaseRouter):
         else:
             raise ValueError(f"Unknown call config type {call_config.type}")
 
+    async def start_recording(self, call: TwilioCall):
+        async def on_recording_failed(e: Exception):
+            if self.on_recording_failed is not None:
+                await self.on_recording_failed(call, e)
+
+        await start_call_recording(
+            call.twilio_config.account_sid,
+            call.twilio_config.auth_token,
+            call.twilio_sid,
+            on_recording_failed=on_recording_failed,
+            logger=self.logger,
+        )
+
     async def connect_call(self, websocket: WebSocket, id: str):
+        call_started = False
+        recording_task: Optional[asyncio.Task] = None
         try:
             self.logger.info("Opening Phone WS for chat {}".format(id))
             await websocket.accept()
@@ -136,6 +138,10 @@ class CallsRouter(BaseRouter):
                 raise HTTPException(status_code=400, detail="No active phone call")
             self.active_calls += 1
             self.calls_ran += 1
+            self.calls_tracker.call_started()
+            call_started = True
+            if self.admission_controller is not None:
+                self.admission_controller.outbound_call_connected(id)
             call = self._from_call_config(
                 base_url=self.base_url,
                 call_config=call_config,
@@ -148,17 +154,21 @@ class CallsRouter(BaseRouter):
                 logger=self.logger,
             )
             self.logger.info(f"Call: {call}")
-            self.logger.info("starting recording")
-            await start_twilio_recording(call.twilio_config.account_sid, call.twilio_config.auth_token, call.twilio_sid)
+            if isinstance(call, TwilioCall):
+                self.logger.info("starting recording")
+                recording_task = asyncio.create_task(self.start_recording(call))
 
             await call.attach_ws_and_start(websocket)
             self.logger.debug("Phone WS connection closed for chat {}".format(id))
         finally:
-            self.active_calls -= 1
+            if recording_task is not None and not recording_task.done():
+                recording_task.cancel()
+            if call_started:
+                self.active_calls -= 1
+                self.calls_tracker.call_finished()
             if self.max_calls is not None and self.calls_ran >= self.max_calls:
-                self.logger.info("Max calls reached, shutting down")
-                # Graceful shutdown must be implemented in FASTAPI to avoid killing active calls.
-                os.kill(os.getpid(), signal.SIGTERM)
+                # the other calls of this process are finished before it exits
+                self.calls_tracker.request_drain(f"max calls {self.max_calls} reached")
 
     def get_router(self) -> APIRouter:
         return self.router
@@ -0,0 +1,434 @@
+"""
+Serving a telephony app from several processes without cutting calls off.
+
+Call configs are stored by the config manager, so whichever process accepts a call's websocket can
+serve it. The supervisor binds the socket once and runs one uvicorn server per worker process on it.
+A worker that is told to stop, or that reached its call or memory limit, drains: it stops accepting
+connections, which then go to its siblings, waits for its active calls to end and exits. The
+supervisor starts its replacement as soon as it starts draining.
+
+With call-aware routing every worker also listens on a port of its own and the TwiML or NCCO it
+returns points the call's websocket there, so the call is served by the process that accepted its
+webhook and already holds its state, e.g. the presynthesized greeting. `--worker-url` is the public
+address of these ports, the `{port}` of the worker is filled in:
+
+    python -m vocode.streaming.telephony.server.workers main:app --workers 4 --max-calls-per-worker 200 \
+        --worker-base-port 3100 --worker-url "calls.example.com:{port}"
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import uvicorn
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+meter = metrics.get_meter(__name__)
+
+DEFAULT_DRAIN_TIMEOUT_SECONDS = 60 * 60
+DEFAULT_CHECK_INTERVAL_SECONDS = 5.0
+# set in the worker processes of a WorkerSupervisor
+WORKER_PROCESS_ENV = "VOCODE_WORKER_PROCESS"
+# the public address of the worker's own port, set in the worker processes with call-aware routing
+WORKER_BASE_URL_ENV = "VOCODE_WORKER_BASE_URL"
+
+
+def get_call_base_url(base_url: str) -> str:
+    """Where the websocket of a call accepted by this process connects to, its worker's own port if it has one."""
+    return os.environ.get(WORKER_BASE_URL_ENV) or base_url
+
+
+def calls_stay_in_process() -> bool:
+    """
+    Whether the websocket of a call accepted by this process connects to this process too, so state
+    kept in memory for the call can be used. Workers only get their calls back with call-aware routing.
+    """
+    return os.environ.get(WORKER_PROCESS_ENV) is None or os.environ.get(WORKER_BASE_URL_ENV) is not None
+
+
+def get_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # peak instead of current outside of Linux, kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class CallsTracker:
+    """
+    Calls of this process, counted by every CallsRouter in it. Once draining, the process finishes
+    its active calls and exits: through `drain_handler` when a worker server runs it, otherwise by
+    sending itself SIGTERM when the last call ends.
+    """
+
+    _instance: Optional["CallsTracker"] = None
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.active_calls = 0
+        self.calls_ran = 0
+        self.draining = False
+        self.drain_handler: Optional[Callable[[str], None]] = None
+
+    @classmethod
+    def get_instance(cls) -> "CallsTracker":
+        if cls._instance is None:
+            cls._instance = cls()
+            meter.create_observable_gauge(
+                name="telephony.worker.active_calls",
+                callbacks=[cls._instance.observe_active_calls],
+                unit="1",
+            )
+        return cls._instance
+
+    def observe_active_calls(self, options: CallbackOptions) -> Iterable[Observation]:
+        yield Observation(self.active_calls, {"pid": os.getpid(), "draining": self.draining})
+
+    def call_started(self):
+        self.active_calls += 1
+        self.calls_ran += 1
+
+    def call_finished(self):
+        self.active_calls -= 1
+
+    def request_drain(self, reason: str):
+        if self.draining:
+            return
+        self.draining = True
+        self.logger.info(f"Draining {self.active_calls} active calls: {reason}")
+        if self.drain_handler is not None:
+            self.drain_handler(reason)
+        else:
+            asyncio.create_task(self.drain_and_exit())
+
+    async def wait_for_calls(self, timeout: Optional[float] = None, poll_interval: float = 0.5) -> bool:
+        """Waits until no call is active, returns False if `timeout` passed first."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.active_calls > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_interval)
+        return True
+
+    async def drain_and_exit(self):
+        await self.wait_for_calls()
+        self.logger.info("All calls finished, shutting down")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+class WorkerRecyclePolicy:
+    """When a worker should be replaced by a fresh process, None disables a limit."""
+
+    def __init__(self, max_calls: Optional[int] = None, max_memory_mb: Optional[float] = None):
+        self.max_calls = max_calls
+        self.max_memory_mb = max_memory_mb
+
+    def get_recycle_reason(self, calls_tracker: CallsTracker) -> Optional[str]:
+        if self.max_calls is not None and calls_tracker.calls_ran >= self.max_calls:
+            return f"ran {calls_tracker.calls_ran} calls, the limit is {self.max_calls}"
+        if self.max_memory_mb is not None:
+            rss_mb = get_rss_mb()
+            if rss_mb >= self.max_memory_mb:
+                return f"uses {rss_mb:.0f}MB, the limit is {self.max_memory_mb:.0f}MB"
+        return None
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    A uvicorn server that drains instead of shutting down right away, uvicorn's own shutdown closes
+    the call websockets. A second SIGINT or SIGTERM shuts it down without waiting.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        calls_tracker: Optional[CallsTracker] = None,
+        recycle_policy: Optional[WorkerRecyclePolicy] = None,
+        drain_timeout_seconds: float = DEFAULT_DRAIN_TIMEOUT_SECONDS,
+        status_queue: Optional[Any] = None,
+        check_interval_seconds: float = DEFAULT_CHECK_INTERVAL_SECONDS,
+        worker_socket: Optional[socket.socket] = None,
+    ):
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+        self.calls_tracker = calls_tracker or CallsTracker.get_instance()
+        self.recycle_policy = recycle_policy or WorkerRecyclePolicy()
+        self.drain_timeout_seconds = drain_timeout_seconds
+        self.status_queue = status_queue
+        self.check_interval_seconds = check_interval_seconds
+        # the worker's own listening socket, calls it accepted may still connect to it while draining
+        self.worker_socket = worker_socket
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.drain_task: Optional[asyncio.Task] = None
+        self.monitor_task: Optional[asyncio.Task] = None
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        self.loop = asyncio.get_running_loop()
+        self.calls_tracker.drain_handler = self.start_drain
+        self.monitor_task = asyncio.create_task(self.monitor())
+
+    def handle_exit(self, sig: int, frame) -> None:
+        if self.loop is None or self.calls_tracker.draining:
+            super().handle_exit(sig, frame)
+            return
+        self.loop.call_soon_threadsafe(self.calls_tracker.request_drain, f"received signal {sig}")
+
+    def report_status(self, *status):
+        if self.status_queue is not None:
+            self.status_queue.put((os.getpid(), *status))
+
+    def start_drain(self, reason: str):
+        self.drain_task = asyncio.create_task(self.drain(reason))
+
+    async def drain(self, reason: str):
+        self.logger.info(f"Worker {os.getpid()} stops accepting connections: {reason}")
+        self.report_status("draining")
+        # the listening socket stays open in the other workers, new calls connect to them
+        worker_address = self.worker_socket.getsockname() if self.worker_socket is not None else None
+        for server in self.servers:
+            if worker_address is None or not any(
+                server_socket.getsockname() == worker_address for server_socket in server.sockets
+            ):
+                server.close()
+        if not await self.calls_tracker.wait_for_calls(self.drain_timeout_seconds):
+            self.logger.warning(
+                f"{self.calls_tracker.active_calls} calls still active after {self.drain_timeout_seconds}s, exiting"
+            )
+        self.should_exit = True
+
+    async def monitor(self):
+        while not self.should_exit:
+            self.report_status("stats", self.calls_tracker.active_calls, self.calls_tracker.calls_ran, get_rss_mb())
+            if not self.calls_tracker.draining:
+                reason = self.recycle_policy.get_recycle_reason(self.calls_tracker)
+                if reason is not None:
+                    self.calls_tracker.request_drain(reason)
+            await asyncio.sleep(self.check_interval_seconds)
+
+
+def run_worker(
+    app: str,
+    sock: socket.socket,
+    uvicorn_kwargs: Dict[str, Any],
+    recycle_policy: WorkerRecyclePolicy,
+    drain_timeout_seconds: float,
+    status_queue: Any,
+    worker_sock: Optional[socket.socket] = None,
+    worker_base_url: Optional[str] = None,
+):
+    # read once the app is imported
+    os.environ[WORKER_PROCESS_ENV] = "1"
+    if worker_base_url is not None:
+        os.environ[WORKER_BASE_URL_ENV] = worker_base_url
+    config = uvicorn.Config(app, **uvicorn_kwargs)
+    server = DrainingServer(
+        config,
+        recycle_policy=recycle_policy,
+        drain_timeout_seconds=drain_timeout_seconds,
+        status_queue=status_queue,
+        worker_socket=worker_sock,
+    )
+    server.run(sockets=[sock] if worker_sock is None else [sock, worker_sock])
+
+
+class WorkerSupervisor:
+    """
+    Keeps `workers` processes accepting calls and drains them all on SIGINT or SIGTERM.
+
+    With `worker_base_port` and `worker_url` every worker gets a slot and listens on
+    `worker_base_port + slot` too. A slot is reused once its worker exited, a draining worker keeps
+    its slot so calls it accepted can still connect to it.
+    """
+
+    def __init__(
+        self,
+        app: str,
+        host: str = "0.0.0.0",
+        port: int = 3000,
+        workers: Optional[int] = None,
+        recycle_policy: Optional[WorkerRecyclePolicy] = None,
+        drain_timeout_seconds: float = DEFAULT_DRAIN_TIMEOUT_SECONDS,
+        uvicorn_kwargs: Optional[Dict[str, Any]] = None,
+        logger: Optional[logging.Logger] = None,
+        worker_base_port: Optional[int] = None,
+        worker_url: Optional[str] = None,
+    ):
+        if (worker_base_port is None) != (worker_url is None):
+            raise ValueError("Call-aware routing needs both worker_base_port and worker_url")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.recycle_policy = recycle_policy or WorkerRecyclePolicy()
+        self.drain_timeout_seconds = drain_timeout_seconds
+        self.uvicorn_kwargs = uvicorn_kwargs or {}
+        self.logger = logger or logging.getLogger(__name__)
+        self.context = multiprocessing.get_context("spawn")
+        self.status_queue = self.context.Queue()
+        self.processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self.draining: Set[int] = set()
+        self.worker_stats: Dict[int, Dict[str, float]] = {}
+        self.should_exit = False
+        self.sock: Optional[socket.socket] = None
+        self.worker_base_port = worker_base_port
+        self.worker_url = worker_url
+        # slot of every worker and the listening sockets of the slots, with call-aware routing
+        self.slots: Dict[int, int] = {}
+        self.worker_socks: Dict[int, socket.socket] = {}
+
+    def bind_socket(self, port: Optional[int] = None) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port if port is None else port))
+        sock.listen(self.uvicorn_kwargs.get("backlog", 2048))
+        sock.set_inheritable(True)
+        return sock
+
+    def get_free_slot(self) -> int:
+        slot = 0
+        while slot in self.slots.values():
+            slot += 1
+        return slot
+
+    def spawn_worker(self):
+        routing_kwargs: Dict[str, Any] = {}
+        slot = None
+        if self.worker_base_port is not None and self.worker_url is not None:
+            slot = self.get_free_slot()
+            port = self.worker_base_port + slot
+            if slot not in self.worker_socks:
+                # kept open by the supervisor, connections wait in the backlog until the worker accepts them
+                self.worker_socks[slot] = self.bind_socket(port)
+            routing_kwargs = dict(
+                worker_sock=self.worker_socks[slot],
+                worker_base_url=self.worker_url.format(port=port, slot=slot),
+            )
+        process = self.context.Process(
+            target=run_worker,
+            kwargs=dict(
+                app=self.app,
+                sock=self.sock,
+                uvicorn_kwargs=self.uvicorn_kwargs,
+                recycle_policy=self.recycle_policy,
+                drain_timeout_seconds=self.drain_timeout_seconds,
+                status_queue=self.status_queue,
+                **routing_kwargs,
+            ),
+        )
+        process.start()
+        self.processes[process.pid] = process
+        if slot is not None:
+            self.slots[process.pid] = slot
+        self.logger.info(f"Started worker {process.pid}" + (f" in slot {slot}" if slot is not None else ""))
+
+    def handle_status_messages(self):
+        while True:
+            try:
+                pid, status, *values = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            if status == "draining":
+                self.logger.info(f"Worker {pid} is draining")
+                self.draining.add(pid)
+            elif status == "stats":
+                active_calls, calls_ran, rss_mb = values
+                self.worker_stats[pid] = {"active_calls": active_calls, "calls_ran": calls_ran, "rss_mb": rss_mb}
+
+    def reap_workers(self):
+        for pid, process in list(self.processes.items()):
+            if not process.is_alive():
+                self.logger.info(f"Worker {pid} exited with code {process.exitcode}")
+                del self.processes[pid]
+                self.slots.pop(pid, None)
+                self.draining.discard(pid)
+                self.worker_stats.pop(pid, None)
+
+    def get_stats(self) -> Dict[int, Dict[str, Any]]:
+        return {
+            pid: {**self.worker_stats.get(pid, {}), "draining": pid in self.draining}
+            for pid in self.processes
+        }
+
+    def handle_exit(self, sig: int, frame):
+        if self.should_exit:
+            self.logger.info("Stopping workers without waiting for their calls")
+            for process in self.processes.values():
+                process.kill()
+            return
+        self.logger.info(f"Received signal {sig}, draining all workers")
+        self.should_exit = True
+        for pid in self.processes:
+            if pid not in self.draining:
+                os.kill(pid, signal.SIGTERM)
+
+    def run(self):
+        self.sock = self.bind_socket()
+        signal.signal(signal.SIGINT, self.handle_exit)
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        self.logger.info(f"Serving {self.app} on {self.host}:{self.port} with {self.workers} workers")
+        while True:
+            self.handle_status_messages()
+            self.reap_workers()
+            if self.should_exit:
+                if not self.processes:
+                    break
+            else:
+                # draining workers still serve their calls, but their replacements accept the new ones
+                while len(self.processes) - len(self.draining & self.processes.keys()) < self.workers:
+                    self.spawn_worker()
+            time.sleep(0.2)
+        self.sock.close()
+        for worker_sock in self.worker_socks.values():
+            worker_sock.close()
+        self.logger.info("All workers exited")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves a telephony app from several draining worker processes.")
+    parser.add_argument("app", help="Import string of the ASGI app, e.g. main:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to the number of cores")
+    parser.add_argument("--max-calls-per-worker", type=int, default=None)
+    parser.add_argument("--max-memory-mb", type=float, default=None)
+    parser.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT_SECONDS)
+    parser.add_argument("--worker-base-port", type=int, default=None, help="First port of the workers' own ports")
+    parser.add_argument(
+        "--worker-url",
+        default=None,
+        help="Public address of a worker's own port, e.g. calls.example.com:{port}, enables call-aware routing",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    WorkerSupervisor(
+        app=args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        recycle_policy=WorkerRecyclePolicy(max_calls=args.max_calls_per_worker, max_memory_mb=args.max_memory_mb),
+        drain_timeout_seconds=args.drain_timeout,
+        worker_base_port=args.worker_base_port,
+        worker_url=args.worker_url,
+    ).run()
+
+
+if __name__ == "__main__":
+    # the workers must share CallsTracker with the app, which imports this module by its name, not as __main__
+    from vocode.streaming.telephony.server.workers import main as workers_main
+
+    workers_main()
@@ -2,6 +2,8 @@ import os
 from jinja2 import Environment, FileSystemLoader
 from fastapi import Response
 
+from vocode.streaming.telephony.server.workers import get_call_base_url
+
 
 class Templater:
     def __init__(self):
@@ -15,6 +17,6 @@ class Templater:
 
     def get_connection_twiml(self, call_id: str, base_url: str):
         return Response(
-            self.render_template("connect_call.xml", base_url=base_url, id=call_id),
+            self.render_template("connect_call.xml", base_url=get_call_base_url(base_url), id=call_id),
             media_type="application/xml",
         )
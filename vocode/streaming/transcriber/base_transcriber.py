@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-import audioop
 from opentelemetry import trace, metrics
-from typing import Generic, TypeVar, Union
+from typing import Generic, List, TypeVar, Union
 from vocode.streaming.models.audio_encoding import AudioEncoding
 from vocode.streaming.models.model import BaseModel
 
 from vocode.streaming.models.transcriber import TranscriberConfig
+from vocode.streaming.utils.audio_codec import linear_to_ulaw
+from vocode.streaming.utils.audio_plan import AudioFormat
 from vocode.streaming.utils.worker import AsyncWorker, ThreadAsyncWorker
 
 
@@ -42,6 +43,9 @@ class AbstractTranscriber(Generic[TranscriberConfigType]):
     def get_transcriber_config(self) -> TranscriberConfigType:
         return self.transcriber_config
 
+    def get_supported_audio_formats(self) -> List[AudioFormat]:
+        return [AudioFormat(self.transcriber_config.sampling_rate, self.transcriber_config.audio_encoding)]
+
     async def ready(self):
         return True
 
@@ -50,7 +54,7 @@ class AbstractTranscriber(Generic[TranscriberConfigType]):
         if self.get_transcriber_config().audio_encoding == AudioEncoding.LINEAR16:
             return linear_audio
         elif self.get_transcriber_config().audio_encoding == AudioEncoding.MULAW:
-            return audioop.lin2ulaw(linear_audio, sample_width)
+            return linear_to_ulaw(linear_audio)
 
 
 class BaseAsyncTranscriber(AbstractTranscriber[TranscriberConfigType], AsyncWorker):
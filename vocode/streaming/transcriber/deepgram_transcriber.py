@@ -4,7 +4,6 @@ import logging
 from typing import Optional
 import websockets
 from websockets.client import WebSocketClientProtocol
-import audioop
 from urllib.parse import urlencode
 from vocode import getenv
 
@@ -21,6 +20,7 @@ from vocode.streaming.models.transcriber import (
     TimeEndpointingConfig,
 )
 from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_codec import Resampler
 import time
 
 PUNCTUATION_TERMINATORS = [".", "!", "?"]
@@ -62,6 +62,16 @@ class DeepgramTranscriber(BaseAsyncTranscriber[DeepgramTranscriberConfig]):
         self.is_ready = False
         self.logger = logger or logging.getLogger(__name__)
         self.audio_cursor = 0.0
+        self.downsampler: Optional[Resampler] = None
+        if (
+            self.transcriber_config.downsampling
+            and self.transcriber_config.audio_encoding == AudioEncoding.LINEAR16
+        ):
+            self.downsampler = Resampler(
+                self.transcriber_config.sampling_rate
+                * self.transcriber_config.downsampling,
+                self.transcriber_config.sampling_rate,
+            )
 
     async def _run_loop(self):
         restarts = 0
@@ -73,19 +83,8 @@ class DeepgramTranscriber(BaseAsyncTranscriber[DeepgramTranscriberConfig]):
             )
 
     def send_audio(self, chunk):
-        if (
-            self.transcriber_config.downsampling
-            and self.transcriber_config.audio_encoding == AudioEncoding.LINEAR16
-        ):
-            chunk, _ = audioop.ratecv(
-                chunk,
-                2,
-                1,
-                self.transcriber_config.sampling_rate
-                * self.transcriber_config.downsampling,
-                self.transcriber_config.sampling_rate,
-                None,
-            )
+        if self.downsampler is not None:
+            chunk = self.downsampler.resample(chunk)
         super().send_audio(chunk)
 
     def terminate(self):
@@ -1,11 +1,11 @@
 import asyncio
-import audioop
 import secrets
 import wave
 from string import ascii_letters, digits
 from typing import Any
 
 from ..models.audio_encoding import AudioEncoding
+from .audio_codec import AudioConverter, Resampler, linear_to_ulaw
 
 custom_alphabet = ascii_letters + digits + ".-_"
 
@@ -24,17 +24,12 @@ def prepare_audio_for_vad(
         output_sample_rate: int,
         input_encoding: str
 ):
-    # Decode mu-law to PCM if necessary
-    if input_encoding == AudioEncoding.MULAW:
-        input_audio = audioop.ulaw2lin(input_audio, 2)
-
-    # Resample the audio to 8kHz if necessary
-    if input_sample_rate != output_sample_rate:
-        input_audio, _ = audioop.ratecv(
-            input_audio, 2, 1, input_sample_rate, output_sample_rate, None
-        )
-
-    return input_audio
+    # stateless, streams should keep an AudioConverter instead so chunks are resampled seamlessly
+    return AudioConverter(
+        input_sample_rate=input_sample_rate,
+        output_sample_rate=output_sample_rate,
+        input_encoding=AudioEncoding(input_encoding),
+    ).convert(input_audio)
 
 
 def convert_linear_audio(
@@ -46,14 +41,12 @@ def convert_linear_audio(
 ):
     # downsample
     if input_sample_rate != output_sample_rate:
-        raw_wav, _ = audioop.ratecv(
-            raw_wav, 2, 1, input_sample_rate, output_sample_rate, None
-        )
+        raw_wav = Resampler(input_sample_rate, output_sample_rate).resample(raw_wav)
 
     if output_encoding == AudioEncoding.LINEAR16:
         return raw_wav
     elif output_encoding == AudioEncoding.MULAW:
-        return audioop.lin2ulaw(raw_wav, output_sample_width)
+        return linear_to_ulaw(raw_wav)
 
 
 def convert_wav(
@@ -0,0 +1,133 @@
+from math import gcd
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from vocode.streaming.models.audio_encoding import AudioEncoding
+
+# G.711 mu-law, bit-exact with audioop.lin2ulaw / audioop.ulaw2lin for 16-bit samples
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+_ULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+
+def _build_ulaw_decode_table() -> np.ndarray:
+    ulaw = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (ulaw >> 4) & 0x07
+    mantissa = ulaw & 0x0F
+    magnitude = (((mantissa << 3) + _ULAW_BIAS) << exponent) - _ULAW_BIAS
+    return np.where(ulaw & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def _build_ulaw_encode_table() -> np.ndarray:
+    # indexed by the 16-bit sample reinterpreted as unsigned
+    samples = np.arange(65536, dtype=np.int32)
+    samples = np.where(samples >= 32768, samples - 65536, samples) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    segment = np.searchsorted(_ULAW_SEGMENT_ENDS, magnitude)
+    ulaw = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    return (np.where(segment >= 8, 0x7F, ulaw) ^ mask).astype(np.uint8)
+
+
+ULAW_DECODE_TABLE = _build_ulaw_decode_table()
+ULAW_ENCODE_TABLE = _build_ulaw_encode_table()
+
+
+def ulaw_to_linear(ulaw_audio: bytes) -> bytes:
+    return ULAW_DECODE_TABLE[np.frombuffer(ulaw_audio, dtype=np.uint8)].tobytes()
+
+
+def linear_to_ulaw(linear_audio: bytes) -> bytes:
+    return ULAW_ENCODE_TABLE[np.frombuffer(linear_audio, dtype=np.uint16)].tobytes()
+
+
+class Resampler:
+    """
+    Linear-interpolation resampler for mono 16-bit audio that keeps its position and the last
+    input samples between chunks, so a stream resampled chunk by chunk is identical to the
+    whole stream resampled at once. Matches audioop.ratecv fed with its own returned state.
+    """
+
+    # streams send same-sized chunks, so only a few (position, chunk length) pairs ever occur
+    MAX_CACHED_INDEXES = 64
+
+    def __init__(self, input_sample_rate: int, output_sample_rate: int):
+        divisor = gcd(input_sample_rate, output_sample_rate)
+        self.input_sample_rate = input_sample_rate
+        self.output_sample_rate = output_sample_rate
+        self.input_step = input_sample_rate // divisor
+        self.output_step = output_sample_rate // divisor
+        self.indexes_cache: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.reset()
+
+    def reset(self):
+        # same fixed-point bookkeeping as audioop.ratecv: every input sample adds output_step
+        # to the position and every output sample subtracts input_step
+        self.position = -self.output_step
+        self.history = np.zeros(2, dtype=np.int64)
+
+    def _get_indexes(self, num_samples: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        key = (self.position, num_samples)
+        if key not in self.indexes_cache:
+            if len(self.indexes_cache) >= self.MAX_CACHED_INDEXES:
+                self.indexes_cache.clear()
+            # output j is produced right after the input sample that brings the position to >= 0,
+            # interpolating between that sample and the one before it
+            final_position = self.position + num_samples * self.output_step
+            output_indexes = np.arange(max(final_position // self.input_step + 1, 0), dtype=np.int64)
+            reads = -((self.position - output_indexes * self.input_step) // self.output_step)
+            previous_weights = self.position + reads * self.output_step - output_indexes * self.input_step
+            self.indexes_cache[key] = (reads, previous_weights, self.output_step - previous_weights)
+        return self.indexes_cache[key]
+
+    def resample(self, audio: bytes) -> bytes:
+        if self.input_step == self.output_step:
+            return audio
+        if len(audio) == 0:
+            return b""
+        samples = np.frombuffer(audio, dtype=np.int16)
+        reads, previous_weights, current_weights = self._get_indexes(len(samples))
+        history = np.concatenate((self.history, samples))
+        # audioop interpolates in 32-bit and truncates, which is a floor division at 16 bits
+        # since output_step is far below 2 ** 16
+        output = (history[reads] * previous_weights + history[reads + 1] * current_weights) // self.output_step
+
+        self.position += len(samples) * self.output_step - len(reads) * self.input_step
+        self.history = history[-2:]
+        return output.astype(np.int16).tobytes()
+
+
+class AudioConverter:
+    """
+    Per-stream transcoder between mono audio formats: decodes mu-law, resamples with a
+    persistent Resampler and encodes to the output encoding. Chunks must be passed in order.
+    """
+
+    def __init__(
+        self,
+        input_sample_rate: int,
+        output_sample_rate: int,
+        input_encoding: AudioEncoding = AudioEncoding.LINEAR16,
+        output_encoding: AudioEncoding = AudioEncoding.LINEAR16,
+    ):
+        self.decode_ulaw = input_encoding == AudioEncoding.MULAW
+        self.encode_ulaw = output_encoding == AudioEncoding.MULAW
+        self.resampler: Optional[Resampler] = None
+        if input_sample_rate != output_sample_rate:
+            self.resampler = Resampler(input_sample_rate, output_sample_rate)
+
+    def convert(self, audio: bytes) -> bytes:
+        if self.decode_ulaw:
+            if self.resampler is None and self.encode_ulaw:
+                return audio
+            audio = ulaw_to_linear(audio)
+        if self.resampler is not None:
+            audio = self.resampler.resample(audio)
+        if self.encode_ulaw:
+            return linear_to_ulaw(audio)
+        return audio
+
+    def reset(self):
+        if self.resampler is not None:
+            self.resampler.reset()
@@ -0,0 +1,157 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+from vocode.streaming.models.audio_encoding import AudioEncoding
+from vocode.streaming.utils.audio_codec import AudioConverter
+
+
+class AudioFormat(NamedTuple):
+    sampling_rate: int
+    audio_encoding: AudioEncoding
+    # set for compressed formats (e.g. "mp3") that have to be decoded to `audio_encoding` first
+    codec: Optional[str] = None
+
+    def __str__(self) -> str:
+        name = f"{self.audio_encoding.value}@{self.sampling_rate}Hz"
+        return f"{self.codec}->{name}" if self.codec else name
+
+
+class AudioConversion(NamedTuple):
+    stage: str
+    source: AudioFormat
+    target: AudioFormat
+
+    @property
+    def steps(self) -> List[str]:
+        steps = []
+        if self.source.codec:
+            steps.append(f"decode {self.source.codec}")
+        if self.source.audio_encoding != self.target.audio_encoding:
+            if self.source.audio_encoding == AudioEncoding.MULAW:
+                steps.append("decode mulaw")
+        if self.source.sampling_rate != self.target.sampling_rate:
+            steps.append(f"resample {self.source.sampling_rate}->{self.target.sampling_rate}")
+        if self.source.audio_encoding != self.target.audio_encoding:
+            if self.target.audio_encoding == AudioEncoding.MULAW:
+                steps.append("encode mulaw")
+        return steps
+
+    @property
+    def is_passthrough(self) -> bool:
+        return not self.steps
+
+    def create_converter(self) -> Optional[AudioConverter]:
+        """Returns the streaming converter for this stage, None when the audio passes through as-is."""
+        if self.is_passthrough:
+            return None
+        if self.source.codec:
+            raise ValueError(f"{self.stage}: {self.source.codec} has to be decoded by the synthesizer")
+        return AudioConverter(
+            input_sample_rate=self.source.sampling_rate,
+            output_sample_rate=self.target.sampling_rate,
+            input_encoding=self.source.audio_encoding,
+            output_encoding=self.target.audio_encoding,
+        )
+
+    def __str__(self) -> str:
+        steps = ", ".join(self.steps) if self.steps else "passthrough"
+        return f"{self.stage}: {self.source} -> {self.target} ({steps})"
+
+
+class AudioPipelinePlan:
+    """
+    The audio formats chosen for every component of a conversation and the conversions between them.
+
+    Outbound, the synthesizer requests `provider_format` from its provider and converts it to
+    `output_format`, which the output device plays as-is. Inbound, audio arrives in `input_format`,
+    is converted to `vad_format` when VAD is used and then to `transcriber_format`.
+    """
+
+    def __init__(
+        self,
+        provider_format: AudioFormat,
+        output_format: AudioFormat,
+        input_format: AudioFormat,
+        transcriber_format: AudioFormat,
+        vad_format: Optional[AudioFormat] = None,
+    ):
+        self.provider_format = provider_format
+        self.output_format = output_format
+        self.input_format = input_format
+        self.transcriber_format = transcriber_format
+        self.vad_format = vad_format
+
+    @property
+    def synthesizer_conversion(self) -> AudioConversion:
+        return AudioConversion("synthesizer", self.provider_format, self.output_format)
+
+    @property
+    def vad_conversion(self) -> Optional[AudioConversion]:
+        if self.vad_format is None:
+            return None
+        return AudioConversion("vad", self.input_format, self.vad_format)
+
+    @property
+    def transcriber_conversion(self) -> AudioConversion:
+        source = self.vad_format if self.vad_format is not None else self.input_format
+        return AudioConversion("transcriber", source, self.transcriber_format)
+
+    @property
+    def conversions(self) -> List[AudioConversion]:
+        conversions = [self.synthesizer_conversion]
+        if self.vad_conversion is not None:
+            conversions.append(self.vad_conversion)
+        conversions.append(self.transcriber_conversion)
+        return conversions
+
+    @property
+    def num_conversion_steps(self) -> int:
+        return sum(len(conversion.steps) for conversion in self.conversions)
+
+    def describe(self) -> str:
+        return "; ".join(str(conversion) for conversion in self.conversions)
+
+    def to_dict(self) -> dict:
+        return {
+            "provider_format": str(self.provider_format),
+            "output_format": str(self.output_format),
+            "input_format": str(self.input_format),
+            "vad_format": str(self.vad_format) if self.vad_format is not None else None,
+            "transcriber_format": str(self.transcriber_format),
+            "conversions": [str(conversion) for conversion in self.conversions],
+            "num_conversion_steps": self.num_conversion_steps,
+        }
+
+
+def _pick_format(source: AudioFormat, candidates: Sequence[AudioFormat], stage: str) -> AudioFormat:
+    # fewest conversion steps wins, ties go to the earlier (preferred) candidate
+    if not candidates:
+        raise ValueError(f"No audio formats offered for {stage}")
+    return min(candidates, key=lambda candidate: len(AudioConversion(stage, source, candidate).steps))
+
+
+def plan_audio_pipeline(
+    provider_formats: Sequence[AudioFormat],
+    output_format: AudioFormat,
+    input_format: AudioFormat,
+    transcriber_formats: Sequence[AudioFormat],
+    vad_format: Optional[AudioFormat] = None,
+) -> AudioPipelinePlan:
+    """
+    Picks the provider and transcriber formats that need the fewest conversion steps given what
+    the output device plays, what the input device sends and the format VAD runs on.
+    All format lists are in order of preference.
+    """
+    if not provider_formats:
+        raise ValueError("No audio formats offered for synthesizer")
+    provider_format = min(
+        provider_formats,
+        key=lambda candidate: len(AudioConversion("synthesizer", candidate, output_format).steps),
+    )
+    transcriber_source = vad_format if vad_format is not None else input_format
+    return AudioPipelinePlan(
+        provider_format=provider_format,
+        output_format=output_format,
+        input_format=input_format,
+        transcriber_format=_pick_format(transcriber_source, transcriber_formats, "transcriber"),
+        vad_format=vad_format,
+    )
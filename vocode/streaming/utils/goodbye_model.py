@@ -6,6 +6,7 @@ import numpy as np
 import requests
 
 from vocode import getenv
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
 
 SIMILARITY_THRESHOLD = 0.9
 EMBEDDING_SIZE = 1536
@@ -29,13 +30,10 @@ class GoodbyeModel:
         ),
         openai_api_key: Optional[str] = None,
     ):
-        openai.api_type = "azure"
-        openai.api_base = os.environ["AZURE_OPENAI_API_BASE"]
-        openai.api_version = "2023-05-15"
-        openai.api_key = os.environ['AZURE_OPENAI_API_KEY']
+        self.openai_client = OpenAIClientRegistry.get_instance().get_azure_client(api_version="2023-05-15")
 
         # openai.api_key = openai_api_key or getenv("OPENAI_API_KEY")
-        if not openai.api_key:
+        if not self.openai_client.api_key:
             raise ValueError("OPENAI_API_KEY must be set in environment or passed in")
         self.embeddings_cache_path = embeddings_cache_path
         self.goodbye_embeddings: Optional[np.ndarray] = self.load_or_create_embeddings(
@@ -83,7 +81,7 @@ class GoodbyeModel:
             params["model"] = "text-embedding-ada-002"
 
         return np.array(
-            (await openai.Embedding.acreate(**params))["data"][0]["embedding"]
+            (await self.openai_client.acreate(openai.Embedding, **params))["data"][0]["embedding"]
         )
 
 
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+DEFAULT_HOST = "default"
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 32
+DEFAULT_KEEPALIVE_TIMEOUT_SECONDS = 60
+DEFAULT_DNS_CACHE_TTL_SECONDS = 300
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+
+class HTTPSessionPool:
+    """
+    Process-wide aiohttp sessions, one per provider host and event loop, so calls reuse warm keepalive
+    connections instead of paying for TCP and TLS setup on their first request. Sessions live until
+    `close()` on their loop, the components using them must not close them on tear down.
+    """
+
+    _instance: Optional["HTTPSessionPool"] = None
+
+    def __init__(
+        self,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        connection_limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT_SECONDS,
+        dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL_SECONDS,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        # sessions are bound to the event loop they were created on, e.g. a loop per thread
+        self.sessions: Dict[Tuple[asyncio.AbstractEventLoop, str], aiohttp.ClientSession] = {}
+        self.stats: Dict[str, HostStats] = {}
+
+    @classmethod
+    def get_instance(cls) -> "HTTPSessionPool":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def get_host(base_url: Optional[str]) -> str:
+        if not base_url:
+            return DEFAULT_HOST
+        return urlparse(base_url).netloc or base_url
+
+    def create_trace_config(self, stats: HostStats) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            stats.requests += 1
+
+        async def on_connection_create_end(session, context, params):
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            stats.connections_reused += 1
+
+        async def on_dns_cache_hit(session, context, params):
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, context, params):
+            stats.dns_cache_misses += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def create_session(self, host: str) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        stats = self.stats.setdefault(host, HostStats())
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self.create_trace_config(stats)])
+
+    def get_session(self, base_url: Optional[str] = None) -> aiohttp.ClientSession:
+        """
+        The shared session of the running event loop for the host of `base_url`, sessions without a
+        known host share one too. Must be called on a running event loop, i.e. when the session is used.
+        """
+        host = self.get_host(base_url)
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get((loop, host))
+        if session is not None and not session.closed:
+            return session
+        self.drop_sessions_of_closed_loops()
+        session = self.create_session(host)
+        self.sessions[(loop, host)] = session
+        return session
+
+    def drop_sessions_of_closed_loops(self):
+        """
+        Forgets the sessions of loops that were closed without closing them, they can't be closed
+        anymore. Sessions of other running loops are left alone, they may be in use.
+        """
+        for loop, host in [key for key in self.sessions if key[0].is_closed()]:
+            session = self.sessions.pop((loop, host))
+            if not session.closed:
+                self.logger.warning(f"Dropped the pooled HTTP session for {host} of a closed event loop")
+                session.detach()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        stats: Dict[str, Dict[str, int]] = {}
+        for (_, host), session in self.sessions.items():
+            connector = session.connector
+            host_stats = self.stats[host]
+            stats[host] = {
+                "requests": host_stats.requests,
+                "connections_created": host_stats.connections_created,
+                "connections_reused": host_stats.connections_reused,
+                "dns_cache_hits": host_stats.dns_cache_hits,
+                "dns_cache_misses": host_stats.dns_cache_misses,
+                "limit": connector.limit if connector is not None else 0,
+                "limit_per_host": connector.limit_per_host if connector is not None else 0,
+                "sessions": stats.get(host, {}).get("sessions", 0) + 1,
+                "closed": session.closed,
+            }
+        return stats
+
+    async def close(self):
+        """Closes the sessions of the running event loop, a loop of another thread closes its own."""
+        loop = asyncio.get_running_loop()
+        keys = [key for key in self.sessions if key[0] is loop]
+        for key in keys:
+            session = self.sessions.pop(key)
+            if not session.closed:
+                await session.close()
+        self.drop_sessions_of_closed_loops()
+        self.logger.info(f"Closed {len(keys)} pooled HTTP sessions")
@@ -0,0 +1,190 @@
+"""
+In-process classification of what the user says while the bot is speaking. Clear acknowledgements
+and clear requests to stop are decided locally, only the utterances the classifier is unsure about
+are left to the LLM.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from vocode.streaming.ignored_while_talking_fillers_fork import IGNORED_WHILE_TALKING_FILLERS
+
+ACKNOWLEDGEMENTS = IGNORED_WHILE_TALKING_FILLERS + [
+    # en, from the interrupt prompt
+    "Got it",
+    "I follow",
+    "I agree",
+    "That makes sense",
+    "Sounds good",
+    "Indeed",
+    "Absolutely",
+    "Of course",
+    "Go on",
+    "Keep going",
+    "I'm with you",
+    "Continue",
+    "That's clear",
+    # cz
+    "Jasně",
+    "No jo",
+    "Jo jo",
+    "Ano ano",
+    "Pokračujte",
+    "V pořádku",
+    "Mhm",
+    # sk
+    "Hej",
+    "Jasné",
+    # pl
+    "Dobrze",
+    "Rozumiem",
+    "Jasne",
+    "Oczywiście",
+    "Zgadza się",
+]
+
+INTERRUPTING_PHRASES = [
+    # en
+    "Stop",
+    "Wait",
+    "Hold on",
+    "Hang on",
+    "Excuse me",
+    "Just a moment",
+    "Listen",
+    "No no",
+    "That's not right",
+    "That's incorrect",
+    "That's not what I meant",
+    "I disagree",
+    "Let me speak",
+    "I need to say something",
+    "Can I just say something",
+    "I need to correct you",
+    "You're misunderstanding",
+    # cz
+    "Počkejte",
+    "Počkej",
+    "Moment",
+    "Momentík",
+    "Stůjte",
+    "Přestaňte",
+    "Poslouchejte",
+    "Ne ne",
+    "To není pravda",
+    "Nesouhlasím",
+    "Haló",
+    "Prosím vás",
+    # sk
+    "Počkajte",
+    "Počkaj",
+    "Nie nie",
+    "To nie je pravda",
+    "Nesúhlasím",
+    # pl
+    "Chwileczkę",
+    "Zaczekaj",
+    "Proszę poczekać",
+    "To nieprawda",
+]
+
+# an interrupting phrase right after these asks the bot to go on, e.g. "don't stop"
+NEGATIONS = [
+    # en
+    "Don't",
+    "Dont",
+    "Do not",
+    "Not",
+    "Never",
+    "No need to",
+    # pl
+    "Nie",
+]
+
+
+def normalize(text: str) -> str:
+    """Lowercase words without diacritics and punctuation, transcribers are not consistent in either."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(character for character in text if not unicodedata.combining(character))
+    text = re.sub(r"[^\w\s']|_", " ", text)
+    return " ".join(text.split())
+
+
+@dataclass
+class InterruptClassification:
+    is_interrupt: bool
+    confidence: float
+    reason: str
+
+
+class BaseInterruptClassifier:
+    """Decides in-process whether an utterance said over the bot should interrupt it."""
+
+    def classify(self, text: str, last_bot_message: Optional[str] = None) -> InterruptClassification:
+        raise NotImplementedError
+
+
+class LexicalInterruptClassifier(BaseInterruptClassifier):
+    """
+    Matches the utterance against phrase lists. An utterance made only of acknowledgements doesn't
+    interrupt, one containing an interrupting phrase that isn't negated does. A longer one leans to
+    interrupting, as the user is likely telling something about their situation, but long
+    acknowledgements are common too, so it is left to the LLM like everything else.
+    """
+
+    def __init__(
+        self,
+        acknowledgements: Iterable[str] = ACKNOWLEDGEMENTS,
+        interrupting_phrases: Iterable[str] = INTERRUPTING_PHRASES,
+        negations: Iterable[str] = NEGATIONS,
+        min_information_words: int = 6,
+    ):
+        self.acknowledgements = self.to_token_tuples(acknowledgements)
+        self.interrupting_phrases = self.to_token_tuples(interrupting_phrases)
+        self.negations = self.to_token_tuples(negations)
+        self.max_acknowledgement_words = max(len(phrase) for phrase in self.acknowledgements)
+        self.min_information_words = min_information_words
+
+    @staticmethod
+    def to_token_tuples(phrases: Iterable[str]) -> set:
+        return {tuple(normalize(phrase).split()) for phrase in phrases if normalize(phrase)}
+
+    def find_interrupting_phrase(self, words: List[str]) -> Optional[Tuple[str, ...]]:
+        for phrase in self.interrupting_phrases:
+            for start in range(len(words) - len(phrase) + 1):
+                if tuple(words[start : start + len(phrase)]) == phrase and not self.is_negated(words, start):
+                    return phrase
+        return None
+
+    def is_negated(self, words: List[str], start: int) -> bool:
+        return any(tuple(words[max(start - len(negation), 0) : start]) == negation for negation in self.negations)
+
+    def is_acknowledgement(self, words: List[str]) -> bool:
+        """Whether the words split into acknowledgements, such as "yeah okay got it"."""
+        # can_split[i] tells whether words[i:] split into acknowledgements
+        can_split = [False] * len(words) + [True]
+        for start in range(len(words) - 1, -1, -1):
+            can_split[start] = any(
+                can_split[start + length] and tuple(words[start : start + length]) in self.acknowledgements
+                for length in range(1, min(self.max_acknowledgement_words, len(words) - start) + 1)
+            )
+        return can_split[0]
+
+    def classify(self, text: str, last_bot_message: Optional[str] = None) -> InterruptClassification:
+        words = normalize(text).split()
+        if not words:
+            return InterruptClassification(is_interrupt=False, confidence=1.0, reason="empty")
+        interrupting_phrase = self.find_interrupting_phrase(words)
+        if interrupting_phrase is not None:
+            return InterruptClassification(
+                is_interrupt=True, confidence=0.9, reason=f"interrupting phrase '{' '.join(interrupting_phrase)}'"
+            )
+        if self.is_acknowledgement(words):
+            return InterruptClassification(
+                is_interrupt=False, confidence=0.95 if len(words) <= 2 else 0.85, reason="acknowledgement"
+            )
+        if len(words) >= self.min_information_words:
+            # a lean rather than a decision, below the thresholds skipping the LLM, see the class docstring
+            return InterruptClassification(is_interrupt=True, confidence=0.6, reason="information")
+        return InterruptClassification(is_interrupt=True, confidence=0.5, reason="undecided")
@@ -1,51 +1,109 @@
 import asyncio
 import json
 import time
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import openai
 
 from vocode.streaming.transcriber.base_transcriber import Transcription
 from vocode.streaming.utils.default_prompts.interrupt_prompt import INTERRUPTION_PROMPT
+from vocode.streaming.utils.interrupt_classifier import BaseInterruptClassifier, LexicalInterruptClassifier
+from vocode.streaming.utils.openai_client import OpenAIClient, OpenAIClientRegistry
 from vocode.streaming.utils.worker import AsyncQueueWorker
 
 
+INTERRUPT_MODEL = "gpt-3.5-turbo"
+LLAMA3_INTERRUPT_MODEL = "accounts/fireworks/models/llama-v3-70b-instruct"
+
+
+async def ask_llm_to_interrupt(
+        transcript_message: str,
+        last_bot_message: Optional[str],
+        prompt: str = INTERRUPTION_PROMPT,
+        model: str = INTERRUPT_MODEL,
+        client: Optional[OpenAIClient] = None,
+) -> Tuple[bool, str]:
+    """Returns the LLM's decision whether to interrupt together with its raw answer."""
+    client = client or OpenAIClientRegistry.get_instance().get_openai_client()
+    chat_parameters = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": transcript_message},
+            {"role": "assistant", "content": last_bot_message},
+        ]
+    }
+    response = await client.acreate(openai.ChatCompletion, **chat_parameters)
+    message = response['choices'][0]['message']['content']
+    # FIXME: LLAMA sometimes ignores instruction to return json.
+    return "true" in message, message
+
+
 class InterruptWorker(AsyncQueueWorker):
-    """Processes transcriptions to determine if an interrupt is needed."""
+    """Processes transcriptions to determine if an interrupt is needed.
+
+    The in-process classifier decides first, transcriptions it isn't confident enough about
+    are classified by the LLM."""
 
-    def __init__(self, input_queue: asyncio.Queue[Transcription], conversation, prompt: Optional[str] = None):
+    def __init__(
+            self,
+            input_queue: asyncio.Queue[Transcription],
+            conversation,
+            prompt: Optional[str] = None,
+            classifier: Optional[BaseInterruptClassifier] = None,
+    ):
         super().__init__(input_queue)
         self.conversation = conversation
         self.prompt = prompt if prompt else INTERRUPTION_PROMPT
+        self.classifier = classifier or LexicalInterruptClassifier()
+        self.local_decisions = 0
+        self.llm_decisions = 0
 
     async def classify_transcription(self, transcription: Transcription) -> bool:
+        confidence_threshold = self.conversation.agent.agent_config.interrupt_classifier_confidence_threshold
+        if confidence_threshold is not None:
+            classification = self.classifier.classify(
+                transcription.message, self.conversation.transcript.get_last_bot_text()
+            )
+            if classification.confidence >= confidence_threshold:
+                self.local_decisions += 1
+                self.conversation.logger.info(
+                    f"Decision: {classification.is_interrupt} ({classification.reason}, "
+                    f"confidence {classification.confidence})"
+                )
+                return classification.is_interrupt
+            self.conversation.logger.info(
+                f"Interrupt classifier is not confident ({classification.confidence}), asking the LLM"
+            )
+        self.llm_decisions += 1
+        return await self.classify_transcription_with_llm(transcription)
+
+    async def classify_transcription_with_llm(self, transcription: Transcription) -> bool:
         last_bot_message = self.conversation.transcript.get_last_bot_text()
-        transcript_message = transcription.message
-        model = "gpt-3.5-turbo"
+        model = INTERRUPT_MODEL
         if self.conversation.agent.agent_config.type == "agent_llama3":
-            model = "accounts/fireworks/models/llama-v3-70b-instruct"
-        chat_parameters = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": self.prompt},
-                {"role": "user", "content": transcript_message},
-                {"role": "assistant", "content": last_bot_message},
-            ]
-        }
+            model = LLAMA3_INTERRUPT_MODEL
         message = None
         try:
-            response = await openai.ChatCompletion.acreate(**chat_parameters)
-            message = response['choices'][0]['message']['content']
-            #FIXME: LLAMA sometimes ignores instruction to return json.
-            decision = "true" in message #json.loads(message)
+            # the endpoint of the agent, e.g. Fireworks for the llama3 model
+            decision, message = await ask_llm_to_interrupt(
+                transcription.message,
+                last_bot_message,
+                prompt=self.prompt,
+                model=model,
+                client=getattr(self.conversation.agent, "openai_client", None),
+            )
             self.conversation.logger.info(f"Decision: {decision}")
-            return decision#['interrupt'] == 'true'
+            return decision
 
         except Exception as e:
             # Log the exception or handle it as per your error handling policy
             self.conversation.logger.error(f"Error in GPT-3.5 API call: {str(e)}. Message {message}")
             return False
 
+    def get_stats(self) -> Dict[str, int]:
+        return {"local_decisions": self.local_decisions, "llm_decisions": self.llm_decisions}
+
     async def simple_interrupt(self, transcription: Transcription) -> bool:
         return not self.conversation.is_human_speaking and self.conversation.is_interrupt(transcription)
 
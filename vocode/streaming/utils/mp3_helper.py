@@ -1,12 +1,27 @@
 import io
 import wave
+from typing import Callable, Iterator, Optional
+
 import miniaudio
 
+# rate both decode_mp3 and StreamingMp3Decoder resample to, whatever the rate of the mp3
+DECODED_MP3_SAMPLE_RATE = 44100
+
+# (version, layer) -> bitrates in kbps, indexed by the header's bitrate index
+_MPEG1_LAYER3_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_MPEG2_LAYER3_BITRATES = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],  # MPEG 2.5
+}
+_ID3V2_HEADER_SIZE = 10
+
 
 # sampling_rate is the rate of the input, not expected output
 def decode_mp3(mp3_bytes: bytes) -> io.BytesIO:
     # Convert it to a wav chunk using miniaudio
-    wav_chunk = miniaudio.decode(mp3_bytes, nchannels=1)
+    wav_chunk = miniaudio.decode(mp3_bytes, nchannels=1, sample_rate=DECODED_MP3_SAMPLE_RATE)
 
     # Write wav_chunks.samples to io.BytesIO with builtin WAVE
     output_bytes_io = io.BytesIO()
@@ -14,7 +29,165 @@ def decode_mp3(mp3_bytes: bytes) -> io.BytesIO:
     with wave.open(output_bytes_io, "wb") as wave_obj:
         wave_obj.setnchannels(1)
         wave_obj.setsampwidth(2)
-        wave_obj.setframerate(44100)
+        wave_obj.setframerate(DECODED_MP3_SAMPLE_RATE)
         wave_obj.writeframes(wav_chunk.samples)
     output_bytes_io.seek(0)
     return output_bytes_io
+
+
+def get_mp3_frame_length(header: bytes) -> Optional[int]:
+    """Returns the length in bytes of the MPEG layer III frame starting with `header`,
+    or None if the 4 bytes are not a valid frame header."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _MPEG1_LAYER3_BITRATES[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding
+    bitrate = _MPEG2_LAYER3_BITRATES[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding
+
+
+def get_id3v2_tag_length(header: bytes) -> Optional[int]:
+    if len(header) < _ID3V2_HEADER_SIZE or header[:3] != b"ID3":
+        return None
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer_size = _ID3V2_HEADER_SIZE if header[5] & 0x10 else 0
+    return _ID3V2_HEADER_SIZE + size + footer_size
+
+
+class Mp3FrameSource(miniaudio.StreamableSource):
+    """
+    Serves an MP3 stream that is still arriving to a miniaudio decoder.
+
+    The decoder treats short reads during its initialisation as a broken stream, so
+    reads are only answered with whole MP3 frames (or whole ID3 tags), blocking on
+    `read_fragment` until at least one is complete. `read_fragment` returns the next
+    piece of the stream, or None once the stream has ended.
+
+    The decoder probes the first frame header and rewinds to it, so the frame being
+    read is kept until the decoder is past it.
+    """
+
+    def __init__(self, read_fragment: Callable[[], Optional[bytes]]):
+        self.read_fragment = read_fragment
+        # the stream from buffer_start on, position is where the decoder reads next
+        self.buffer = bytearray()
+        self.buffer_start = 0
+        self.position = 0
+        # stream offsets of the last frame / tag whose header has been parsed
+        self.unit_start = 0
+        self.unit_end = 0
+        self.ended = False
+
+    @property
+    def buffered_until(self) -> int:
+        return self.buffer_start + len(self.buffer)
+
+    def _fill(self) -> bool:
+        if self.ended:
+            return False
+        fragment = self.read_fragment()
+        if fragment is None:
+            self.ended = True
+            return False
+        self.buffer.extend(fragment)
+        return True
+
+    def _parse_units(self, until: int):
+        # the decoder may stop reading inside a frame, so the boundaries are tracked
+        # across reads rather than looked for where the decoder stopped
+        if self.unit_end < self.position:
+            self.unit_start = self.unit_end = self.position
+        while self.unit_end < min(until, self.buffered_until):
+            offset = self.unit_end - self.buffer_start
+            unit = bytes(self.buffer[offset : offset + _ID3V2_HEADER_SIZE])
+            if len(unit) < 4 or (unit[:3] == b"ID3" and len(unit) < _ID3V2_HEADER_SIZE):
+                return
+            unit_length = get_id3v2_tag_length(unit) or get_mp3_frame_length(unit)
+            if unit_length is None:
+                # not aligned on a frame, let the decoder resync on what we have
+                self.unit_start = self.unit_end = self.buffered_until
+                return
+            self.unit_start, self.unit_end = self.unit_end, self.unit_end + unit_length
+
+    def _servable_length(self, num_bytes: int) -> int:
+        if self.buffered_until - self.position >= num_bytes:
+            # anything up to the next header that isn't complete yet
+            end = min(self.unit_end, self.buffered_until)
+        elif self.unit_end <= self.buffered_until:
+            end = self.unit_end
+        else:
+            # whole frames / tags only
+            end = self.unit_start
+        return max(min(end - self.position, num_bytes), 0)
+
+    def read(self, num_bytes: int) -> bytes:
+        while True:
+            if self.position <= self.buffered_until:
+                self._parse_units(self.position + num_bytes)
+                available = self._servable_length(num_bytes)
+                if available > 0:
+                    break
+            if not self._fill():
+                available = max(min(num_bytes, self.buffered_until - self.position), 0)
+                break
+        offset = self.position - self.buffer_start
+        output = bytes(self.buffer[offset : offset + available])
+        self.position += available
+        consumed = min(self.position, self.unit_start) - self.buffer_start
+        if consumed > 0:
+            del self.buffer[:consumed]
+            self.buffer_start += consumed
+        return output
+
+    def seek(self, offset: int, origin: miniaudio.SeekOrigin) -> bool:
+        # the decoder rewinds to the first frame after probing it and skips over ID3
+        # tags, seeking back before what is still buffered (or from the end) is refused
+        if origin == miniaudio.SeekOrigin.CURRENT:
+            offset += self.position
+        elif origin != miniaudio.SeekOrigin.START:
+            return False
+        if offset < self.buffer_start:
+            return False
+        self.position = offset
+        return True
+
+
+class StreamingMp3Decoder:
+    """
+    Decodes an MP3 stream incrementally, keeping the decoder state (bit reservoir,
+    overlap and resampler) between frames so each frame is decoded exactly once.
+
+    Iterating yields mono 16-bit PCM at DECODED_MP3_SAMPLE_RATE, identical to what
+    decode_mp3 returns for the complete stream.
+    """
+
+    def __init__(
+        self,
+        read_fragment: Callable[[], Optional[bytes]],
+        frames_to_read: int = 1024,
+    ):
+        self.source = Mp3FrameSource(read_fragment)
+        self.frames_to_read = frames_to_read
+
+    def __iter__(self) -> Iterator[bytes]:
+        stream = miniaudio.stream_any(
+            self.source,
+            source_format=miniaudio.FileFormat.MP3,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=1,
+            sample_rate=DECODED_MP3_SAMPLE_RATE,
+            frames_to_read=self.frames_to_read,
+        )
+        for samples in stream:
+            yield samples.tobytes()
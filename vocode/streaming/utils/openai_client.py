@@ -0,0 +1,118 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import openai
+
+from vocode import getenv
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
+
+OPENAI_API_TYPE = "open_ai"
+OPENAI_API_BASE = "https://api.openai.com/v1"
+AZURE_OPENAI_API_TYPE = "azure"
+AZURE_OPENAI_API_VERSION = "2023-05-15"
+
+
+@dataclass(frozen=True)
+class OpenAIEndpoint:
+    api_base: Optional[str]
+    api_key: Optional[str]
+    api_type: str = OPENAI_API_TYPE
+    api_version: Optional[str] = None
+
+
+class OpenAIClient:
+    """
+    An OpenAI compatible endpoint. Requests pass its credentials per call and go through the pooled
+    session of its host, instead of configuring the openai module globals, which other agents of the
+    process may set to a different provider concurrently.
+    """
+
+    def __init__(self, endpoint: OpenAIEndpoint, session_pool: Optional[HTTPSessionPool] = None):
+        self.endpoint = endpoint
+        self.session_pool = session_pool or HTTPSessionPool.get_instance()
+        self.requests = 0
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self.endpoint.api_key
+
+    def get_request_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_params: Dict[str, Any] = {
+            "api_key": self.endpoint.api_key,
+            "api_base": self.endpoint.api_base,
+            "api_type": self.endpoint.api_type,
+            "api_version": self.endpoint.api_version,
+        }
+        for key, value in params.items():
+            # e.g. a newer api_version for function calls, None keeps the endpoint's
+            if value is not None or key not in request_params:
+                request_params[key] = value
+        return request_params
+
+    async def acreate(self, resource: Any, **params) -> Any:
+        """`resource.acreate(**params)`, e.g. with openai.ChatCompletion, on this endpoint."""
+        self.requests += 1
+        # the openai client takes the session of the request from this context variable
+        token = openai.aiosession.set(self.session_pool.get_session(self.endpoint.api_base))
+        try:
+            return await resource.acreate(**self.get_request_params(params))
+        finally:
+            openai.aiosession.reset(token)
+
+    def create(self, resource: Any, **params) -> Any:
+        """The blocking `resource.create(**params)` on this endpoint."""
+        self.requests += 1
+        return resource.create(**self.get_request_params(params))
+
+
+class OpenAIClientRegistry:
+    """Process-wide OpenAI clients, one per endpoint and credentials."""
+
+    _instance: Optional["OpenAIClientRegistry"] = None
+
+    def __init__(self, session_pool: Optional[HTTPSessionPool] = None):
+        self.logger = logging.getLogger(__name__)
+        self.session_pool = session_pool
+        self.clients: Dict[OpenAIEndpoint, OpenAIClient] = {}
+
+    @classmethod
+    def get_instance(cls) -> "OpenAIClientRegistry":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def get_client(
+        self,
+        api_base: Optional[str],
+        api_key: Optional[str],
+        api_type: str = OPENAI_API_TYPE,
+        api_version: Optional[str] = None,
+    ) -> OpenAIClient:
+        endpoint = OpenAIEndpoint(api_base=api_base, api_key=api_key, api_type=api_type, api_version=api_version)
+        client = self.clients.get(endpoint)
+        if client is None:
+            client = OpenAIClient(endpoint, session_pool=self.session_pool)
+            self.clients[endpoint] = client
+            self.logger.debug(f"Created OpenAI client for {api_type} {api_base}")
+        return client
+
+    def get_openai_client(self, api_key: Optional[str] = None) -> OpenAIClient:
+        return self.get_client(OPENAI_API_BASE, api_key or getenv("OPENAI_API_KEY"))
+
+    def get_azure_client(
+        self, api_version: Optional[str] = AZURE_OPENAI_API_VERSION, api_type: str = AZURE_OPENAI_API_TYPE
+    ) -> OpenAIClient:
+        return self.get_client(
+            getenv("AZURE_OPENAI_API_BASE"), getenv("AZURE_OPENAI_API_KEY"), api_type=api_type, api_version=api_version
+        )
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        for endpoint, client in self.clients.items():
+            endpoint_stats = stats.setdefault(
+                f"{endpoint.api_type} {endpoint.api_base}", {"clients": 0, "requests": 0}
+            )
+            endpoint_stats["clients"] += 1
+            endpoint_stats["requests"] += client.requests
+        return stats
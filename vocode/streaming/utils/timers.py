@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# the loop may run a wakeup slightly before its deadline, timers this close to it fire with it
+TIMER_RESOLUTION_SECONDS = 0.001
+
+
+class LoopTimers:
+    """The timers of one event loop and the wakeup for the earliest of them."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.heap: List[Tuple[float, int, int, "Timer"]] = []
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+        self.wakeup_deadline: Optional[float] = None
+
+
+class Timer:
+    """A deadline registered with the TimerService, fired once or every `interval` seconds."""
+
+    def __init__(
+        self,
+        service: "TimerService",
+        loop_timers: LoopTimers,
+        deadline: float,
+        callback: Callable[[], Any],
+        interval: Optional[float] = None,
+    ):
+        self.service = service
+        # timers fire on the loop they were created on
+        self.loop_timers = loop_timers
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+        # the heap entry with this generation is the live one, older entries are skipped
+        self.generation = 0
+        self.scheduled_deadline = deadline
+        # a periodic callback still running is not started again
+        self.running_task: Optional[asyncio.Task] = None
+
+    def reschedule(self, delay: float):
+        """
+        Moves the deadline to `delay` seconds from now. Postponing only updates the deadline, the
+        timer is pushed back when its old deadline comes, so activity that keeps postponing a
+        timeout costs no heap operations.
+        """
+        if self.cancelled:
+            return
+        self.deadline = self.loop_timers.loop.time() + delay
+        if self.deadline < self.scheduled_deadline:
+            self.service.push(self)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.running_task is not None and not self.running_task.done():
+            self.running_task.cancel()
+
+
+class TimerService:
+    """
+    Process-wide timers on a heap with a single loop wakeup for the earliest deadline, so idle
+    conversations don't each wake the event loop to poll. Callbacks run on the event loop, async
+    callbacks as tasks. Every event loop has a heap of its own, e.g. a loop per thread or per test.
+    """
+
+    _instance: Optional["TimerService"] = None
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.loop_timers: Dict[asyncio.AbstractEventLoop, LoopTimers] = {}
+        self.counter = itertools.count()
+        self.wakeups = 0
+        self.fired = 0
+
+    @classmethod
+    def get_instance(cls) -> "TimerService":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def get_loop_timers(self) -> LoopTimers:
+        loop = asyncio.get_running_loop()
+        loop_timers = self.loop_timers.get(loop)
+        if loop_timers is None:
+            # the timers of closed loops can't fire anymore
+            for closed_loop in [other_loop for other_loop in self.loop_timers if other_loop.is_closed()]:
+                del self.loop_timers[closed_loop]
+            loop_timers = self.loop_timers[loop] = LoopTimers(loop)
+        return loop_timers
+
+    def time(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> Timer:
+        loop_timers = self.get_loop_timers()
+        timer = Timer(self, loop_timers, loop_timers.loop.time() + delay, callback)
+        self.push(timer)
+        return timer
+
+    def call_every(self, interval: float, callback: Callable[[], Any]) -> Timer:
+        loop_timers = self.get_loop_timers()
+        timer = Timer(self, loop_timers, loop_timers.loop.time() + interval, callback, interval=interval)
+        self.push(timer)
+        return timer
+
+    def push(self, timer: Timer, arm: bool = True):
+        loop_timers = timer.loop_timers
+        timer.generation += 1
+        timer.scheduled_deadline = timer.deadline
+        heapq.heappush(loop_timers.heap, (timer.deadline, next(self.counter), timer.generation, timer))
+        if arm:
+            self.arm(loop_timers)
+
+    def arm(self, loop_timers: LoopTimers):
+        """Wakes the loop up at the earliest deadline of its heap, unless it already wakes up sooner."""
+        if not loop_timers.heap:
+            return
+        deadline = loop_timers.heap[0][0]
+        if loop_timers.wakeup_deadline is not None and loop_timers.wakeup_deadline <= deadline:
+            return
+        if loop_timers.wakeup is not None:
+            loop_timers.wakeup.cancel()
+        loop_timers.wakeup_deadline = deadline
+        loop_timers.wakeup = loop_timers.loop.call_at(deadline, self.run_due, loop_timers)
+
+    def run_due(self, loop_timers: LoopTimers):
+        self.wakeups += 1
+        loop_timers.wakeup = None
+        loop_timers.wakeup_deadline = None
+        heap = loop_timers.heap
+        now = loop_timers.loop.time() + TIMER_RESOLUTION_SECONDS
+        due: List[Timer] = []
+        # the wakeup is armed once the heap is settled, for whichever deadline is then the earliest
+        while heap and heap[0][0] <= now:
+            _, _, generation, timer = heapq.heappop(heap)
+            if timer.cancelled or generation != timer.generation:
+                continue
+            if timer.deadline > now:
+                # postponed since it was pushed
+                self.push(timer, arm=False)
+                continue
+            due.append(timer)
+        for timer in due:
+            if timer.interval is not None:
+                timer.deadline = now + timer.interval
+                self.push(timer, arm=False)
+        self.arm(loop_timers)
+        for timer in due:
+            self.fire(timer)
+
+    def fire(self, timer: Timer):
+        if timer.running_task is not None and not timer.running_task.done():
+            return
+        self.fired += 1
+        try:
+            result = timer.callback()
+        except Exception:
+            self.logger.exception("Timer callback failed")
+            return
+        if inspect.isawaitable(result):
+            timer.running_task = asyncio.ensure_future(result)
+            timer.running_task.add_done_callback(self.log_task_exception)
+
+    def log_task_exception(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error("Timer callback failed", exc_info=task.exception())
+
+    def get_stats(self) -> dict:
+        heaps = [loop_timers.heap for loop_timers in self.loop_timers.values()]
+        return {
+            "timers": sum(1 for heap in heaps for _, _, generation, timer in heap
+                          if not timer.cancelled and generation == timer.generation),
+            "heap_size": sum(len(heap) for heap in heaps),
+            "wakeups": self.wakeups,
+            "fired": self.fired,
+        }
@@ -0,0 +1,136 @@
+import logging
+import time
+from enum import Enum
+from typing import Dict, List, Optional
+
+from opentelemetry import trace
+from pydantic import BaseModel
+
+tracer = trace.get_tracer(__name__)
+
+
+class TurnTimelinePoint(str, Enum):
+    """Points of a turn, in the order they happen."""
+
+    USER_SPEECH_END = "user_speech_end"
+    FINAL_TRANSCRIPT = "final_transcript"
+    AGENT_FIRST_TOKEN = "agent_first_token"
+    FIRST_SENTENCE = "first_sentence"
+    TTS_FIRST_BYTE = "tts_first_byte"
+    FIRST_AUDIO_SENT = "first_audio_sent"
+    PLAYBACK_FINISHED = "playback_finished"
+    PLAYBACK_INTERRUPTED = "playback_interrupted"
+
+
+TURN_TIMELINE_POINTS = list(TurnTimelinePoint)
+# the bot speaks several sentences per turn, playback ends with the last of them
+LAST_MARK_WINS_POINTS = {TurnTimelinePoint.PLAYBACK_FINISHED, TurnTimelinePoint.PLAYBACK_INTERRUPTED}
+
+
+def to_nanoseconds(timestamp: float) -> int:
+    return int(timestamp * 1e9)
+
+
+class TurnTimeline(BaseModel):
+    """Wall clock times of the points of one turn, from the end of the user's speech to the end of the reply."""
+
+    turn_index: int
+    points: Dict[TurnTimelinePoint, float] = {}
+
+    def mark(self, point: TurnTimelinePoint, timestamp: Optional[float] = None):
+        if point in self.points and point not in LAST_MARK_WINS_POINTS:
+            return
+        self.points[point] = timestamp if timestamp is not None else time.time()
+
+    @property
+    def interrupted(self) -> bool:
+        return TurnTimelinePoint.PLAYBACK_INTERRUPTED in self.points
+
+    def get_marked_points(self) -> List[TurnTimelinePoint]:
+        return [point for point in TURN_TIMELINE_POINTS if point in self.points]
+
+    def get_stages(self) -> Dict[str, float]:
+        """Seconds from each marked point to the one before it, keyed by the later point."""
+        marked_points = self.get_marked_points()
+        return {
+            point.value: self.points[point] - self.points[previous_point]
+            for previous_point, point in zip(marked_points, marked_points[1:])
+        }
+
+    def get_response_latency(self) -> Optional[float]:
+        """Seconds from the end of the user's speech (or the final transcript) to the first audio sent."""
+        first_audio_sent = self.points.get(TurnTimelinePoint.FIRST_AUDIO_SENT)
+        start = self.points.get(TurnTimelinePoint.USER_SPEECH_END, self.points.get(TurnTimelinePoint.FINAL_TRANSCRIPT))
+        if first_audio_sent is None or start is None:
+            return None
+        return first_audio_sent - start
+
+    def emit_spans(self, conversation_id: str):
+        """Records the turn as a `conversation.turn` span with one child span per stage."""
+        marked_points = self.get_marked_points()
+        if not marked_points:
+            return
+        attributes = {"conversation_id": conversation_id, "turn_index": self.turn_index, "interrupted": self.interrupted}
+        response_latency = self.get_response_latency()
+        if response_latency is not None:
+            attributes["response_latency"] = response_latency
+        turn_span = tracer.start_span(
+            "conversation.turn",
+            start_time=to_nanoseconds(self.points[marked_points[0]]),
+            attributes=attributes,
+        )
+        turn_context = trace.set_span_in_context(turn_span)
+        for previous_point, point in zip(marked_points, marked_points[1:]):
+            stage_span = tracer.start_span(
+                f"conversation.turn.{point.value}",
+                context=turn_context,
+                start_time=to_nanoseconds(self.points[previous_point]),
+            )
+            stage_span.end(end_time=to_nanoseconds(self.points[point]))
+        turn_span.end(end_time=to_nanoseconds(self.points[marked_points[-1]]))
+
+
+class TurnTimelineTracker:
+    """
+    Collects a TurnTimeline per turn of a conversation. A turn starts when a final transcript is
+    sent to the agent and ends when the next one starts or the conversation terminates; its spans
+    are emitted then, once every point is known.
+    """
+
+    def __init__(self, conversation_id: str, logger: Optional[logging.Logger] = None):
+        self.conversation_id = conversation_id
+        self.logger = logger or logging.getLogger(__name__)
+        self.current: Optional[TurnTimeline] = None
+        self.completed: List[TurnTimeline] = []
+
+    def start_turn(self, user_speech_end: Optional[float] = None) -> TurnTimeline:
+        previous_turn_start = None
+        if self.current is not None:
+            previous_turn_start = self.current.points.get(TurnTimelinePoint.FINAL_TRANSCRIPT)
+            self.finish_turn()
+        timeline = TurnTimeline(turn_index=len(self.completed))
+        # speech that ended before the previous turn started belongs to that turn
+        if user_speech_end is not None and (previous_turn_start is None or user_speech_end > previous_turn_start):
+            timeline.mark(TurnTimelinePoint.USER_SPEECH_END, user_speech_end)
+        timeline.mark(TurnTimelinePoint.FINAL_TRANSCRIPT)
+        self.current = timeline
+        return timeline
+
+    def mark(self, point: TurnTimelinePoint, timestamp: Optional[float] = None):
+        """Marks the point on the current turn, points before the first turn are not tracked."""
+        if self.current is not None:
+            self.current.mark(point, timestamp)
+
+    def finish_turn(self):
+        if self.current is None:
+            return
+        timeline, self.current = self.current, None
+        self.completed.append(timeline)
+        self.logger.debug(f"Turn {timeline.turn_index} stages: {timeline.get_stages()}")
+        try:
+            timeline.emit_spans(self.conversation_id)
+        except Exception as e:
+            self.logger.warning(f"Failed to emit spans of turn {timeline.turn_index}: {e}")
+
+    def get_timelines(self) -> List[TurnTimeline]:
+        return self.completed + ([self.current] if self.current is not None else [])
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import threading
+from collections import deque
 import janus
-from typing import Any, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional
 from typing import TypeVar, Generic
 import logging
 
@@ -113,11 +115,13 @@ class InterruptibleEvent(Generic[Payload]):
         self,
         payload: Payload,
         is_interruptible: bool = True,
-        interruption_event: Optional[threading.Event] = None,
+        interruption_event: Optional[asyncio.Event] = None,
     ):
-        self.interruption_event = interruption_event or threading.Event()
+        self.interruption_event = interruption_event or asyncio.Event()
         self.is_interruptible = is_interruptible
         self.payload = payload
+        self.is_finished = False
+        self.finished_callbacks: List[Callable[["InterruptibleEvent"], None]] = []
 
     def interrupt(self) -> bool:
         """
@@ -126,11 +130,27 @@ class InterruptibleEvent(Generic[Payload]):
         if not self.is_interruptible:
             return False
         self.interruption_event.set()
+        self.mark_finished()
         return True
 
     def is_interrupted(self):
         return self.is_interruptible and self.interruption_event.is_set()
 
+    def add_finished_callback(self, callback: Callable[["InterruptibleEvent"], None]):
+        if self.is_finished:
+            callback(self)
+            return
+        self.finished_callbacks.append(callback)
+
+    def mark_finished(self):
+        """Called once the event is processed or interrupted, there is nothing left to interrupt then."""
+        if self.is_finished:
+            return
+        self.is_finished = True
+        callbacks, self.finished_callbacks = self.finished_callbacks, []
+        for callback in callbacks:
+            callback(self)
+
 
 class InterruptibleAgentResponseEvent(InterruptibleEvent[Payload]):
     def __init__(
@@ -138,12 +158,64 @@ class InterruptibleAgentResponseEvent(InterruptibleEvent[Payload]):
         payload: Payload,
         agent_response_tracker: asyncio.Event,
         is_interruptible: bool = True,
-        interruption_event: Optional[threading.Event] = None,
+        interruption_event: Optional[asyncio.Event] = None,
     ):
         super().__init__(payload, is_interruptible, interruption_event)
         self.agent_response_tracker = agent_response_tracker
 
 
+DEFAULT_MAX_INTERRUPTIBLE_EVENTS = 1000
+
+
+class InterruptibleEventRegistry:
+    """
+    The interruptible events of a conversation that are still in flight, so an interrupt reaches all
+    of them. Events leave the registry as soon as they are processed or interrupted, and events that
+    can't be interrupted never enter it. Registering is O(1), interrupting O(events in flight).
+
+    Events nothing consumes (e.g. dropped from a queue without being interrupted) would stay forever,
+    so beyond `max_events` the oldest ones are evicted.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_INTERRUPTIBLE_EVENTS, logger: Optional[logging.Logger] = None):
+        self.max_events = max_events
+        self.logger = logger or logging.getLogger(__name__)
+        # insertion ordered, so the oldest event comes first
+        self.events: Dict[int, InterruptibleEvent] = {}
+        self.registered = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def register(self, event: InterruptibleEvent):
+        if not event.is_interruptible or event.is_finished:
+            return
+        if len(self.events) >= self.max_events:
+            self.events.pop(next(iter(self.events)))
+            self.evicted += 1
+            self.logger.warning(f"More than {self.max_events} interruptible events in flight, evicted the oldest")
+        self.events[id(event)] = event
+        self.registered += 1
+        event.add_finished_callback(self.unregister)
+
+    def unregister(self, event: InterruptibleEvent):
+        self.events.pop(id(event), None)
+
+    def interrupt_all(self) -> int:
+        """Interrupts every event in flight, returns how many were interrupted."""
+        num_interrupts = 0
+        # interrupted events unregister themselves
+        for event in list(self.events.values()):
+            if not event.is_interrupted() and event.interrupt():
+                num_interrupts += 1
+        self.events.clear()
+        return num_interrupts
+
+    def get_stats(self) -> dict:
+        return {"in_flight": len(self.events), "registered": self.registered, "evicted": self.evicted}
+
+
 class InterruptibleEventFactory:
     def create_interruptible_event(
         self, payload: Any, is_interruptible: bool = True
@@ -166,13 +238,38 @@ class InterruptibleEventFactory:
 InterruptibleEventType = TypeVar("InterruptibleEventType", bound=InterruptibleEvent)
 
 
+class OrderedOutputSlot:
+    """Outputs of one item processed by an InterruptibleWorker, held back until the items before it are done."""
+
+    def __init__(self, worker: "InterruptibleWorker", item: InterruptibleEvent):
+        self.worker = worker
+        self.item = item
+        self.task: Optional[asyncio.Task] = None
+        self.buffer: List[Any] = []
+        # set once all earlier items are done, from then on outputs go straight to the output queue
+        self.is_head = asyncio.Event()
+        self.done = False
+
+
+# the slot of the item processed by the current task
+current_output_slot: contextvars.ContextVar[Optional[OrderedOutputSlot]] = contextvars.ContextVar(
+    "current_output_slot", default=None
+)
+
+
 class InterruptibleWorker(AsyncWorker[InterruptibleEventType]):
+    """
+    Processes up to `max_concurrency` items at once while keeping their outputs in input order:
+    the oldest item in flight produces straight to the output queue, the outputs of later items
+    are buffered until every item before them is done. Interrupting cancels all items in flight.
+    """
+
     def __init__(
         self,
         input_queue: asyncio.Queue[InterruptibleEventType],
         output_queue: asyncio.Queue = asyncio.Queue(),
         interruptible_event_factory: InterruptibleEventFactory = InterruptibleEventFactory(),
-        max_concurrency=2,
+        max_concurrency=1,
     ) -> None:
         super().__init__(input_queue, output_queue)
         self.input_queue = input_queue
@@ -180,6 +277,20 @@ class InterruptibleWorker(AsyncWorker[InterruptibleEventType]):
         self.interruptible_event_factory = interruptible_event_factory
         self.current_task = None
         self.interruptible_event = None
+        self.output_slots: Deque[OrderedOutputSlot] = deque()
+        # created in start(): before python 3.10 a semaphore binds to the event loop current at creation
+        self.output_capacity: asyncio.Semaphore
+
+    def start(self) -> asyncio.Task:
+        self.output_capacity = asyncio.Semaphore(self.max_concurrency)
+        return super().start()
+
+    def produce_nonblocking(self, item):
+        slot = current_output_slot.get()
+        if slot is not None and slot.worker is self and not slot.is_head.is_set():
+            slot.buffer.append(item)
+            return
+        super().produce_nonblocking(item)
 
     def produce_interruptible_event_nonblocking(
         self, item: Any, is_interruptible: bool = True
@@ -189,7 +300,7 @@ class InterruptibleWorker(AsyncWorker[InterruptibleEventType]):
                 item, is_interruptible=is_interruptible
             )
         )
-        return super().produce_nonblocking(interruptible_event)
+        return self.produce_nonblocking(interruptible_event)
 
     def produce_interruptible_agent_response_event_nonblocking(
         self,
@@ -204,24 +315,64 @@ class InterruptibleWorker(AsyncWorker[InterruptibleEventType]):
                 agent_response_tracker=agent_response_tracker or asyncio.Event(),
             )
         )
-        return super().produce_nonblocking(interruptible_utterance_event)
+        return self.produce_nonblocking(interruptible_utterance_event)
+
+    async def wait_for_turn(self):
+        """Waits until every item before the one being processed is done, for work that can't run ahead."""
+        slot = current_output_slot.get()
+        if slot is not None and slot.worker is self:
+            await slot.is_head.wait()
 
     async def _run_loop(self):
-        # TODO Implement concurrency with max_nb_of_thread
-        while True:
-            item = await self.input_queue.get()
-            if item.is_interrupted():
-                continue
-            self.interruptible_event = item
-            self.current_task = asyncio.create_task(self.process(item))
-            try:
-                await self.current_task
-            except asyncio.CancelledError:
-                return
-            except Exception as e:
-                logger.exception("InterruptibleWorker", exc_info=True)
-            self.interruptible_event.is_interruptible = False
+        try:
+            while True:
+                item = await self.input_queue.get()
+                if item.is_interrupted():
+                    continue
+                await self.output_capacity.acquire()
+                if item.is_interrupted():
+                    self.output_capacity.release()
+                    continue
+                slot = OrderedOutputSlot(self, item)
+                if not self.output_slots:
+                    slot.is_head.set()
+                self.output_slots.append(slot)
+                self.interruptible_event = item
+                slot.task = asyncio.create_task(self._process_slot(slot))
+                slot.task.add_done_callback(lambda task, slot=slot: self._on_slot_done(slot))
+                self.current_task = slot.task
+        except asyncio.CancelledError:
+            for slot in self.output_slots:
+                slot.task.cancel()
+            return
+
+    async def _process_slot(self, slot: OrderedOutputSlot):
+        current_output_slot.set(slot)
+        try:
+            await self.process(slot.item)
+        except Exception as e:
+            logger.exception("InterruptibleWorker", exc_info=True)
+
+    def _on_slot_done(self, slot: OrderedOutputSlot):
+        # a done callback, so it also runs for tasks cancelled before they started
+        if not slot.task.cancelled():
+            slot.item.is_interruptible = False
+        slot.item.mark_finished()
+        if self.current_task is slot.task:
             self.current_task = None
+        slot.done = True
+        while self.output_slots and self.output_slots[0].done:
+            self.output_slots.popleft()
+            self.output_capacity.release()
+            if not self.output_slots:
+                break
+            head = self.output_slots[0]
+            for output in head.buffer:
+                if isinstance(output, InterruptibleEvent) and output.is_interrupted():
+                    continue
+                super().produce_nonblocking(output)
+            head.buffer.clear()
+            head.is_head.set()
 
     async def process(self, item: InterruptibleEventType):
         """
@@ -235,15 +386,13 @@ class InterruptibleWorker(AsyncWorker[InterruptibleEventType]):
         - threads tasks won't be able to be interrupted. Hopefully not too much of a big deal
             Threads will also get a reference to the interruptible event
         - asyncio tasks will still have to handle CancelledError and clean up resources
+        Cancels every interruptible item in flight, including the ones processed ahead.
         """
-        if (
-            self.current_task
-            and not self.current_task.done()
-            and self.interruptible_event.is_interruptible
-        ):
-            return self.current_task.cancel()
-
-        return False
+        cancelled = False
+        for slot in self.output_slots:
+            if slot.task and not slot.task.done() and slot.item.is_interruptible:
+                cancelled = slot.task.cancel() or cancelled
+        return cancelled
 
 
 class InterruptibleAgentResponseWorker(
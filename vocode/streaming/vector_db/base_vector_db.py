@@ -4,6 +4,9 @@ import aiohttp
 import openai
 from langchain.docstore.document import Document
 
+from vocode.streaming.utils.http_session_pool import HTTPSessionPool
+from vocode.streaming.utils.openai_client import OpenAIClientRegistry
+
 DEFAULT_OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
 
 
@@ -11,14 +14,19 @@ class VectorDB:
     def __init__(
         self,
         aiohttp_session: Optional[aiohttp.ClientSession] = None,
+        base_url: Optional[str] = None,
     ):
-        if aiohttp_session:
-            # the caller is responsible for closing the session
-            self.aiohttp_session = aiohttp_session
-            self.should_close_session_on_tear_down = False
-        else:
-            self.aiohttp_session = aiohttp.ClientSession()
-            self.should_close_session_on_tear_down = True
+        # the caller is responsible for closing the session it passes
+        self.maybe_aiohttp_session = aiohttp_session
+        self.base_url = base_url
+        self.should_close_session_on_tear_down = False
+
+    @property
+    def aiohttp_session(self) -> aiohttp.ClientSession:
+        """The session passed in, or the one shared with the other vector DBs of the loop, see HTTPSessionPool."""
+        if self.maybe_aiohttp_session is not None:
+            return self.maybe_aiohttp_session
+        return HTTPSessionPool.get_instance().get_session(self.base_url)
 
     async def create_openai_embedding(
         self, text, model=DEFAULT_OPENAI_EMBEDDING_MODEL
@@ -30,10 +38,12 @@ class VectorDB:
         engine = os.getenv("AZURE_OPENAI_TEXT_EMBEDDING_ENGINE")
         if engine:
             params["engine"] = engine
+            client = OpenAIClientRegistry.get_instance().get_azure_client()
         else:
             params["model"] = model
+            client = OpenAIClientRegistry.get_instance().get_openai_client()
 
-        return list((await openai.Embedding.acreate(**params))["data"][0]["embedding"])
+        return list((await client.acreate(openai.Embedding, **params))["data"][0]["embedding"])
 
     async def add_texts(
         self,
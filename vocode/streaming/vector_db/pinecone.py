@@ -11,7 +11,6 @@ logger = logging.getLogger(__name__)
 
 class PineconeDB(VectorDB):
     def __init__(self, config: PineconeConfig, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
         self.config = config
 
         self.index_name = self.config.index
@@ -22,6 +21,7 @@ class PineconeDB(VectorDB):
         self.pinecone_url = (
             f"https://{self.index_name}.svc.{self.pinecone_environment}.pinecone.io"
         )
+        super().__init__(*args, base_url=self.pinecone_url, **kwargs)
         self._text_key = "text"
 
     async def add_texts(